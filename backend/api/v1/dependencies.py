@@ -6,8 +6,10 @@ from fastapi.security import OAuth2PasswordBearer
 from backend.core.security import decode_access_token
 from backend.db.models import User
 from bson import ObjectId
+from typing import Optional
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login", auto_error=False)
 
 async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
     """Get current authenticated user from JWT token"""
@@ -41,6 +43,15 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
     print(f"DEBUG: User found: {user.email}")
     return user
 
+async def get_optional_user(token: Optional[str] = Depends(optional_oauth2_scheme)) -> Optional[User]:
+    """Get the authenticated user if a valid token was sent, otherwise None"""
+    if not token:
+        return None
+    payload = decode_access_token(token)
+    if payload is None or payload.get("sub") is None:
+        return None
+    return await User.find_one(User.email == payload["sub"])
+
 def validate_object_id(id_str: str) -> ObjectId:
     """Validate and convert string to ObjectId"""
     try:
@@ -6,13 +6,27 @@ from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from backend.core.config import settings
 from backend.db.models import User
 from backend.api.v1.schemas.auth import UserCreate, UserResponse, Token
-from backend.core.security import verify_password, get_password_hash, create_access_token
+from backend.core.security import (
+    PasswordHasherBusy,
+    verify_password_async,
+    get_password_hash_async,
+    create_access_token,
+)
 from backend.api.v1.dependencies import get_current_user
-from datetime import timedelta
+from datetime import datetime, timedelta
+import logging
 
+logger = logging.getLogger(__name__)
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
+def _hasher_busy(e: PasswordHasherBusy) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=f"Authentication service busy: {e}",
+        headers={"Retry-After": "1"},
+    )
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register(user_data: UserCreate):
     """Register a new user"""
@@ -25,7 +39,10 @@ async def register(user_data: UserCreate):
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    try:
+        hashed_password = await get_password_hash_async(user_data.password)
+    except PasswordHasherBusy as e:
+        raise _hasher_busy(e)
     new_user = User(
         email=user_data.email,
         hashed_password=hashed_password,
@@ -62,7 +79,10 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
         )
     
     # Verify password separately for better error handling
-    password_valid = verify_password(form_data.password, user.hashed_password)
+    try:
+        password_valid, new_hash = await verify_password_async(form_data.password, user.hashed_password)
+    except PasswordHasherBusy as e:
+        raise _hasher_busy(e)
     if not password_valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -76,6 +96,15 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
             detail="Inactive user"
         )
     
+    # Upgrade hashes created with a different BCRYPT_ROUNDS setting (active users only)
+    if new_hash:
+        try:
+            user.hashed_password = new_hash
+            user.updated_at = datetime.utcnow()
+            await user.save()
+        except Exception as e:
+            logger.warning("Password rehash failed for %s: %s", user.email, e)
+    
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": user.email, "user_id": str(user.id)},
@@ -1,21 +1,52 @@
 """
 Export endpoints for generating Python code from models
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from backend.db.models import User, Model, ModelVersion
 from backend.api.v1.dependencies import get_current_user, validate_object_id
-from backend.services.code_generator import CodeGenerator
-from fastapi.responses import FileResponse
-import os
+from backend.core.http_cache import cache_headers, not_modified, set_cache_headers
+from backend.services.version_store import version_store
+from backend.services.code_cache import code_cache, iter_chunks
+from backend.services.code_generator import TARGETS, TARGET_STANDARD
+from backend.services.artifact_exporter import (
+    ARTIFACT_FORMATS,
+    FORMAT_ONNX,
+    FORMAT_TORCHSCRIPT,
+    artifact_exporter,
+)
+from backend.services.inference_scheduler import PRIORITY_BATCH, SchedulerQueueFull, SchedulerShutdown, inference_scheduler
+from backend.services.model_archive import iter_model_archive
+from fastapi.responses import FileResponse, StreamingResponse
+import re
 
 router = APIRouter()
 
+def _validate_target(target: str) -> str:
+    if target not in TARGETS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown export target '{target}'. Choose one of: {', '.join(TARGETS)}"
+        )
+    return target
+
+async def _generate(version: ModelVersion, model_name: str, target: str):
+    try:
+        return await code_cache.get(version, model_name, target)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Failed to generate code: {str(e)}"
+        )
+
 @router.get("/{version_id}/python")
 async def export_python_code(
     version_id: str,
+    request: Request,
+    target: str = Query(TARGET_STANDARD, description="'standard' or 'optimized' (inference helpers and benchmark)"),
     current_user: User = Depends(get_current_user)
 ):
     """Export model version as Python PyTorch code"""
+    _validate_target(target)
     version_obj_id = validate_object_id(version_id)
     
     # Get model version
@@ -35,32 +66,75 @@ async def export_python_code(
             detail="Not authorized to access this model"
         )
     
-    # Generate Python code
-    generator = CodeGenerator(version)
-    code = generator.generate_pytorch_code(model_name=model.name)
+    # Generated code also embeds the model name
+    etag = await version_store.etag(version, "python", model.name, target)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
     
-    # Save to models directory
-    models_dir = os.path.join("models", f"user_{str(current_user.id)}", f"model_{str(version.model_id)}")
-    os.makedirs(models_dir, exist_ok=True)
+    # Generate Python code (served from memory when cached)
+    code = await _generate(version, model.name, target)
     
-    filename = f"model_v{version.version_number}.py"
-    filepath = os.path.join(models_dir, filename)
+    suffix = "" if target == TARGET_STANDARD else f"_{target}"
+    filename = f"model_v{version.version_number}{suffix}.py"
+    headers = cache_headers(etag)
+    headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    headers["Content-Length"] = str(len(code.data))
     
-    with open(filepath, "w") as f:
-        f.write(code)
-    
-    return FileResponse(
-        filepath,
+    return StreamingResponse(
+        iter_chunks(code.data),
         media_type="text/x-python",
-        filename=filename
+        headers=headers
     )
 
 @router.get("/{version_id}/code")
 async def get_python_code(
     version_id: str,
+    request: Request,
+    response: Response,
+    target: str = Query(TARGET_STANDARD, description="'standard' or 'optimized' (inference helpers and benchmark)"),
     current_user: User = Depends(get_current_user)
 ):
     """Get Python code as text (for preview in Monaco Editor)"""
+    _validate_target(target)
+    version_obj_id = validate_object_id(version_id)
+    
+    # Get model version
+    version = await ModelVersion.find_one(ModelVersion.id == version_obj_id)
+    
+    if not version:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Model version not found"
+        )
+    
+    # Get model and verify ownership
+    model = await Model.find_one(Model.id == version.model_id)
+    if not model or model.owner_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this model"
+        )
+    
+    etag = await version_store.etag(version, "code", model.name, target)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    set_cache_headers(response, etag)
+    
+    # Generate Python code (served from memory when cached)
+    code = await _generate(version, model.name, target)
+    
+    return {"code": code.text, "version_id": version_id}
+
+def _batch_runner(user: User):
+    """Run blocking artifact builds as batch work on the shared inference scheduler"""
+    async def run_on_scheduler(func, *args):
+        return await inference_scheduler.submit(str(user.id), func, *args, priority=PRIORITY_BATCH, cost=5.0)
+    return run_on_scheduler
+
+async def _export_artifact(version_id: str, fmt: str, request: Request, current_user: User):
+    """Serve a cached TorchScript/ONNX artifact, building it on first request"""
     version_obj_id = validate_object_id(version_id)
     
     # Get model version
@@ -80,8 +154,85 @@ async def get_python_code(
             detail="Not authorized to access this model"
         )
     
-    # Generate Python code
-    generator = CodeGenerator(version)
-    code = generator.generate_pytorch_code(model_name=model.name)
+    etag = await version_store.etag(version, fmt)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
     
-    return {"code": code, "version_id": version_id}
+    try:
+        path = await artifact_exporter.get(version, fmt, run=_batch_runner(current_user))
+    except SchedulerQueueFull as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": "1"},
+        )
+    except SchedulerShutdown as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to export {fmt}: {str(e)}"
+        )
+    
+    extension, media_type = ARTIFACT_FORMATS[fmt]
+    return FileResponse(
+        path,
+        media_type=media_type,
+        filename=f"model_v{version.version_number}{extension}",
+        headers=cache_headers(etag)
+    )
+
+@router.get("/{version_id}/torchscript")
+async def export_torchscript(
+    version_id: str,
+    request: Request,
+    current_user: User = Depends(get_current_user)
+):
+    """Export model version as a serialized TorchScript module (torch.jit.load)"""
+    return await _export_artifact(version_id, FORMAT_TORCHSCRIPT, request, current_user)
+
+@router.get("/{version_id}/onnx")
+async def export_onnx(
+    version_id: str,
+    request: Request,
+    current_user: User = Depends(get_current_user)
+):
+    """Export model version as an ONNX graph with a dynamic batch axis"""
+    return await _export_artifact(version_id, FORMAT_ONNX, request, current_user)
+
+@router.get("/model/{model_id}/zip")
+async def export_model_archive(
+    model_id: str,
+    include_torchscript: bool = Query(False, description="Also include a TorchScript module per version"),
+    current_user: User = Depends(get_current_user)
+):
+    """Export every version of a model as a zip archive, streamed as it is generated"""
+    model_obj_id = validate_object_id(model_id)
+    
+    model = await Model.find_one(Model.id == model_obj_id)
+    if not model:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Model not found"
+        )
+    if model.owner_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this model"
+        )
+    
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", model.name).strip("._") or "model"
+    return StreamingResponse(
+        iter_model_archive(model, include_torchscript, run=_batch_runner(current_user)),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{safe_name}_versions.zip"'}
+    )
@@ -1,26 +1,113 @@
 """
 Inference endpoints for running models and visualizing outputs
 """
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, UploadFile, File, Query
 from backend.db.models import User, Model, ModelVersion
 from backend.api.v1.dependencies import get_current_user, validate_object_id
-from backend.services.inference_engine import InferenceEngine
+from backend.core.http_cache import not_modified, set_cache_headers
+from backend.core.rate_limit import admission_controller, client_key, inference_cost
+from backend.services.version_store import version_store
+from backend.services.inference_engine import INFERENCE_PHASE_SECONDS, InferenceEngine
+from backend.services.inference_backends import backend_pool, run_prediction
+from backend.services.autotuner import autotuner
+from backend.services.inference_scheduler import (
+    PRIORITY_INTERACTIVE,
+    PRIORITY_PROFILING,
+    SchedulerQueueFull,
+    SchedulerShutdown,
+    inference_scheduler,
+)
 from backend.api.v1.schemas.inference import (
     InferenceRequest,
     InferenceResponse,
     LayerOutput,
     ModelConfig,
 )
-import numpy as np
-from PIL import Image
 import io
-from typing import List
+import time
+from typing import Any, Dict, List, Optional
 
 router = APIRouter()
 
+def _build_engine(version: ModelVersion) -> InferenceEngine:
+    try:
+        return InferenceEngine(version)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to build model: {str(e)}"
+        )
+
+def _build_and_run(version: ModelVersion, input_data: List[Any], input_shape: Optional[List[int]]) -> Dict[str, Any]:
+    """Build the model and run one forward pass (runs on a scheduler worker)"""
+    engine = _build_engine(version)
+    return engine.run_inference(input_data, input_shape=input_shape)
+
+def _build_and_describe(version: ModelVersion) -> Dict[str, Any]:
+    return _build_engine(version).get_model_config()
+
+def _json_response(response: InferenceResponse, serialization_start: float) -> Response:
+    """Serialize once here (timed) instead of letting FastAPI re-validate the model it gets back"""
+    content = response.model_dump_json()
+    INFERENCE_PHASE_SECONDS.observe(time.perf_counter() - serialization_start, phase="serialization")
+    return Response(content=content, media_type="application/json")
+
+async def _schedule(user: User, func, *args, cost: float = 1.0, priority: str = PRIORITY_INTERACTIVE):
+    """Run blocking model work through the fair scheduler"""
+    try:
+        return await inference_scheduler.submit(
+            str(user.id), func, *args, priority=priority, cost=cost
+        )
+    except SchedulerQueueFull as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": "1"},
+        )
+    except SchedulerShutdown as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+        )
+
+async def _infer(
+    user: User,
+    version: ModelVersion,
+    input_data: List[Any],
+    input_shape: Optional[List[int]],
+    capture_layers: bool,
+    backend: Optional[str],
+    cost: float,
+) -> Dict[str, Any]:
+    """Run with layer capture on the eager engine, or prediction-only on a cached backend"""
+    if capture_layers:
+        return await _schedule(user, _build_and_run, version, input_data, input_shape, cost=cost)
+    
+    try:
+        # Explicit choice, else the autotuned backend for this architecture, else the default
+        backend_name = backend_pool.resolve_name(backend or await autotuner.preferred_backend(version))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    async def run_on_scheduler(func, *args):
+        return await _schedule(user, func, *args, cost=cost)
+    
+    try:
+        loaded = await backend_pool.get(version, backend_name, run=run_on_scheduler)
+        return await _schedule(user, run_prediction, loaded, input_data, input_shape, cost=cost)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
 @router.post("/run", response_model=InferenceResponse)
 async def run_inference(
     request: InferenceRequest,
+    http_request: Request,
     current_user: User = Depends(get_current_user)
 ):
     """Run inference on a model version with sample input"""
@@ -33,6 +120,7 @@ async def run_inference(
         )
     
     # Get model version
+    lookup_start = time.perf_counter()
     version = await ModelVersion.find_one(ModelVersion.id == version_obj_id)
     
     if not version:
@@ -48,23 +136,19 @@ async def run_inference(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to access this model"
         )
+    await version_store.resolve(version)
+    INFERENCE_PHASE_SECONDS.observe(time.perf_counter() - lookup_start, phase="version_lookup")
+    cost = inference_cost(request.input_shape or version.input_shape, version.architecture)
+    await admission_controller.admit(client_key(http_request, current_user), "inference", cost)
     
-    # Initialize inference engine
-    try:
-        engine = InferenceEngine(version)
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to build model: {str(e)}"
-        )
-    
-    # Run inference
+    # Build the model and run inference on a scheduler worker
     try:
-        result = engine.run_inference(
-            request.input_data,
-            input_shape=request.input_shape
+        result = await _infer(
+            current_user, version, request.input_data, request.input_shape,
+            request.capture_layers, request.backend, cost
         )
         
+        serialization_start = time.perf_counter()
         # Convert layer outputs to response format
         layer_outputs = [
             LayerOutput(
@@ -88,7 +172,7 @@ async def run_inference(
             if 0 <= idx < len(version.class_labels):
                 predicted_class_label = version.class_labels[idx]
         
-        return InferenceResponse(
+        response = InferenceResponse(
             version_id=request.version_id,
             output=result["output"],
             output_shape=result["output_shape"],
@@ -97,7 +181,11 @@ async def run_inference(
             confidence=result.get("confidence"),
             layer_outputs=layer_outputs,
             processing_time=result["processing_time"],
+            backend=result.get("backend"),
         )
+        return _json_response(response, serialization_start)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -107,7 +195,10 @@ async def run_inference(
 @router.post("/run-image", response_model=InferenceResponse)
 async def run_inference_image(
     version_id: str,
+    http_request: Request,
     file: UploadFile = File(...),
+    capture_layers: bool = Query(True, description="False returns only the prediction, using a faster backend"),
+    backend: Optional[str] = Query(None, description="'eager' or 'onnxruntime' when capture_layers is false"),
     current_user: User = Depends(get_current_user)
 ):
     """Run inference with an uploaded image"""
@@ -120,6 +211,7 @@ async def run_inference_image(
         )
     
     # Get model version
+    lookup_start = time.perf_counter()
     version = await ModelVersion.find_one(ModelVersion.id == version_obj_id)
     
     if not version:
@@ -135,7 +227,15 @@ async def run_inference_image(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to access this model"
         )
+    await version_store.resolve(version)
+    INFERENCE_PHASE_SECONDS.observe(time.perf_counter() - lookup_start, phase="version_lookup")
+    cost = inference_cost(version.input_shape, version.architecture)
+    await admission_controller.admit(client_key(http_request, current_user), "inference", cost)
     
+    # Imported here so app startup does not pay for numpy and PIL
+    import numpy as np
+    from PIL import Image
+
     # Read and process image
     try:
         image_data = await file.read()
@@ -164,22 +264,14 @@ async def run_inference_image(
             detail=f"Failed to process image: {str(e)}"
         )
     
-    # Initialize inference engine
-    try:
-        engine = InferenceEngine(version)
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to build model: {str(e)}"
-        )
-    
-    # Run inference
+    # Build the model and run inference on a scheduler worker
     try:
-        result = engine.run_inference(
-            input_data,
-            input_shape=version.input_shape
+        result = await _infer(
+            current_user, version, input_data, version.input_shape,
+            capture_layers, backend, cost
         )
         
+        serialization_start = time.perf_counter()
         # Convert layer outputs to response format
         layer_outputs = [
             LayerOutput(
@@ -199,7 +291,7 @@ async def run_inference_image(
             if 0 <= idx < len(version.class_labels):
                 predicted_class_label = version.class_labels[idx]
         
-        return InferenceResponse(
+        response = InferenceResponse(
             version_id=version_id,
             output=result["output"],
             output_shape=result["output_shape"],
@@ -208,7 +300,11 @@ async def run_inference_image(
             confidence=result.get("confidence"),
             layer_outputs=layer_outputs,
             processing_time=result["processing_time"],
+            backend=result.get("backend"),
         )
+        return _json_response(response, serialization_start)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -218,6 +314,8 @@ async def run_inference_image(
 @router.get("/{version_id}/config", response_model=ModelConfig)
 async def get_model_config(
     version_id: str,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user)
 ):
     """Get model configuration and metadata"""
@@ -246,10 +344,18 @@ async def get_model_config(
             detail="Not authorized to access this model"
         )
     
+    # The config only depends on the version, so skip the model build when
+    # the client already has it
+    etag = await version_store.etag(version, "config")
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    set_cache_headers(response, etag)
+    await version_store.resolve(version)
+    
     # Build model to get config
     try:
-        engine = InferenceEngine(version)
-        config = engine.get_model_config()
+        config = await _schedule(current_user, _build_and_describe, version)
         
         return ModelConfig(
             architecture=config["architecture"],
@@ -258,9 +364,77 @@ async def get_model_config(
             total_parameters=config["total_parameters"],
             trainable_parameters=config["trainable_parameters"],
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to get model config: {str(e)}"
         )
 
+AUTOTUNE_COST = 10.0
+
+@router.post("/{version_id}/autotune")
+async def autotune_version(
+    version_id: str,
+    request: Request,
+    force: bool = Query(False, description="Benchmark again even if this architecture was already tuned"),
+    current_user: User = Depends(get_current_user)
+):
+    """Benchmark prediction backends for a version and route prediction-only requests to the fastest"""
+    try:
+        version_obj_id = validate_object_id(version_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid version ID: {str(e)}"
+        )
+    
+    # Get model version
+    version = await ModelVersion.find_one(ModelVersion.id == version_obj_id)
+    
+    if not version:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Model version not found"
+        )
+    
+    # Get model and verify ownership
+    model = await Model.find_one(Model.id == version.model_id)
+    if not model or model.owner_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this model"
+        )
+    await admission_controller.admit(client_key(request, current_user), "autotune", AUTOTUNE_COST)
+    
+    # Builds and benchmarks are profiling work; they yield to interactive requests
+    async def run_on_scheduler(func, *args):
+        return await _schedule(current_user, func, *args, cost=AUTOTUNE_COST, priority=PRIORITY_PROFILING)
+    
+    try:
+        result = await autotuner.tune(version, run=run_on_scheduler, force=force)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Autotuning failed: {str(e)}"
+        )
+    
+    return {"version_id": version_id, **result}
+
+@router.get("/scheduler/stats")
+async def get_scheduler_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """Inference queue depth and queue wait per user (all users for superusers)"""
+    if current_user.is_superuser:
+        return inference_scheduler.stats()
+    return inference_scheduler.stats(tenant=str(current_user.id))
+
@@ -1,7 +1,7 @@
 """
 Model management endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from typing import List
 from datetime import datetime
 from bson import ObjectId
@@ -10,6 +10,8 @@ from backend.api.v1.dependencies import get_current_user, validate_object_id
 from backend.api.v1.schemas.models import (
     ModelCreate, ModelResponse, ModelVersionCreate, ModelVersionResponse
 )
+from backend.core.http_cache import make_etag, not_modified, set_cache_headers
+from backend.services.version_store import version_store
 
 router = APIRouter()
 
@@ -166,22 +168,15 @@ async def create_model_version(
             detail="Model not found"
         )
     
-    # Get next version number
-    existing_versions = await ModelVersion.find(
-        ModelVersion.model_id == model_obj_id
-    ).to_list()
-    next_version = max([v.version_number for v in existing_versions], default=0) + 1
-    
-    new_version = ModelVersion(
-        model_id=model_obj_id,
-        version_number=next_version,
-        architecture=version_data.architecture,
+    # Stored as a snapshot or a delta against the previous version
+    new_version = await version_store.create_version(
+        model_obj_id,
+        version_data.architecture,
         custom_loss=version_data.custom_loss,
         input_shape=version_data.input_shape,
         output_shape=version_data.output_shape,
         notes=version_data.notes
     )
-    await new_version.insert()
     
     return ModelVersionResponse(
         id=str(new_version.id),
@@ -200,6 +195,8 @@ async def create_model_version(
 @router.get("/{model_id}/versions", response_model=List[ModelVersionResponse])
 async def get_model_versions(
     model_id: str,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user)
 ):
     """Get all versions for a model"""
@@ -219,7 +216,14 @@ async def get_model_versions(
     
     versions = await ModelVersion.find(
         ModelVersion.model_id == model_obj_id
-    ).to_list()
+    ).sort(+ModelVersion.version_number).to_list()
+    
+    etag = make_etag(model_obj_id, *[await version_store.etag(v) for v in versions])
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    set_cache_headers(response, etag)
+    await version_store.resolve_many(versions)
     
     return [
         ModelVersionResponse(
@@ -242,6 +246,8 @@ async def get_model_versions(
 async def get_model_version(
     model_id: str,
     version_id: str,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific model version"""
@@ -271,6 +277,13 @@ async def get_model_version(
             detail="Version not found"
         )
     
+    etag = await version_store.etag(version)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    set_cache_headers(response, etag)
+    await version_store.resolve(version)
+    
     return ModelVersionResponse(
         id=str(version.id),
         model_id=str(version.model_id),
@@ -1,14 +1,22 @@
-from fastapi import APIRouter, HTTPException, Depends
-from pydantic import BaseModel
-from typing import Dict, Any, List
-from backend.services.gemini_service import GeminiService
-from backend.services.simulation_service import SimulationService
+from fastapi import APIRouter, HTTPException, Depends, Request, WebSocket, WebSocketDisconnect, status
+from pydantic import BaseModel, Field, ValidationError
+from typing import Dict, Any, AsyncIterator, List, Literal, Optional
+from backend.db.models import User
+from backend.api.v1.dependencies import get_optional_user
+from backend.core.rate_limit import admission_controller, client_key, simulation_cost
+from backend.services.gemini_service import get_gemini_service
+from backend.services.architecture_analyzer import architecture_analyzer
+from backend.services.simulation_service import PACED_EPOCHS_PER_SECOND, SimulationService
+from backend.services.training_engine import TrainingError, TrainingQueueFull, training_engine
+from backend.services.sweep_service import SweepService, expand_trials
+from backend.services.run_multiplexer import RunMultiplexer
+from backend.core.config import settings
 from fastapi.responses import StreamingResponse
 import json
 
 router = APIRouter()
-gemini_service = GeminiService()
 simulation_service = SimulationService()
+sweep_service = SweepService(simulation_service, training_engine)
 
 class OptimizationRequest(BaseModel):
     architecture: Dict[str, Any]
@@ -19,39 +27,324 @@ class SimulationRequest(BaseModel):
     architecture: Dict[str, Any]
     dataset_stats: Dict[str, Any]
     training_config: Dict[str, Any]
+    # "paced": SSE at 10 epochs/s (demo), "fast": all metrics in one JSON response,
+    # "stream": SSE at `epochs_per_second`, "real": SSE from actual training on synthetic data
+    mode: Literal["paced", "fast", "stream", "real"] = "paced"
+    seed: Optional[int] = None  # Same seed, same curves
+    epochs_per_second: Optional[float] = Field(None, gt=0, le=1000)
+
+class SweepRequest(BaseModel):
+    architecture: Dict[str, Any]
+    dataset_stats: Dict[str, Any]
+    training_config: Dict[str, Any]  # Base config; swept keys are overridden per trial
+    # grid: {"learning_rate": [0.1, 0.01]}; random: lists of choices or
+    # {"min": 1e-4, "max": 1e-1, "log": true, "type": "float"|"int"}
+    parameters: Dict[str, Any]
+    search: Literal["grid", "random"] = "grid"
+    num_trials: Optional[int] = Field(None, ge=1)  # Random search only
+    mode: Literal["fast", "real"] = "fast"  # Simulated curves or real training
+    metric: Literal["valLoss", "trainLoss", "valAcc", "trainAcc"] = "valLoss"
+    max_concurrency: int = Field(4, ge=1)
+    early_stopping: bool = True
+    grace_epochs: int = Field(5, ge=1)  # Epochs before a trial can be stopped
+    seed: Optional[int] = None
+
+# Token cost of one LLM analysis request
+SUGGESTION_COST = 5.0
+# Token cost of one local (rule-based) analysis
+LOCAL_SUGGESTION_COST = 0.5
+
+def _use_local_engine() -> bool:
+    engine = settings.SUGGESTION_ENGINE
+    return engine == "local" or (engine == "auto" and get_gemini_service().model is None)
+
+# Real training costs this many times a simulated run of the same length
+REAL_TRAINING_COST_FACTOR = 5.0
+
 @router.post("/suggestions")
-async def get_optimization_suggestions(request: OptimizationRequest):
+async def get_optimization_suggestions(
+    request: OptimizationRequest,
+    http_request: Request,
+    current_user: Optional[User] = Depends(get_optional_user)
+):
     """
-    Get optimization suggestions from Gemini based on architecture and dataset stats.
+    Get optimization suggestions based on architecture and dataset stats,
+    from Gemini or the local analyzer (see SUGGESTION_ENGINE).
     """
-    result = await gemini_service.get_optimization_suggestions(
+    if _use_local_engine():
+        await admission_controller.admit(client_key(http_request, current_user), "suggestions", LOCAL_SUGGESTION_COST)
+        return architecture_analyzer.analyze(
+            request.architecture,
+            request.dataset_stats,
+            request.training_metrics
+        )
+    
+    await admission_controller.admit(client_key(http_request, current_user), "suggestions", SUGGESTION_COST)
+    result = await get_gemini_service().get_optimization_suggestions(
         request.architecture,
         request.dataset_stats,
         request.training_metrics
     )
     return result
 
+@router.post("/suggestions/stream")
+async def stream_optimization_suggestions(
+    request: OptimizationRequest,
+    http_request: Request,
+    include_local: bool = True,
+    current_user: Optional[User] = Depends(get_optional_user)
+):
+    """
+    Stream optimization suggestions over SSE.
+    
+    The local analysis comes first ({"type": "local", "analysis", "suggestions"}),
+    then the Gemini answer part by part ({"type": "analysis"} and one
+    {"type": "suggestion"} per suggestion), ending with {"type": "done", "engine"}.
+    """
+    use_local = _use_local_engine()
+    cost = LOCAL_SUGGESTION_COST if use_local else SUGGESTION_COST
+    await admission_controller.admit(client_key(http_request, current_user), "suggestions", cost)
+    
+    async def event_generator():
+        if include_local or use_local:
+            local = architecture_analyzer.analyze(
+                request.architecture,
+                request.dataset_stats,
+                request.training_metrics
+            )
+            yield f"data: {json.dumps({'type': 'local', **local})}\n\n"
+        
+        if use_local:
+            yield f"data: {json.dumps({'type': 'done', 'engine': 'local'})}\n\n"
+        else:
+            async for event in get_gemini_service().stream_optimization_suggestions(
+                request.architecture,
+                request.dataset_stats,
+                request.training_metrics
+            ):
+                if event["type"] == "done":
+                    event = {**event, "engine": "gemini"}
+                yield f"data: {json.dumps(event)}\n\n"
+        yield "data: [DONE]\n\n"
+    
+    return StreamingResponse(event_generator(), media_type="text/event-stream")
+
+def _check_training_capacity() -> None:
+    """Reject real training with 503 while the queue is full (checked before charging tokens)"""
+    try:
+        training_engine.check_capacity()
+    except TrainingQueueFull as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Training is busy: {e}",
+            headers={"Retry-After": "5"},
+        )
+
+async def _open_run(request: SimulationRequest, key: str) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Admit and validate a simulation or training run and return its metric stream
+    
+    Shared by the SSE endpoint and the WebSocket. Raises HTTPException (400/429/503)
+    before any work starts; a real training stream raises TrainingError if the
+    worker fails, and closing it cancels the job. Requests are validated before
+    admission so a 400 costs no tokens.
+    """
+    cost = simulation_cost(request.training_config)
+    if request.mode == "real":
+        _check_training_capacity()
+        try:
+            spec = training_engine.prepare(
+                request.architecture,
+                request.dataset_stats,
+                request.training_config,
+                seed=request.seed
+            )
+        except (TypeError, ValueError) as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid training request: {str(e)}"
+            )
+        await admission_controller.admit(key, "simulate_train", cost * REAL_TRAINING_COST_FACTOR)
+        return training_engine.run(spec)
+    
+    try:
+        # The whole curve set is one vectorized computation (bounded by SIMULATION_MAX_EPOCHS)
+        # and doubles as validation; modes differ only in delivery
+        curves = simulation_service.simulate_curves(
+            request.architecture,
+            request.dataset_stats,
+            request.training_config,
+            seed=request.seed
+        )
+    except (TypeError, ValueError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid training config: {str(e)}"
+        )
+    await admission_controller.admit(key, "simulate_train", cost)
+    
+    epochs_per_second = PACED_EPOCHS_PER_SECOND
+    if request.mode == "fast":
+        epochs_per_second = None
+    elif request.mode == "stream":
+        epochs_per_second = request.epochs_per_second or PACED_EPOCHS_PER_SECOND
+    return simulation_service.pace(curves, epochs_per_second)
+
 @router.post("/simulate/train")
-async def simulate_training(request: SimulationRequest):
+async def simulate_training(
+    request: SimulationRequest,
+    http_request: Request,
+    current_user: Optional[User] = Depends(get_optional_user)
+):
     """
     Stream training simulation metrics.
     """
+    stream = await _open_run(request, client_key(http_request, current_user))
+    
+    if request.mode == "fast":
+        return {"metrics": [metrics async for metrics in stream], "seed": request.seed}
+    
     async def event_generator():
-        async for metrics in simulation_service.simulate_training(
+        # A real training run is cancelled when this generator is closed (client disconnect)
+        try:
+            async for metrics in stream:
+                yield f"data: {json.dumps(metrics)}\n\n"
+        except TrainingError as e:
+            yield f"data: {json.dumps({'error': str(e)})}\n\n"
+        finally:
+            await stream.aclose()
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(event_generator(), media_type="text/event-stream")
+
+@router.websocket("/simulate/ws")
+async def simulation_socket(websocket: WebSocket, token: Optional[str] = None):
+    """
+    Run many simulations or training runs over one WebSocket.
+    
+    Client messages:
+        {"type": "subscribe", "id": "<run id>", "request": <SimulationRequest>}
+        {"type": "cancel", "id": "<run id>"}
+        {"type": "ping"}
+    Server messages:
+        {"type": "metrics", "id", "data": [epoch metrics, ...], "skipped"?}  (batched when the client lags;
+            "skipped" counts epochs dropped because it fell too far behind)
+        {"type": "done" | "cancelled", "id"}, {"type": "error", "id"?, "detail"}
+        {"type": "stopped", "id", "reason"}  (real training hit its time budget)
+        {"type": "heartbeat", "active": [run ids]}, {"type": "pong"}
+    Disconnecting cancels every run of the connection.
+    """
+    # Browsers cannot set headers on WebSockets, so the JWT comes as ?token=
+    current_user = await get_optional_user(token)
+    key = client_key(websocket, current_user)
+    await websocket.accept()
+    
+    async with RunMultiplexer(
+        websocket.send_json,
+        heartbeat_interval=settings.WEBSOCKET_HEARTBEAT_SECONDS,
+        max_runs=settings.WEBSOCKET_MAX_RUNS
+    ) as runs:
+        try:
+            while True:
+                try:
+                    message = json.loads(await websocket.receive_text())
+                except ValueError:
+                    runs.post({"type": "error", "detail": "Messages must be JSON"})
+                    continue
+                kind = message.get("type") if isinstance(message, dict) else None
+                run_id = str(message.get("id", "")) if kind else ""
+                
+                if kind == "ping":
+                    runs.post({"type": "pong"})
+                elif kind == "cancel":
+                    if not runs.cancel(run_id):
+                        runs.post({"type": "error", "id": run_id, "detail": "No active run with this id"})
+                elif kind == "subscribe" and run_id:
+                    try:
+                        request = SimulationRequest.model_validate(message.get("request") or {})
+                        # Checked before admission so a rejected subscribe costs no tokens
+                        runs.check_available(run_id)
+                        runs.start(run_id, await _open_run(request, key))
+                    except ValidationError as e:
+                        runs.post({"type": "error", "id": run_id, "detail": json.loads(e.json(include_url=False))})
+                    except HTTPException as e:
+                        runs.post({"type": "error", "id": run_id, "status": e.status_code, "detail": e.detail})
+                    except ValueError as e:
+                        runs.post({"type": "error", "id": run_id, "detail": str(e)})
+                else:
+                    runs.post({"type": "error", "detail": "Expected a subscribe, cancel or ping message with an id"})
+        except WebSocketDisconnect:
+            pass
+
+@router.post("/simulate/sweep")
+async def simulate_sweep(
+    request: SweepRequest,
+    http_request: Request,
+    current_user: Optional[User] = Depends(get_optional_user)
+):
+    """
+    Run a hyperparameter sweep and stream per-trial progress, ending with a ranked summary.
+    """
+    try:
+        configs = expand_trials(
+            request.training_config,
+            request.parameters,
+            search=request.search,
+            num_trials=request.num_trials,
+            seed=request.seed
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    try:
+        trials = sweep_service.prepare(
+            request.mode,
             request.architecture,
             request.dataset_stats,
-            request.training_config
+            configs,
+            seed=request.seed
+        )
+    except (TypeError, ValueError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid trial config: {str(e)}"
+        )
+    
+    cost = sum(simulation_cost(config) for config in configs)
+    if request.mode == "real":
+        _check_training_capacity()
+        cost *= REAL_TRAINING_COST_FACTOR
+    # Charged in full, after validation: capping would make a large sweep as cheap as one long run
+    await admission_controller.admit(client_key(http_request, current_user), "simulate_sweep", cost, cap_cost=False)
+    
+    async def event_generator():
+        async for event in sweep_service.run(
+            request.mode,
+            configs,
+            trials,
+            metric=request.metric,
+            max_concurrency=min(request.max_concurrency, settings.SWEEP_MAX_CONCURRENCY),
+            early_stopping=request.early_stopping,
+            grace_epochs=request.grace_epochs
         ):
-            yield f"data: {json.dumps(metrics)}\n\n"
+            yield f"data: {json.dumps(event)}\n\n"
         yield "data: [DONE]\n\n"
-
+    
     return StreamingResponse(event_generator(), media_type="text/event-stream")
 
 @router.post("/simulate/batch")
-async def generate_synthetic_batch(request: SimulationRequest):
+async def generate_synthetic_batch(
+    request: SimulationRequest,
+    http_request: Request,
+    current_user: Optional[User] = Depends(get_optional_user)
+):
     """
     Generate info about a synthetic batch.
     """
+    await admission_controller.admit(client_key(http_request, current_user), "simulate_batch")
     return simulation_service.generate_synthetic_batch(
         request.dataset_stats,
         request.training_config.get('batch_size', 32)
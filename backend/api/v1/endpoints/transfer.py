@@ -0,0 +1,254 @@
+"""
+Bulk NDJSON export and import of a user's models and versions
+"""
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from bson import ObjectId
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from backend.core.config import settings
+from backend.db.models import User, Model, ModelVersion
+from backend.api.v1.dependencies import get_current_user
+from backend.services.version_store import version_store
+
+router = APIRouter()
+
+EXPORT_FORMAT = "dlstudio-ndjson"
+EXPORT_FORMAT_VERSION = 1
+MAX_REPORTED_ERRORS = 100
+
+MODEL_FIELDS = ["name", "description", "model_type", "created_at", "updated_at"]
+VERSION_FIELDS = [
+    "version_number",
+    "architecture",
+    "custom_loss",
+    "input_shape",
+    "output_shape",
+    "notes",
+    "class_labels",
+    "segmentation_labels",
+    "layer_auto_config",
+    "is_active",
+    "created_at",
+    "updated_at",
+]
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def _dump_line(record: Dict[str, Any]) -> bytes:
+    return (json.dumps(record, default=_json_default, separators=(",", ":")) + "\n").encode("utf-8")
+
+def _model_record(model: Model) -> Dict[str, Any]:
+    record = {"type": "model", "id": str(model.id)}
+    record.update({field: getattr(model, field) for field in MODEL_FIELDS})
+    return record
+
+def _version_record(version: ModelVersion) -> Dict[str, Any]:
+    record = {"type": "version", "id": str(version.id), "model_id": str(version.model_id)}
+    record.update({field: getattr(version, field) for field in VERSION_FIELDS})
+    return record
+
+async def _export_records(user: User) -> AsyncIterator[bytes]:
+    """Yield NDJSON lines for every model and version owned by `user`"""
+    yield _dump_line({
+        "type": "header",
+        "format": EXPORT_FORMAT,
+        "format_version": EXPORT_FORMAT_VERSION,
+        "exported_at": datetime.utcnow(),
+    })
+    async for model in Model.find(Model.owner_id == user.id).sort(+Model.id):
+        yield _dump_line(_model_record(model))
+        previous: Optional[ModelVersion] = None
+        async for version in ModelVersion.find(
+            ModelVersion.model_id == model.id
+        ).sort(+ModelVersion.version_number):
+            await version_store.resolve_after(version, previous)
+            yield _dump_line(_version_record(version))
+            previous = version
+
+async def _chunked(lines: AsyncIterator[bytes], chunk_bytes: int) -> AsyncIterator[bytes]:
+    """Group small lines into larger chunks to cut per-write overhead"""
+    buffer: List[bytes] = []
+    size = 0
+    async for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= chunk_bytes:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+@router.get("/export")
+async def export_models(
+    current_user: User = Depends(get_current_user)
+):
+    """Stream all models and versions of the current user as NDJSON"""
+    filename = f"dlstudio_export_{datetime.utcnow():%Y%m%dT%H%M%S}.ndjson"
+    return StreamingResponse(
+        _chunked(_export_records(current_user), settings.BULK_EXPORT_CHUNK_BYTES),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+async def _iter_lines(request: Request, max_line_bytes: int) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """Split the request body stream into lines; yields None for oversized lines"""
+    buffer = b""
+    line_number = 0
+    skipping = False
+    async for chunk in request.stream():
+        buffer += chunk
+        while True:
+            newline = buffer.find(b"\n")
+            if newline < 0:
+                break
+            line, buffer = buffer[:newline], buffer[newline + 1:]
+            line_number += 1
+            if skipping:
+                skipping = False
+                yield line_number, None
+            elif line.strip():
+                yield line_number, line
+        if len(buffer) > max_line_bytes:
+            # Drop the oversized line instead of buffering it without bound
+            buffer = b""
+            skipping = True
+    if skipping:
+        yield line_number + 1, None
+    elif buffer.strip():
+        yield line_number + 1, buffer
+
+class _Importer:
+    """Remaps ids and writes imported documents with bounded insert_many batches"""
+
+    def __init__(self, owner: User, batch_size: int):
+        self.owner = owner
+        self.batch_size = max(1, batch_size)
+        self.model_ids: Dict[str, ObjectId] = {}
+        self.version_numbers: Dict[ObjectId, set] = {}
+        self.pending_models: List[Model] = []
+        self.pending_versions: List[ModelVersion] = []
+        # Last version seen for the model currently being imported, used as
+        # the delta base: (model_id, version_number, snapshot_number, architecture)
+        self.tail: Optional[Tuple[ObjectId, int, int, Dict[str, Any]]] = None
+        self.models_imported = 0
+        self.versions_imported = 0
+        self.skipped = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    def error(self, line_number: int, message: str) -> None:
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line_number, "error": message})
+
+    async def add(self, line_number: int, record: Dict[str, Any]) -> None:
+        kind = record.get("type")
+        if kind == "header":
+            if record.get("format") != EXPORT_FORMAT:
+                self.error(line_number, f"Unknown export format: {record.get('format')!r}")
+            return
+        if kind == "model":
+            self.add_model(line_number, record)
+        elif kind == "version":
+            self.add_version(line_number, record)
+        else:
+            self.error(line_number, f"Unknown record type: {kind!r}")
+            return
+        if len(self.pending_models) + len(self.pending_versions) >= self.batch_size:
+            await self.flush()
+
+    def add_model(self, line_number: int, record: Dict[str, Any]) -> None:
+        source_id = str(record.get("id", ""))
+        if not source_id or source_id in self.model_ids:
+            self.error(line_number, "Model record has a missing or duplicate id")
+            return
+        fields = {field: record[field] for field in MODEL_FIELDS if record.get(field) is not None}
+        try:
+            model = Model(id=ObjectId(), owner_id=self.owner.id, **fields)
+        except ValidationError as e:
+            self.error(line_number, f"Invalid model: {e.errors()[0].get('msg')}")
+            return
+        self.model_ids[source_id] = model.id
+        self.version_numbers[model.id] = set()
+        self.pending_models.append(model)
+
+    def add_version(self, line_number: int, record: Dict[str, Any]) -> None:
+        model_id = self.model_ids.get(str(record.get("model_id", "")))
+        if model_id is None:
+            self.error(line_number, "Version references a model that was not imported")
+            return
+        fields = {field: record[field] for field in VERSION_FIELDS if record.get(field) is not None}
+        architecture = fields.pop("architecture", None)
+        version_number = fields.get("version_number")
+        if not isinstance(architecture, dict) or not isinstance(version_number, int):
+            self.error(line_number, "Version record needs an architecture and a version_number")
+            return
+        if version_number in self.version_numbers[model_id]:
+            self.error(line_number, f"Duplicate version_number {version_number}")
+            return
+
+        previous = None
+        if self.tail is not None and self.tail[0] == model_id:
+            previous = self.tail[1:]
+        try:
+            encoded = version_store.encode(architecture, version_number, previous)
+            version = ModelVersion(id=ObjectId(), model_id=model_id, **encoded, **fields)
+        except ValidationError as e:
+            self.error(line_number, f"Invalid version: {e.errors()[0].get('msg')}")
+            return
+        self.version_numbers[model_id].add(version_number)
+        self.tail = (model_id, version_number, encoded["snapshot_version_number"], architecture)
+        self.pending_versions.append(version)
+
+    async def flush(self) -> None:
+        if self.pending_models:
+            await Model.insert_many(self.pending_models)
+            self.models_imported += len(self.pending_models)
+            self.pending_models = []
+        if self.pending_versions:
+            await ModelVersion.insert_many(self.pending_versions)
+            self.versions_imported += len(self.pending_versions)
+            self.pending_versions = []
+
+@router.post("/import")
+async def import_models(
+    request: Request,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Import models and versions from an NDJSON export
+
+    Every model and version receives a new id and is owned by the current
+    user; versions are re-attached to their imported model. Documents are
+    written with insert_many in batches of BULK_IMPORT_BATCH_SIZE.
+    """
+    importer = _Importer(current_user, settings.BULK_IMPORT_BATCH_SIZE)
+    async for line_number, line in _iter_lines(request, settings.BULK_IMPORT_MAX_LINE_BYTES):
+        if line is None:
+            importer.error(line_number, "Line exceeds the maximum allowed size")
+            continue
+        try:
+            record = json.loads(line)
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            importer.error(line_number, f"Invalid JSON: {e}")
+            continue
+        if not isinstance(record, dict):
+            importer.error(line_number, "Each line must be a JSON object")
+            continue
+        await importer.add(line_number, record)
+    await importer.flush()
+
+    return {
+        "models_imported": importer.models_imported,
+        "versions_imported": importer.versions_imported,
+        "skipped": importer.skipped,
+        "errors": importer.errors,
+        "model_id_map": {source: str(target) for source, target in importer.model_ids.items()},
+    }
@@ -2,7 +2,7 @@
 Main API router that includes all v1 endpoints
 """
 from fastapi import APIRouter
-from backend.api.v1.endpoints import auth, models, inference, export, optimization
+from backend.api.v1.endpoints import auth, models, inference, export, optimization, transfer
 
 api_router = APIRouter()
 
@@ -12,4 +12,5 @@ api_router.include_router(models.router, prefix="/models", tags=["models"])
 api_router.include_router(inference.router, prefix="/inference", tags=["inference"])
 api_router.include_router(export.router, prefix="/export", tags=["export"])
 api_router.include_router(optimization.router, prefix="/optimize", tags=["optimization"])
+api_router.include_router(transfer.router, prefix="/transfer", tags=["transfer"])
 
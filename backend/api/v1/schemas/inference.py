@@ -11,6 +11,8 @@ class InferenceRequest(BaseModel):
     input_shape: Optional[List[int]] = None  # Optional reshape information
     class_labels: Optional[List[str]] = None  # Class labels for classification
     segmentation_labels: Optional[List[str]] = None  # Labels for segmentation masks
+    capture_layers: bool = True  # False skips layer outputs and runs on a faster backend
+    backend: Optional[str] = None  # Overrides the autotuned backend for prediction-only requests
 
 class LayerOutput(BaseModel):
     layer_name: str
@@ -29,6 +31,7 @@ class InferenceResponse(BaseModel):
     top_k_predictions: Optional[List[Dict[str, Any]]] = None  # Top-k classes with confidence
     layer_outputs: List[LayerOutput]  # Layer-wise outputs for visualization
     processing_time: float  # Time taken for inference
+    backend: Optional[str] = None  # Execution backend used for prediction-only requests
     
     class Config:
         from_attributes = True
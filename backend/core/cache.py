@@ -0,0 +1,74 @@
+"""
+Small in-process caches shared by services
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+from backend.core.metrics import Counter, Gauge
+
+CACHE_LOOKUPS = Counter("cache_lookups_total", "Lookups in named in-process caches", ("cache", "result"))
+CACHE_ENTRIES = Gauge("cache_entries", "Entries held by named in-process caches", ("cache",))
+CACHE_HIT_RATIO = Gauge("cache_hit_ratio", "Hits / lookups since start for named in-process caches", ("cache",))
+
+class LRUCache:
+    """Thread-safe bounded LRU cache with hit/miss counters"""
+
+    def __init__(self, max_size: int = 128, name: Optional[str] = None):
+        """`name` exports the hit/miss counters as metrics (one cache per name)"""
+        self.max_size = max(0, int(max_size))
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if name:
+            # Read at scrape time; lookups themselves only bump the plain attributes
+            CACHE_LOOKUPS.set_function(lambda: self.hits, cache=name, result="hit")
+            CACHE_LOOKUPS.set_function(lambda: self.misses, cache=name, result="miss")
+            CACHE_ENTRIES.set_function(lambda: len(self._data), cache=name)
+            CACHE_HIT_RATIO.set_function(lambda: self.stats()["hit_rate"], cache=name)
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """Return the cached value (marking it most recently used) or `default`"""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Insert a value, evicting the least recently used entries if full"""
+        if self.max_size == 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size and hit-rate information"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+        }
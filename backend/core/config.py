@@ -4,7 +4,7 @@ Application configuration settings
 import os
 from pathlib import Path
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 
 # Get the backend directory (where .env file is located)
 BACKEND_DIR = Path(__file__).parent.parent
@@ -19,6 +19,12 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+
+    # Password hashing
+    BCRYPT_ROUNDS: int = 12  # Existing hashes are upgraded on next login when this changes
+    PASSWORD_HASH_WORKERS: int = 2  # Dedicated threads for bcrypt
+    PASSWORD_HASH_MAX_QUEUE: int = 64  # Requests waiting for a worker before new ones are rejected
+    PASSWORD_HASH_QUEUE_TIMEOUT: float = 5.0  # Seconds to wait for a worker
     
     # CORS
     CORS_ORIGINS: List[str] = ["http://localhost:3000", "http://localhost:5173"]
@@ -26,9 +32,83 @@ class Settings(BaseSettings):
     # Application
     PROJECT_NAME: str = "DL Model Builder & Visualizer"
     API_V1_STR: str = "/api/v1"
+    # Import torch/numpy and build the Gemini client in the background after startup,
+    # so the first inference or suggestion request does not pay for it
+    WARMUP_ON_STARTUP: bool = False
+    METRICS_ENABLED: bool = True  # Per-route latency/status metrics and the Prometheus /metrics endpoint
+
+    # Version history storage
+    VERSION_SNAPSHOT_INTERVAL: int = 10  # Store a full architecture snapshot every N versions
+    VERSION_CACHE_SIZE: int = 128  # Materialised architectures kept in memory
+
+    # Admission control for expensive endpoints (per-user token buckets)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_CAPACITY: float = 60.0  # Bucket size in tokens
+    RATE_LIMIT_REFILL_PER_SECOND: float = 1.0
+    RATE_LIMIT_BACKEND: str | None = None  # Dotted path to a shared RateLimitBackend; in-memory if unset
+
+    # Inference scheduling (deficit round robin across users)
+    INFERENCE_WORKERS: int = 2  # Threads running model builds and forward passes
+    SCHEDULER_QUANTUM: float = 1.0  # Cost credited to a user per round
+    SCHEDULER_TENANT_WEIGHTS: Dict[str, float] = {}  # user id -> share weight (default 1.0)
+    SCHEDULER_MAX_QUEUE_PER_TENANT: int = 32
+    SCHEDULER_STATS_IDLE_SECONDS: float = 600.0  # Per-user stats are dropped after this long without jobs
+
+    # Prediction-only execution backends (requests that skip layer capture)
+    INFERENCE_PREDICTION_BACKEND: str = "onnxruntime"  # Used until a version is autotuned: "eager", "traced", "quantized" or "onnxruntime"
+    INFERENCE_SESSION_CACHE_SIZE: int = 32  # Loaded models/ORT sessions kept in memory
+    ORT_GRAPH_OPTIMIZATION_LEVEL: str = "all"  # "disable", "basic", "extended" or "all"
+    ORT_INTRA_OP_THREADS: int = 1  # Threads inside one operator (0 lets ORT decide)
+    ORT_INTER_OP_THREADS: int = 1  # Threads across independent operators
+    AUTOTUNE_ITERATIONS: int = 30  # Timed forward passes per backend
+    AUTOTUNE_RTOL: float = 1e-3  # Exact backends' outputs must match eager within these tolerances
+    AUTOTUNE_ATOL: float = 1e-4
+    AUTOTUNE_MIN_TOP1_AGREEMENT: float = 0.95  # Quantized backend: share of inputs where it picks eager's top class
+    AUTOTUNE_CACHE_SIZE: int = 1024  # Tuning results kept in memory by architecture hash
+    # Built model weights memory-mapped by every server worker instead of copied into each;
+    # `run.py --workers N` points this at a directory it owns under /dev/shm
+    SHARED_WEIGHTS_DIR: str | None = None
+    SHARED_WEIGHTS_MAX_BYTES: int = 2 * 1024 * 1024 * 1024
+
+    # Training simulation
+    SIMULATION_MAX_EPOCHS: int = 10000  # Upper bound on training_config["epochs"]
+    TRAINING_WORKERS: int = 2  # Processes running real training jobs
+    TRAINING_THREADS_PER_WORKER: int = 1  # torch intra-op threads per training process
+    TRAINING_TIME_BUDGET_SECONDS: float = 120.0  # Wall-clock limit per run
+    TRAINING_MAX_QUEUED: int = 8  # Runs waiting for a worker before new ones get 503
+    TRAINING_MAX_STEPS_PER_EPOCH: int = 20  # Optimizer steps per reported epoch
+    TRAINING_VALIDATION_SAMPLES: int = 256
+    TRAINING_MAX_BATCH_BYTES: int = 64 * 1024 * 1024  # Size of one input batch
+    TRAINING_MAX_PARAMETERS: int = 20_000_000
+    SWEEP_MAX_TRIALS: int = 64  # Trials per hyperparameter sweep
+    SWEEP_MAX_CONCURRENCY: int = 4  # Trials of one sweep running at once
+    # Multiplexed simulation WebSocket
+    WEBSOCKET_HEARTBEAT_SECONDS: float = 15.0
+    WEBSOCKET_MAX_RUNS: int = 8  # Concurrent runs per connection
+
+    # Export
+    CODE_CACHE_SIZE: int = 256  # Generated code files kept in memory
+    ARTIFACT_CACHE_DIR: str = str(BACKEND_DIR / "artifact_cache")  # TorchScript/ONNX files by architecture hash
+    ARTIFACT_CACHE_MAX_BYTES: int = 1024 * 1024 * 1024
+
+    # Bulk export/import
+    BULK_IMPORT_BATCH_SIZE: int = 500  # Documents per insert_many call
+    BULK_IMPORT_MAX_LINE_BYTES: int = 16 * 1024 * 1024
+    BULK_EXPORT_CHUNK_BYTES: int = 64 * 1024  # Lines are grouped into chunks of about this size
 
     # External Services
     GEMINI_API_KEY: str | None = None
+    # "auto": Gemini when GEMINI_API_KEY is set, else the local analyzer; "local" or "gemini" to force one
+    SUGGESTION_ENGINE: str = "auto"
+    PROMPT_ARCHITECTURE_TOKEN_BUDGET: int = 1000  # Size cap of the architecture section of the prompt
+    GEMINI_TIMEOUT_SECONDS: float = 30.0  # Deadline per suggestion request
+    GEMINI_MAX_CONCURRENCY: int = 4  # Upstream calls in flight at once
+    GEMINI_BREAKER_FAILURE_THRESHOLD: int = 5  # Consecutive failures before failing fast
+    GEMINI_BREAKER_RESET_SECONDS: float = 30.0  # Time before a probe call is let through
+    SUGGESTION_CACHE_SIZE: int = 512  # Suggestion responses kept in memory
+    SUGGESTION_CACHE_TTL_SECONDS: float = 24 * 3600
+    SUGGESTION_CACHE_DIR: str | None = None  # Set to keep suggestions on disk across restarts
+    SUGGESTION_CACHE_DISK_MAX_ENTRIES: int = 10000
     
     class Config:
         env_file = str(ENV_FILE) if ENV_FILE.exists() else ".env"
@@ -0,0 +1,40 @@
+"""
+HTTP conditional request helpers (ETag / If-None-Match)
+"""
+import hashlib
+from typing import Any, Optional
+from fastapi import Request, Response, status
+
+# Responses are per-user, so shared caches must not store them; browsers may
+# keep a copy but have to revalidate it with If-None-Match on every use.
+PRIVATE_REVALIDATE = "private, no-cache"
+
+def make_etag(*parts: Any) -> str:
+    """Build a strong ETag from the given parts"""
+    digest = hashlib.sha256("\x1f".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header value against an ETag (weak comparison, RFC 9110)"""
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    if "*" in candidates:
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    return any((c[2:] if c.startswith("W/") else c) == opaque for c in candidates)
+
+def cache_headers(etag: str, cache_control: str = PRIVATE_REVALIDATE) -> dict:
+    return {"ETag": etag, "Cache-Control": cache_control}
+
+def not_modified(request: Request, etag: str, cache_control: str = PRIVATE_REVALIDATE) -> Optional[Response]:
+    """Return a 304 response if the client already has this representation"""
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers=cache_headers(etag, cache_control),
+        )
+    return None
+
+def set_cache_headers(response: Response, etag: str, cache_control: str = PRIVATE_REVALIDATE) -> None:
+    response.headers.update(cache_headers(etag, cache_control))
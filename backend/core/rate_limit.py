@@ -0,0 +1,172 @@
+"""
+Per-user token-bucket admission control for expensive endpoints
+
+Each client (user id, or IP address for anonymous callers) owns one bucket
+of RATE_LIMIT_CAPACITY tokens that refills at RATE_LIMIT_REFILL_PER_SECOND.
+Endpoints charge a cost that grows with the work they are about to do, and
+requests that cannot be paid for are rejected with 429 and Retry-After.
+"""
+import importlib
+import math
+from abc import ABC, abstractmethod
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi import HTTPException, status
+from starlette.requests import HTTPConnection
+from backend.core.config import settings
+from backend.core.metrics import Counter
+
+ADMISSION_REQUESTS = Counter(
+    "admission_requests_total",
+    "Requests checked by admission control",
+    ("endpoint", "outcome"),
+)
+ADMISSION_THROTTLED_COST = Counter(
+    "admission_throttled_cost_total",
+    "Token cost of requests rejected by admission control",
+    ("endpoint",),
+)
+
+# Upper bound on Retry-After; a bucket that never refills would otherwise report infinity
+MAX_RETRY_AFTER_SECONDS = 3600
+
+# Input size that costs one extra token (a 3x224x224 image)
+REFERENCE_INPUT_ELEMENTS = 3 * 224 * 224
+
+class RateLimitBackend(ABC):
+    """
+    Storage for token buckets
+
+    Implementations must make `consume` atomic per key. Set
+    RATE_LIMIT_BACKEND to the dotted path of a subclass to share buckets
+    between workers (e.g. one backed by Redis).
+    """
+
+    @abstractmethod
+    async def consume(self, key: str, cost: float, capacity: float, refill_per_second: float) -> float:
+        """
+        Take `cost` tokens from the bucket for `key` if available
+
+        Returns:
+            0.0 if the tokens were taken, otherwise the number of seconds
+            until enough tokens will have accumulated (math.inf if never)
+        """
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Buckets kept in this process; all access happens on the event loop"""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    async def consume(self, key: str, cost: float, capacity: float, refill_per_second: float) -> float:
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * refill_per_second)
+        if tokens >= cost:
+            self._buckets[key] = (tokens - cost, now)
+            if len(self._buckets) > self.max_keys:
+                self._prune(now, capacity, refill_per_second)
+            return 0.0
+        self._buckets[key] = (tokens, now)
+        if refill_per_second <= 0:
+            return math.inf
+        return (cost - tokens) / refill_per_second
+
+    def _prune(self, now: float, capacity: float, refill_per_second: float) -> None:
+        # A full bucket behaves exactly like a missing one, so drop those
+        full = [
+            key for key, (tokens, updated) in self._buckets.items()
+            if tokens + (now - updated) * refill_per_second >= capacity
+        ]
+        for key in full:
+            del self._buckets[key]
+
+def load_backend(path: Optional[str]) -> RateLimitBackend:
+    """Instantiate the backend class at dotted `path`, or the in-memory default"""
+    if not path:
+        return InMemoryRateLimitBackend()
+    module_name, _, class_name = path.rpartition(".")
+    backend_cls = getattr(importlib.import_module(module_name), class_name)
+    return backend_cls()
+
+def inference_cost(input_shape: Optional[List[int]], architecture: Dict[str, Any]) -> float:
+    """Cost of one forward pass: grows with input size and network depth"""
+    elements = 1
+    for dim in input_shape or []:
+        elements *= max(1, int(dim))
+    num_layers = len(architecture.get("layers") or architecture.get("nodes") or [])
+    return 1.0 + (elements / REFERENCE_INPUT_ELEMENTS) * (1.0 + num_layers / 10.0)
+
+def simulation_cost(training_config: Dict[str, Any]) -> float:
+    """Cost of a training simulation: grows with the number of epochs"""
+    try:
+        epochs = int(training_config.get("epochs", 50))
+    except (TypeError, ValueError):
+        epochs = 50
+    return 1.0 + max(0, epochs) / 50.0
+
+class AdmissionController:
+    """Charges per-client token buckets and rejects requests that cannot pay"""
+
+    def __init__(
+        self,
+        backend: RateLimitBackend,
+        capacity: float,
+        refill_per_second: float,
+        enabled: bool = True,
+    ):
+        self.backend = backend
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.enabled = enabled
+
+    @classmethod
+    def from_settings(cls) -> "AdmissionController":
+        return cls(
+            load_backend(settings.RATE_LIMIT_BACKEND),
+            settings.RATE_LIMIT_CAPACITY,
+            settings.RATE_LIMIT_REFILL_PER_SECOND,
+            enabled=settings.RATE_LIMIT_ENABLED,
+        )
+
+    async def admit(self, client_key: str, endpoint: str, cost: float = 1.0, cap_cost: bool = True) -> None:
+        """
+        Charge `cost` tokens to `client_key` or raise 429
+
+        A request bigger than the bucket could never be admitted. With
+        `cap_cost` it is charged a full bucket instead; without it, it is
+        rejected with 400 so a batch of work cannot cost less than its parts.
+        """
+        if not self.enabled:
+            return
+        cost = max(cost, 0.0)
+        if cost > self.capacity:
+            if not cap_cost:
+                ADMISSION_REQUESTS.inc(endpoint=endpoint, outcome="rejected")
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Request costs {cost:.0f} tokens; at most {self.capacity:.0f} are allowed per request",
+                )
+            cost = self.capacity
+        retry_after = await self.backend.consume(client_key, cost, self.capacity, self.refill_per_second)
+        if retry_after <= 0:
+            ADMISSION_REQUESTS.inc(endpoint=endpoint, outcome="admitted")
+            return
+
+        ADMISSION_REQUESTS.inc(endpoint=endpoint, outcome="throttled")
+        ADMISSION_THROTTLED_COST.inc(cost, endpoint=endpoint)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Rate limit exceeded for {endpoint}; retry later",
+            headers={"Retry-After": str(max(1, math.ceil(min(retry_after, MAX_RETRY_AFTER_SECONDS))))},
+        )
+
+def client_key(request: HTTPConnection, user: Optional[Any] = None) -> str:
+    """Bucket key: the user id when authenticated, otherwise the client address"""
+    if user is not None and getattr(user, "id", None) is not None:
+        return f"user:{user.id}"
+    host = request.client.host if request.client else "unknown"
+    return f"ip:{host}"
+
+admission_controller = AdmissionController.from_settings()
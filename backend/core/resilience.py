@@ -0,0 +1,123 @@
+"""
+Protection around slow or failing upstream services
+
+`SingleFlight` lets concurrent identical calls share one in-flight
+execution. `CircuitBreaker` counts consecutive failures and, once a
+threshold is hit, fails fast for a cool-down period before letting a
+single probe call through to test whether the upstream has recovered.
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+from backend.core.metrics import Counter, Gauge
+
+CIRCUIT_TRANSITIONS = Counter(
+    "circuit_breaker_transitions_total",
+    "Circuit breaker state changes",
+    ("breaker", "state"),
+)
+
+CIRCUIT_STATE = Gauge(
+    "circuit_breaker_state",
+    "Circuit breaker state as of its last call: 0 closed, 1 half-open, 2 open",
+    ("breaker",),
+)
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit is open"""
+
+class CircuitBreaker:
+    """Closed -> open after `failure_threshold` consecutive failures -> half-open after `reset_timeout`"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        # Reads the stored state: scraping must not move an open breaker to half-open
+        CIRCUIT_STATE.set_function(lambda: self.STATE_VALUES[self._state], breaker=name)
+
+    def _transition(self, state: str) -> None:
+        if state != self._state:
+            self._state = state
+            CIRCUIT_TRANSITIONS.inc(breaker=self.name, state=state)
+            print(f"Circuit '{self.name}' is now {state}")
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._transition(self.HALF_OPEN)
+            self._probe_in_flight = False
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now; in half-open state only one probe is let through"""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def release_probe(self) -> None:
+        """Give back a half-open probe slot that was granted but not used"""
+        self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._probe_in_flight = False
+        self._transition(self.CLOSED)
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._probe_in_flight = False
+        if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            self._opened_at = self._clock()
+            self._transition(self.OPEN)
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    def _finished(self, key: Hashable, future: asyncio.Future) -> None:
+        self._calls.pop(key, None)
+        # Mark the exception retrieved in case every waiter was cancelled
+        if not future.cancelled():
+            future.exception()
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Run `func()` unless a call with `key` is already in flight, then share its outcome
+
+        Returns (result, shared) where `shared` is True for callers that joined
+        an existing call. The shared work keeps running if one waiter is
+        cancelled (e.g. its client disconnected).
+        """
+        future = self._calls.get(key)
+        shared = future is not None
+        if future is None:
+            future = asyncio.ensure_future(func())
+            self._calls[key] = future
+            future.add_done_callback(lambda done: self._finished(key, done))
+        return await asyncio.shield(future), shared
@@ -1,19 +1,86 @@
 """
 Security utilities for password hashing and JWT tokens
 """
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from backend.core.config import settings
+from backend.core.metrics import EXECUTOR_QUEUE_DEPTH, EXECUTOR_RUNNING
 
-# Configure bcrypt with explicit settings to avoid version detection issues
+# Configure bcrypt with explicit settings to avoid version detection issues.
+# Pinning min/max rounds to the configured value makes `verify_and_update`
+# report hashes created with any other cost so they can be re-hashed.
 pwd_context = CryptContext(
     schemes=["bcrypt"],
-    bcrypt__rounds=12,
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
     deprecated="auto"
 )
 
+class PasswordHasherBusy(Exception):
+    """Raised when no hashing worker became available in time"""
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a small dedicated thread pool
+
+    bcrypt releases the GIL, so hashing off the event loop keeps other
+    requests responsive. At most `workers` hashes run at once; up to
+    `max_queue` callers may wait `queue_timeout` seconds for a slot before
+    PasswordHasherBusy is raised.
+    """
+
+    def __init__(self, workers: int, max_queue: int, queue_timeout: float):
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._waiting = 0
+        self._running = 0
+
+    def _ensure_started(self) -> None:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+            self._slots = asyncio.Semaphore(self.workers)
+
+    async def run(self, func, *args):
+        self._ensure_started()
+        if self._slots.locked() and self._waiting >= self.max_queue:
+            raise PasswordHasherBusy("Password hashing queue is full")
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise PasswordHasherBusy("Timed out waiting for a password hashing worker")
+        finally:
+            self._waiting -= 1
+        self._running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self._running -= 1
+            self._slots.release()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            self._slots = None
+
+password_hasher = PasswordHasher(
+    settings.PASSWORD_HASH_WORKERS,
+    settings.PASSWORD_HASH_MAX_QUEUE,
+    settings.PASSWORD_HASH_QUEUE_TIMEOUT,
+)
+EXECUTOR_QUEUE_DEPTH.set_function(lambda: password_hasher._waiting, executor="password_hashing")
+EXECUTOR_RUNNING.set_function(lambda: password_hasher._running, executor="password_hashing")
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
     try:
@@ -27,6 +94,22 @@ def get_password_hash(password: str) -> str:
     """Hash a password"""
     return pwd_context.hash(password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password and return a replacement hash if its cost is outdated"""
+    try:
+        return pwd_context.verify_and_update(plain_password, hashed_password)
+    except Exception as e:
+        print(f"Password verification error: {e}")
+        return False, None
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password on the hashing pool; returns (valid, new_hash_or_None)"""
+    return await password_hasher.run(verify_and_update_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the hashing pool"""
+    return await password_hasher.run(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -48,7 +48,10 @@ class ModelVersion(Document):
     """Model version document"""
     model_id: ObjectId
     version_number: int
-    architecture: Dict[str, Any]  # Store layer configuration
+    architecture: Dict[str, Any] = Field(default_factory=dict)  # Store layer configuration (empty when delta-encoded)
+    architecture_patch: Optional[List[Dict[str, Any]]] = None  # JSON patch against the previous version
+    snapshot_version_number: Optional[int] = None  # Full snapshot this version is reconstructed from
+    architecture_hash: Optional[str] = None  # sha256 of the canonical architecture JSON
     custom_loss: Optional[str] = None  # Store custom loss function code
     input_shape: List[int]  # e.g., [1, 3, 224, 224]
     output_shape: Optional[List[int]] = None
@@ -56,6 +59,8 @@ class ModelVersion(Document):
     class_labels: Optional[List[str]] = None  # e.g., ['cat', 'dog', 'bird'] for classification
     segmentation_labels: Optional[List[str]] = None  # e.g., ['person', 'car', 'building'] for segmentation
     layer_auto_config: bool = True  # Auto-adjust layer configs when connecting
+    execution_backend: Optional[str] = None  # Fastest prediction backend chosen by the autotuner
+    tuning_results: Optional[Dict[str, Any]] = None  # Autotuner measurements per backend
     is_active: bool = True
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: Optional[datetime] = None
@@ -67,4 +72,8 @@ class ModelVersion(Document):
     
     class Settings:
         name = "model_versions"
-        indexes = ["model_id"]
+        indexes = [
+            "model_id",
+            [("model_id", 1), ("version_number", 1)],
+            [("architecture_hash", 1), ("input_shape", 1)],
+        ]
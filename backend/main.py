@@ -1,20 +1,55 @@
 """
 FastAPI application entry point for Deep Learning Model Builder & Visualizer Platform
 """
+import asyncio
+import time
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from backend.core.config import settings
 from backend.api.v1.router import api_router
 from backend.core.database import connect_to_mongo, close_mongo_connection
+from backend.core.http_metrics import MetricsMiddleware
+from backend.core.metrics import render as render_metrics
+from backend.core.security import password_hasher
+from backend.services.gemini_service import get_gemini_service
+from backend.services.inference_scheduler import inference_scheduler
+from backend.services.training_engine import training_engine
+
+def _import_heavy_modules() -> None:
+    import numpy  # noqa: F401
+    import torch  # noqa: F401
+    import PIL.Image  # noqa: F401
+    from backend.services import model_builder  # noqa: F401
+    if settings.GEMINI_API_KEY:
+        import google.generativeai  # noqa: F401
+
+async def warm_up() -> None:
+    """Load what the API defers to first use; requests are served meanwhile"""
+    start = time.perf_counter()
+    try:
+        # Imports take the import lock, not the GIL for long; keep them off the event loop
+        await run_in_threadpool(_import_heavy_modules)
+        get_gemini_service()
+        print(f"Warm-up finished in {time.perf_counter() - start:.1f}s")
+    except Exception as e:
+        print(f"Warm-up failed: {e}")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     await connect_to_mongo()
+    warmup_task = asyncio.create_task(warm_up()) if settings.WARMUP_ON_STARTUP else None
     yield
     # Shutdown
+    if warmup_task is not None:
+        warmup_task.cancel()
     await close_mongo_connection()
+    password_hasher.shutdown()
+    await inference_scheduler.shutdown()
+    training_engine.shutdown()
 
 app = FastAPI(
     title="DL Model Builder & Visualizer",
@@ -32,6 +67,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Include API routes
 app.include_router(api_router, prefix="/api/v1")
 
@@ -43,3 +81,8 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        """Prometheus scrape endpoint (this process only)"""
+        return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
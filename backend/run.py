@@ -1,13 +1,78 @@
 """
 Alternative entry point for running the server from backend/ directory
+
+Usage:
+    python backend/run.py                # development: one process with auto-reload
+    python backend/run.py --workers 4    # production: 4 worker processes sharing model weights
+
+With several workers, the pool sizes in PER_WORKER_LIMITS are split between
+them and rate limiting must use a shared RATE_LIMIT_BACKEND. Caches, circuit
+breakers and metrics stay per worker.
+
+Shared weights cover models built from the architecture: layer-capture
+inference, the eager and quantized prediction backends (only the int8 Linear
+weights are per worker) and exports. The traced backend (frozen constants)
+and onnxruntime sessions hold their own copy in every worker; measure with
+backend/scripts/bench_workers.py --path all.
 """
 import sys
 import os
+import argparse
+import shutil
+import tempfile
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# Pool sizes configured for the whole server; each worker process gets an equal share
+PER_WORKER_LIMITS = (
+    "INFERENCE_WORKERS",
+    "TRAINING_WORKERS",
+    "TRAINING_MAX_QUEUED",
+    "PASSWORD_HASH_WORKERS",
+    "GEMINI_MAX_CONCURRENCY",
+)
+
+def split_limits(workers: int) -> dict:
+    """Per-worker values of PER_WORKER_LIMITS, so N workers add up to the configured totals"""
+    from backend.core.config import settings
+
+    return {name: str(max(1, getattr(settings, name) // workers)) for name in PER_WORKER_LIMITS}
+
+def create_shared_weights_dir() -> str:
+    """Directory the workers memory-map model weights from; RAM-backed where /dev/shm exists"""
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else None
+    return tempfile.mkdtemp(prefix="dlstudio-weights-", dir=base)
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("backend.main:app", host="0.0.0.0", port=8000, reload=True)
 
+    parser = argparse.ArgumentParser(description="Run the API server")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes; more than 1 disables auto-reload")
+    args = parser.parse_args()
+
+    if args.workers <= 1:
+        uvicorn.run("backend.main:app", host=args.host, port=args.port, reload=True)
+        sys.exit(0)
+
+    from backend.core.config import settings
+    # In-memory token buckets live in each worker, so every client would get N buckets
+    if settings.RATE_LIMIT_ENABLED and not settings.RATE_LIMIT_BACKEND:
+        parser.error("--workers > 1 needs a shared RATE_LIMIT_BACKEND (or RATE_LIMIT_ENABLED=false)")
+
+    # Workers are spawned and read their settings from the environment
+    os.environ.update(split_limits(args.workers))
+    owned_dir = None
+    if not os.environ.get("SHARED_WEIGHTS_DIR"):
+        owned_dir = create_shared_weights_dir()
+        os.environ["SHARED_WEIGHTS_DIR"] = owned_dir
+    # Split the cores between workers instead of every worker's torch/ORT pool claiming all of them
+    os.environ.setdefault("OMP_NUM_THREADS", str(max(1, (os.cpu_count() or 1) // args.workers)))
+    print(f"Starting {args.workers} workers; shared weights in {os.environ['SHARED_WEIGHTS_DIR']}")
+    try:
+        uvicorn.run("backend.main:app", host=args.host, port=args.port, workers=args.workers)
+    finally:
+        if owned_dir is not None:
+            shutil.rmtree(owned_dir, ignore_errors=True)
@@ -0,0 +1,108 @@
+"""
+Benchmark prediction-only execution backends
+
+Builds a few representative CNNs, exports each to ONNX and compares the
+per-request latency of eager PyTorch with onnxruntime at small batch
+sizes (the shape of interactive serving traffic). Also reports the largest
+absolute difference between the two backends' outputs.
+
+Usage (from project root):
+    python backend/scripts/bench_backends.py --iterations 200 --batch 1
+"""
+import sys
+import os
+import time
+import argparse
+import tempfile
+
+# Add project root to path (works from both backend/ and project root)
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(script_dir))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import numpy as np
+from backend.services.artifact_exporter import ArtifactExporter, FORMAT_ONNX, artifact_key
+from backend.services.inference_backends import EagerBackend, OnnxRuntimeBackend
+from backend.services.version_store import architecture_hash
+
+def _block(in_channels, out_channels):
+    return [
+        {"type": "Conv2d", "params": {"in_channels": in_channels, "out_channels": out_channels, "kernel_size": 3, "padding": 1}},
+        {"type": "BatchNorm2d", "params": {"num_features": out_channels}},
+        {"type": "ReLU", "params": {}},
+        {"type": "MaxPool2d", "params": {"kernel_size": 2}},
+    ]
+
+MODELS = {
+    "small-cnn (3x32x32)": (
+        {"layers": _block(3, 16) + _block(16, 32) + [
+            {"type": "Flatten", "params": {}},
+            {"type": "Linear", "params": {"out_features": 10}},
+        ]},
+        [1, 3, 32, 32],
+    ),
+    "vgg-style (3x64x64)": (
+        {"layers": _block(3, 32) + _block(32, 64) + _block(64, 128) + _block(128, 128) + [
+            {"type": "Flatten", "params": {}},
+            {"type": "Linear", "params": {"out_features": 256}},
+            {"type": "ReLU", "params": {}},
+            {"type": "Linear", "params": {"out_features": 10}},
+        ]},
+        [1, 3, 64, 64],
+    ),
+    "mnist-mlp (1x28x28)": (
+        {"layers": [
+            {"type": "Flatten", "params": {}},
+            {"type": "Linear", "params": {"out_features": 256}},
+            {"type": "ReLU", "params": {}},
+            {"type": "Linear", "params": {"out_features": 10}},
+        ]},
+        [1, 1, 28, 28],
+    ),
+}
+
+def _time(backend, batch: np.ndarray, iterations: int) -> float:
+    """Median latency in milliseconds"""
+    for _ in range(10):
+        backend.predict(batch)
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        backend.predict(batch)
+        samples.append(time.perf_counter() - start)
+    return float(np.median(samples)) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare eager PyTorch with onnxruntime")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=1)
+    parser.add_argument("--threads", type=int, default=1, help="torch and ORT intra-op threads")
+    parser.add_argument("--opt-level", default="all", choices=["disable", "basic", "extended", "all"])
+    args = parser.parse_args()
+
+    import torch
+    torch.set_num_threads(args.threads)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        exporter = ArtifactExporter(cache_dir, max_bytes=1 << 40)
+        print(f"{'model':<22} {'eager ms':>10} {'ort ms':>10} {'speedup':>8} {'max diff':>10}")
+        for name, (architecture, input_shape) in MODELS.items():
+            key = artifact_key(architecture_hash(architecture), input_shape)
+            path = exporter.build(architecture, input_shape, FORMAT_ONNX, key)
+            eager = EagerBackend.from_architecture(architecture, input_shape, key)
+            ort = OnnxRuntimeBackend(
+                str(path),
+                graph_optimization_level=args.opt_level,
+                intra_op_threads=args.threads,
+                inter_op_threads=1,
+            )
+
+            batch = np.random.rand(args.batch, *input_shape[1:]).astype(np.float32)
+            diff = float(np.max(np.abs(eager.predict(batch) - ort.predict(batch))))
+            eager_ms = _time(eager, batch, args.iterations)
+            ort_ms = _time(ort, batch, args.iterations)
+            print(f"{name:<22} {eager_ms:>10.3f} {ort_ms:>10.3f} {eager_ms / ort_ms:>7.2f}x {diff:>10.2e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark (and guard) the import time of the API
+
+Imports the app in fresh interpreters, the way a worker or autoscaled
+replica starts, and reports the median wall time plus the modules with
+the largest cumulative import cost (`python -X importtime`). torch,
+numpy, PIL, onnxruntime and the Gemini SDK are loaded on first use or by
+the optional warm-up; the script exits non-zero if importing the app pulls
+any of them in again, or if the median exceeds --max-seconds, so it can
+run as a regression check.
+
+Usage (from project root):
+    python backend/scripts/bench_import_time.py
+    python backend/scripts/bench_import_time.py --runs 5 --top 15 --max-seconds 2
+"""
+import sys
+import os
+import json
+import argparse
+import statistics
+import subprocess
+
+# Add project root to path (works from both backend/ and project root)
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(script_dir))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+# Must not be imported just by importing the app
+DEFERRED_MODULES = ("torch", "numpy", "PIL", "onnxruntime", "google.generativeai")
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {deferred!r} if m in sys.modules]}}))
+"""
+
+def _run(module: str, importtime: bool = False) -> subprocess.CompletedProcess:
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", PROBE.format(module=module, deferred=DEFERRED_MODULES)]
+    return subprocess.run(command, cwd=project_root, capture_output=True, text=True, check=True)
+
+def measure(module: str) -> dict:
+    """Import `module` in a fresh interpreter"""
+    output = _run(module).stdout.strip().splitlines()
+    return json.loads(output[-1])
+
+def slowest_imports(module: str, top: int) -> list:
+    """(cumulative seconds, module) for the most expensive imports"""
+    rows = []
+    for line in _run(module, importtime=True).stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative) / 1e6, name.rstrip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+def main(args) -> int:
+    results = [measure(args.module) for _ in range(args.runs)]
+    timings = [result["seconds"] for result in results]
+    loaded = sorted({name for result in results for name in result["loaded"]})
+
+    print(f"import {args.module}: median {statistics.median(timings):.3f}s "
+          f"(min {min(timings):.3f}s, max {max(timings):.3f}s, {args.runs} runs)")
+    if args.top:
+        print("\nSlowest imports (cumulative):")
+        for seconds, name in slowest_imports(args.module, args.top):
+            print(f"  {seconds:7.3f}s  {name}")
+
+    failed = False
+    if loaded:
+        print(f"\nFAIL: importing {args.module} loaded deferred modules: {', '.join(loaded)}")
+        failed = True
+    if args.max_seconds is not None and statistics.median(timings) > args.max_seconds:
+        print(f"\nFAIL: median import time above {args.max_seconds:g}s")
+        failed = True
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark API import time")
+    parser.add_argument("--module", default="backend.main", help="Module to import")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to time")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list (0 to skip)")
+    parser.add_argument("--max-seconds", type=float, default=None, help="Fail if the median import is slower")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,73 @@
+"""
+Benchmark login password verification under concurrency
+
+Compares verifying bcrypt hashes inline in the event loop (the old
+behaviour of `async def login`) with the dedicated hashing pool, and
+reports throughput plus the worst event-loop stall seen by a 10 ms ticker
+that stands in for other traffic (e.g. inference requests).
+
+Usage (from project root):
+    python backend/scripts/bench_login.py --logins 32 --rounds 12
+"""
+import sys
+import os
+import time
+import asyncio
+import argparse
+
+# Add project root to path (works from both backend/ and project root)
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(script_dir))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from passlib.context import CryptContext
+from backend.core.security import PasswordHasher
+
+async def _ticker(stop: asyncio.Event, interval: float = 0.01) -> float:
+    """Measure the largest delay between scheduled ticks"""
+    worst = 0.0
+    loop = asyncio.get_running_loop()
+    expected = loop.time() + interval
+    while not stop.is_set():
+        await asyncio.sleep(interval)
+        now = loop.time()
+        worst = max(worst, now - expected)
+        expected = now + interval
+    return worst
+
+async def _run(mode: str, context: CryptContext, hashed: str, logins: int, hasher: PasswordHasher):
+    async def login():
+        if mode == "inline":
+            return context.verify("secret-password", hashed)
+        return await hasher.run(context.verify, "secret-password", hashed)
+
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_ticker(stop))
+    await asyncio.sleep(0.05)
+    start = time.perf_counter()
+    results = await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    worst_stall = await ticker
+    assert all(results)
+    return elapsed, worst_stall
+
+async def main(args):
+    context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=args.rounds, deprecated="auto")
+    hashed = context.hash("secret-password")
+    hasher = PasswordHasher(args.workers, max_queue=args.logins, queue_timeout=600)
+
+    print(f"bcrypt rounds={args.rounds}, concurrent logins={args.logins}, pool workers={args.workers}")
+    print(f"{'mode':<8} {'total (s)':>10} {'logins/s':>10} {'max loop stall (ms)':>20}")
+    for mode in ("inline", "pool"):
+        elapsed, stall = await _run(mode, context, hashed, args.logins, hasher)
+        print(f"{mode:<8} {elapsed:>10.2f} {args.logins / elapsed:>10.1f} {stall * 1000:>20.1f}")
+    hasher.shutdown()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=32)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,161 @@
+"""
+Benchmark suggestion prompt size and LLM latency
+
+Builds editor-style graphs (nodes carry the full config dicts the
+frontend sends) and compares the legacy prompt, which embedded every
+node's config as Python repr text, with the compact serializer: prompt
+characters, estimated tokens and serialization time. With --live and
+GEMINI_API_KEY configured it also measures the model's end-to-end
+latency for both prompts.
+
+Usage (from project root):
+    python backend/scripts/bench_prompt.py
+    python backend/scripts/bench_prompt.py --live --calls 3
+"""
+import sys
+import os
+import time
+import asyncio
+import argparse
+import statistics
+
+# Add project root to path (works from both backend/ and project root)
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(script_dir))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from backend.core.config import settings
+from backend.services.gemini_service import GeminiService
+from backend.services.prompt_serializer import estimate_tokens, serialize_architecture
+
+def _node(index, layer_type, config):
+    return {
+        "id": f"node-{index}",
+        "type": "layerNode",
+        "position": {"x": 100 + 40 * index, "y": 80 * index},
+        "data": {"type": layer_type, "label": layer_type, "config": config},
+    }
+
+def _graph(layers):
+    nodes = [_node(i, layer_type, config) for i, (layer_type, config) in enumerate(layers)]
+    edges = [
+        {"id": f"e{i}", "source": f"node-{i}", "target": f"node-{i + 1}"}
+        for i in range(len(nodes) - 1)
+    ]
+    return {"nodes": nodes, "edges": edges}
+
+def _conv(in_channels, out_channels, stride=1):
+    return ("Conv2d", {"in_channels": in_channels, "out_channels": out_channels, "kernel_size": 3, "stride": stride, "padding": 1})
+
+def _conv_bn_relu(in_channels, out_channels, stride=1):
+    return [_conv(in_channels, out_channels, stride), ("BatchNorm2d", {"num_features": out_channels}), ("ReLU", {})]
+
+def small_cnn():
+    return _graph(
+        _conv_bn_relu(3, 16) + [("MaxPool2d", {"kernel_size": 2, "stride": 2})]
+        + _conv_bn_relu(16, 32) + [("MaxPool2d", {"kernel_size": 2, "stride": 2})]
+        + [("Flatten", {"start_dim": 1, "end_dim": -1}), ("Linear", {"in_features": 2048, "out_features": 10})]
+    ), {"imageSize": [32, 32], "channels": 3, "classDistribution": {str(i): 500 for i in range(10)}}
+
+def vgg16():
+    layers = []
+    channels = 3
+    for width, repeats in ((64, 2), (128, 2), (256, 3), (512, 3), (512, 3)):
+        for _ in range(repeats):
+            layers += _conv_bn_relu(channels, width)
+            channels = width
+        layers.append(("MaxPool2d", {"kernel_size": 2, "stride": 2}))
+    layers += [
+        ("Flatten", {"start_dim": 1, "end_dim": -1}),
+        ("Linear", {"in_features": 25088, "out_features": 4096}), ("ReLU", {}), ("Dropout", {"p": 0.5}),
+        ("Linear", {"in_features": 4096, "out_features": 4096}), ("ReLU", {}), ("Dropout", {"p": 0.5}),
+        ("Linear", {"in_features": 4096, "out_features": 100}),
+    ]
+    return _graph(layers), {"imageSize": [224, 224], "channels": 3, "classDistribution": {str(i): 100 for i in range(100)}}
+
+def deep_resnet():
+    layers = _conv_bn_relu(3, 64, stride=2) + [("MaxPool2d", {"kernel_size": 2, "stride": 2})]
+    channels = 64
+    for width, repeats in ((64, 3), (128, 8), (256, 36), (512, 3)):
+        for i in range(repeats):
+            stride = 2 if i == 0 and width != 64 else 1
+            layers.append(("ResidualBlock", {"in_channels": channels, "out_channels": width, "kernel_size": 3, "stride": stride, "padding": 1}))
+            channels = width
+    layers += [("AdaptiveAvgPool2d", {"output_size": [1, 1]}), ("Flatten", {}), ("Linear", {"in_features": 512, "out_features": 1000})]
+    return _graph(layers), {"imageSize": [224, 224], "channels": 3, "classDistribution": {str(i): 50 for i in range(1000)}}
+
+def mlp():
+    layers = [("Flatten", {})]
+    for _ in range(12):
+        layers += [("Linear", {"in_features": 512, "out_features": 512}), ("ReLU", {}), ("Dropout", {"p": 0.2})]
+    layers.append(("Linear", {"in_features": 512, "out_features": 10}))
+    return _graph(layers), {"imageSize": [28, 28], "channels": 1, "classDistribution": {str(i): 6000 for i in range(10)}}
+
+def irregular():
+    # No repeats to collapse: exercises the token budget
+    layers = []
+    channels = 3
+    for i in range(200):
+        width = 8 + (i * 7) % 57
+        layers += [_conv(channels, width), ("LeakyReLU", {"negative_slope": round(0.01 * (i % 9 + 1), 2)})]
+        channels = width
+    return _graph(layers), {"imageSize": [64, 64], "channels": 3, "classDistribution": {"a": 1, "b": 1}}
+
+GRAPHS = {
+    "small-cnn": small_cnn,
+    "vgg16-bn": vgg16,
+    "resnet-152-ish": deep_resnet,
+    "mlp-12": mlp,
+    "irregular-400": irregular,
+}
+
+def legacy_layers(architecture):
+    """Architecture section as built before the compact serializer: one repr'd config per node"""
+    return "\n".join(
+        f"- {node.get('data', {}).get('type', 'Unknown')}: {node.get('data', {}).get('config', {})}"
+        for node in architecture.get("nodes", [])
+    )
+
+async def _latency(service, prompt, calls):
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        await service.model.generate_content_async(prompt)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+async def main(args):
+    service = GeminiService(model=object()) if not args.live else GeminiService()
+    if args.live and service.model is None:
+        print("--live needs GEMINI_API_KEY; reporting sizes only")
+        args.live = False
+
+    print(f"{'graph':<16}{'nodes':>6}{'arch tok':>16}{'prompt tok':>16}{'serialize':>11}"
+          + (f"{'legacy s':>10}{'compact s':>11}" if args.live else ""))
+    for name, build in GRAPHS.items():
+        architecture, dataset_stats = build()
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            compact_layers = serialize_architecture(architecture, dataset_stats, settings.PROMPT_ARCHITECTURE_TOKEN_BUDGET)
+        serialize_ms = (time.perf_counter() - start) / args.repeat * 1000
+
+        compact = service._construct_optimization_prompt(architecture, dataset_stats)
+        legacy = compact.replace(compact_layers, legacy_layers(architecture))
+        arch = f"{estimate_tokens(legacy_layers(architecture))}->{estimate_tokens(compact_layers)}"
+        prompt = f"{estimate_tokens(legacy)}->{estimate_tokens(compact)}"
+        line = f"{name:<16}{len(architecture['nodes']):>6}{arch:>16}{prompt:>16}{serialize_ms:>9.2f}ms"
+        if args.live:
+            line += f"{await _latency(service, legacy, args.calls):>10.2f}{await _latency(service, compact, args.calls):>11.2f}"
+        print(line)
+        if args.show:
+            print(serialize_architecture(architecture, dataset_stats, settings.PROMPT_ARCHITECTURE_TOKEN_BUDGET))
+            print()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark suggestion prompt size and latency")
+    parser.add_argument("--live", action="store_true", help="Also time real Gemini calls")
+    parser.add_argument("--calls", type=int, default=3, help="Gemini calls per prompt (median reported)")
+    parser.add_argument("--repeat", type=int, default=100, help="Serializations timed per graph")
+    parser.add_argument("--show", action="store_true", help="Print the compact architecture text")
+    asyncio.run(main(parser.parse_args()))
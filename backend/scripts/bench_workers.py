@@ -0,0 +1,139 @@
+"""
+Benchmark per-worker memory with and without shared model weights
+
+Starts N fresh processes, like `run.py --workers N`. Each one loads the
+same model the way an inference path does and runs a forward pass. While
+all of them are alive, each reports how much its RSS, PSS and private
+memory grew for the model. Without SHARED_WEIGHTS_DIR every worker holds
+its own copy of the weights. With it, the weights are mapped from one
+tmpfs file: private memory stays flat and the PSS cost is split across
+workers. The default path is `/inference/run` with layer capture
+(`InferenceEngine`); `--path all` also measures the prediction backends,
+of which traced and onnxruntime keep a private copy per worker.
+Linux only (reads /proc/self/smaps_rollup).
+
+Usage (from project root):
+    python backend/scripts/bench_workers.py --workers 4 --width 4096
+    python backend/scripts/bench_workers.py --workers 4 --path all
+"""
+import sys
+import os
+import argparse
+import multiprocessing
+import shutil
+import tempfile
+
+# Add project root to path (works from both backend/ and project root)
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(script_dir))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+def _memory_mb() -> dict:
+    fields = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {
+        "rss": fields["Rss"],
+        "pss": fields["Pss"],
+        "private": fields["Private_Clean"] + fields["Private_Dirty"],
+    }
+
+def _mlp(width: int) -> dict:
+    layers = [("Flatten", {}), ("Linear", {"out_features": width}), ("ReLU", {}),
+              ("Linear", {"out_features": width}), ("ReLU", {}), ("Linear", {"out_features": 10})]
+    return {"layers": [{"type": layer_type, "params": params} for layer_type, params in layers]}
+
+# Inference paths that can be measured; "capture" is the default of /inference/run
+PATHS = ("capture", "eager", "traced", "quantized", "onnxruntime")
+
+def _load_and_run(path: str, architecture: dict, input_shape: list):
+    """Load the model as `path` does and run one forward pass; returns what must stay alive"""
+    from types import SimpleNamespace
+    import numpy as np
+    from backend.services.artifact_exporter import FORMAT_ONNX, artifact_exporter, artifact_key
+    from backend.services.inference_backends import TORCH_BACKENDS, OnnxRuntimeBackend
+    from backend.services.inference_engine import InferenceEngine
+    from backend.services.version_store import architecture_hash
+
+    key = artifact_key(architecture_hash(architecture), input_shape)
+    if path == "capture":
+        engine = InferenceEngine(SimpleNamespace(architecture=architecture, input_shape=input_shape, architecture_hash=None))
+        engine.run_inference(np.zeros([1] + input_shape, dtype=np.float32).tolist())
+        return engine
+    if path == "onnxruntime":
+        # Every worker exports; the atomic write leaves one file
+        backend = OnnxRuntimeBackend(str(artifact_exporter.build(architecture, input_shape, FORMAT_ONNX, key)))
+    else:
+        backend = TORCH_BACKENDS[path].from_architecture(architecture, input_shape, key)
+    backend.predict(np.zeros([1] + input_shape, dtype=np.float32))
+    return backend
+
+def _worker(weights_dir, artifacts_dir, path, width, loaded, release, results):
+    # Settings are read at import, so configure the environment first
+    os.environ["ARTIFACT_CACHE_DIR"] = artifacts_dir
+    if weights_dir:
+        os.environ["SHARED_WEIGHTS_DIR"] = weights_dir
+    os.environ["OMP_NUM_THREADS"] = "1"
+    import torch  # noqa: F401  (imported before the baseline so only the model is measured)
+    import backend.services.inference_backends  # noqa: F401
+
+    before = _memory_mb()
+    try:
+        model = _load_and_run(path, _mlp(width), [3, 32, 32])
+    except Exception as e:
+        results.put({"error": repr(e)})
+        loaded.abort()
+        release.abort()
+        raise
+    # Measure once every worker has its model, so shared pages are counted across all of them
+    loaded.wait()
+    after = _memory_mb()
+    results.put({name: after[name] - before[name] for name in after})
+    release.wait()
+
+def run(mode: str, path: str, workers: int, width: int) -> list:
+    context = multiprocessing.get_context("spawn")
+    weights_dir = tempfile.mkdtemp(prefix="bench-weights-", dir="/dev/shm" if os.path.isdir("/dev/shm") else None) if mode == "shared" else None
+    # Exported ONNX files go to a scratch cache, not the server's
+    artifacts_dir = tempfile.mkdtemp(prefix="bench-artifacts-")
+    loaded, release = context.Barrier(workers), context.Barrier(workers + 1)
+    results = context.Queue()
+    processes = [context.Process(target=_worker, args=(weights_dir, artifacts_dir, path, width, loaded, release, results)) for _ in range(workers)]
+    try:
+        for process in processes:
+            process.start()
+        measured = [results.get(timeout=600) for _ in processes]
+        errors = [m["error"] for m in measured if "error" in m]
+        if errors:
+            raise RuntimeError(f"Worker failed: {errors[0]}")
+        release.wait()
+        for process in processes:
+            process.join()
+        return measured
+    finally:
+        shutil.rmtree(artifacts_dir, ignore_errors=True)
+        if weights_dir:
+            shutil.rmtree(weights_dir, ignore_errors=True)
+
+def main(args):
+    params = 3 * 32 * 32 * args.width + args.width * args.width + args.width * 10
+    print(f"MLP width {args.width}: {params / 1e6:.1f}M parameters ({params * 4 / 2**20:.0f} MB fp32), {args.workers} workers")
+    print(f"{'path':<13}{'mode':<10}{'RSS/worker':>12}{'PSS/worker':>12}{'private/worker':>16}{'PSS total':>11}  (MB added by the model)")
+    for path in (PATHS if args.path == "all" else (args.path,)):
+        for mode in ("private", "shared"):
+            measured = run(mode, path, args.workers, args.width)
+            mean = {name: sum(m[name] for m in measured) / len(measured) for name in measured[0]}
+            total_pss = sum(m["pss"] for m in measured)
+            print(f"{path:<13}{mode:<10}{mean['rss']:>12.0f}{mean['pss']:>12.0f}{mean['private']:>16.0f}{total_pss:>11.0f}"
+                  "  private per worker: " + ", ".join(f"{m['private']:.0f}" for m in measured))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark per-worker memory with shared weights")
+    parser.add_argument("--workers", type=int, default=4, help="Worker processes")
+    parser.add_argument("--width", type=int, default=4096, help="Hidden width of the benchmark MLP")
+    parser.add_argument("--path", choices=PATHS + ("all",), default="capture", help="Inference path to measure")
+    main(parser.parse_args())
@@ -0,0 +1,388 @@
+"""
+Rule-based optimization suggestions computed in-process
+
+`ArchitectureAnalyzer` walks the layer graph with a shape calculator
+(no torch, no model construction) and applies a fixed set of checks to
+the architecture, dataset statistics and training metrics. It answers
+in the same JSON schema as the Gemini analysis in about a millisecond,
+so it can serve as the default engine, the fallback while Gemini is
+unavailable, or an instant first answer before the LLM result arrives.
+"""
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from backend.services.architecture_utils import architecture_layers
+
+CONV_TYPES = ("Conv2d", "ConvBNReLU", "ConvBNLeakyReLU", "ResidualBlock")
+NORMALIZED_CONV_TYPES = ("ConvBNReLU", "ConvBNLeakyReLU", "ResidualBlock")
+POOL_TYPES = ("MaxPool2d", "AvgPool2d")
+LINEAR_TYPES = ("Linear", "Dense")
+
+# A Linear layer after Flatten holding more than this many parameters...
+FLATTEN_LINEAR_MAX_PARAMS = 1_000_000
+# ...or this share of the whole model is flagged
+FLATTEN_LINEAR_MAX_SHARE = 0.5
+# Feature maps smaller than this (per side) before Flatten keep little spatial information
+MIN_SPATIAL_SIZE = 4
+# A single layer shrinking each side by this factor or more downsamples too aggressively
+MAX_DOWNSAMPLE_FACTOR = 4
+# Relative validation/train loss gap and accuracy gap that indicate overfitting
+OVERFIT_LOSS_GAP = 0.3
+OVERFIT_ACC_GAP = 0.1
+# Parameters per training sample above which the model is likely to memorise
+PARAMS_PER_SAMPLE = 100
+CLASS_IMBALANCE_RATIO = 5.0
+
+class LayerInfo(NamedTuple):
+    index: int
+    type: str
+    params: Dict[str, Any]
+    input_shape: Tuple[int, ...]
+    output_shape: Tuple[int, ...]
+    parameters: int
+
+def _int(value: Any, default: int) -> int:
+    if isinstance(value, (list, tuple)) and value:
+        value = value[0]
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+def _float(value: Any) -> Optional[float]:
+    """`value` as a float, or None if it is missing or not a number"""
+    if isinstance(value, bool):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def input_shape_from_stats(dataset_stats: Dict[str, Any]) -> Tuple[int, int, int]:
+    """(C, H, W) from `channels` and `imageSize` ([H, W], [H] or a single side)"""
+    image_size = dataset_stats.get('imageSize') or [224, 224]
+    if not isinstance(image_size, (list, tuple)):
+        image_size = [image_size]
+    return (_int(dataset_stats.get('channels'), 3), _int(image_size[0], 224), _int(image_size[-1], 224))
+
+def _class_counts(dataset_stats: Dict[str, Any]) -> List[float]:
+    """Numeric sample counts from `classDistribution`; entries that are not numbers are skipped"""
+    distribution = dataset_stats.get('classDistribution')
+    if not isinstance(distribution, dict):
+        return []
+    counts = [_float(count) for count in distribution.values()]
+    return [count for count in counts if count is not None]
+
+def _out_size(size: int, kernel: int, stride: int, padding: int = 0) -> int:
+    return (size + 2 * padding - kernel) // max(stride, 1) + 1
+
+def infer_layers(layers: List[Dict[str, Any]], input_shape: Tuple[int, ...]) -> List[LayerInfo]:
+    """
+    Output shape and parameter count of every layer, without building the model
+
+    Shapes are (C, H, W) for feature maps and (features,) after Flatten.
+    Parameter counts follow the PyTorch modules `ModelBuilder` creates.
+    """
+    infos = []
+    shape = tuple(input_shape)
+    for index, layer in enumerate(layers):
+        layer_type = layer.get("type") or "Unknown"
+        params = layer.get("params") or {}
+        before = shape
+        count = 0
+
+        if layer_type in CONV_TYPES and len(shape) == 3:
+            channels, height, width = shape
+            out_channels = _int(params.get("out_channels"), 64)
+            kernel = _int(params.get("kernel_size"), 3)
+            stride = _int(params.get("stride"), 1)
+            padding = _int(params.get("padding"), 0)
+            count = channels * out_channels * kernel * kernel + out_channels
+            if layer_type in NORMALIZED_CONV_TYPES:
+                count += 2 * out_channels
+            if layer_type == "ResidualBlock":
+                count += out_channels * out_channels * kernel * kernel + 3 * out_channels
+            shape = (out_channels, _out_size(height, kernel, stride, padding), _out_size(width, kernel, stride, padding))
+        elif layer_type in POOL_TYPES and len(shape) == 3:
+            channels, height, width = shape
+            kernel = _int(params.get("kernel_size"), 2)
+            stride = _int(params.get("stride"), 2)
+            shape = (channels, _out_size(height, kernel, stride), _out_size(width, kernel, stride))
+        elif layer_type == "AdaptiveAvgPool2d" and len(shape) == 3:
+            output_size = params.get("output_size") or (1, 1)
+            if isinstance(output_size, (int, str)):
+                output_size = (output_size, output_size)
+            shape = (shape[0], _int(output_size[0], 1), _int(output_size[-1], 1))
+        elif layer_type == "BatchNorm2d" and len(shape) == 3:
+            count = 2 * shape[0]
+        elif layer_type == "Flatten":
+            features = 1
+            for dim in shape:
+                features *= dim
+            shape = (features,)
+        elif layer_type in LINEAR_TYPES:
+            in_features = 1
+            for dim in shape:
+                in_features *= dim
+            out_features = _int(params.get("out_features"), 64)
+            count = in_features * out_features + out_features
+            shape = (out_features,)
+
+        infos.append(LayerInfo(index, layer_type, params, before, shape, count))
+    return infos
+
+def _suggestion(parameter: str, current: str, suggested: str, reason: str, impact: str, category: str) -> Dict[str, str]:
+    return {
+        "parameter": parameter,
+        "current_value": current,
+        "suggested_value": suggested,
+        "reason": reason,
+        "impact": impact,
+        "category": category,
+    }
+
+def _format_count(count: int) -> str:
+    if count >= 1_000_000:
+        return f"{count / 1_000_000:.1f}M"
+    if count >= 1_000:
+        return f"{count / 1_000:.1f}K"
+    return str(count)
+
+class ArchitectureAnalyzer:
+    """Local heuristics over the layer graph and training curves"""
+
+    def analyze(
+        self,
+        architecture: Dict[str, Any],
+        dataset_stats: Dict[str, Any],
+        training_metrics: Optional[List[Dict[str, Any]]] = None,
+    ) -> Dict[str, Any]:
+        """Suggestions in the Gemini response schema ({"analysis", "suggestions"})"""
+        dataset_stats = dataset_stats or {}
+        input_shape = input_shape_from_stats(dataset_stats)
+        layers = infer_layers(architecture_layers(architecture or {}), input_shape)
+        total = sum(layer.parameters for layer in layers)
+
+        suggestions: List[Dict[str, str]] = []
+        findings: List[str] = []
+        for check in (
+            self._check_shapes,
+            self._check_batchnorm,
+            self._check_flatten_linear,
+            self._check_downsampling,
+            self._check_output,
+            self._check_capacity,
+        ):
+            check(layers, total, dataset_stats, suggestions, findings)
+        self._check_dataset(dataset_stats, layers, suggestions, findings)
+        self._check_training(layers, training_metrics or [], suggestions, findings)
+
+        order = {"High": 0, "Medium": 1, "Low": 2}
+        suggestions.sort(key=lambda s: order.get(s["impact"], 3))
+        return {
+            "analysis": self._summary(layers, total, input_shape, training_metrics or [], findings),
+            "suggestions": suggestions,
+            "engine": "local",
+        }
+
+    def _summary(self, layers, total, input_shape, training_metrics, findings) -> str:
+        if not layers:
+            return "The architecture has no layers yet. Add layers to get suggestions."
+        path = [f"{layer.output_shape[1]}x{layer.output_shape[2]}" for layer in layers if len(layer.output_shape) == 3]
+        text = (
+            f"The network has {len(layers)} layers and about {_format_count(total)} trainable parameters "
+            f"for {input_shape[0]}x{input_shape[1]}x{input_shape[2]} inputs."
+        )
+        if path:
+            text += f" Feature maps go from {input_shape[1]}x{input_shape[2]} to {path[-1]}."
+        if training_metrics:
+            last = training_metrics[-1]
+            text += (
+                f" After {len(training_metrics)} epochs train/validation loss is "
+                f"{last.get('trainLoss', 'N/A')}/{last.get('valLoss', 'N/A')}."
+            )
+        if findings:
+            text += " Main findings: " + " ".join(findings)
+        else:
+            text += " No structural problems were detected."
+        return text
+
+    def _check_shapes(self, layers, total, dataset_stats, suggestions, findings) -> None:
+        for layer in layers:
+            if any(dim <= 0 for dim in layer.output_shape):
+                suggestions.append(_suggestion(
+                    f"{layer.type} (layer {layer.index + 1})",
+                    f"Input {'x'.join(map(str, layer.input_shape))}",
+                    "Reduce kernel size/stride or remove a downsampling layer",
+                    "The feature map shrinks to zero size here, so the model cannot run on this input size.",
+                    "High", "architecture",
+                ))
+                findings.append(f"The feature map collapses to zero size at layer {layer.index + 1}.")
+                return
+
+    def _check_batchnorm(self, layers, total, dataset_stats, suggestions, findings) -> None:
+        plain_convs = [layer for layer in layers if layer.type == "Conv2d"]
+        normalized = any(layer.type == "BatchNorm2d" or layer.type in NORMALIZED_CONV_TYPES for layer in layers)
+        if len(plain_convs) >= 3 and not normalized:
+            suggestions.append(_suggestion(
+                "Normalization",
+                f"{len(plain_convs)} Conv2d layers, no BatchNorm",
+                "Add BatchNorm2d after each Conv2d (or use ConvBNReLU blocks)",
+                "Batch normalization stabilises activations in deep conv stacks, allowing higher learning rates and faster convergence.",
+                "High", "architecture",
+            ))
+            findings.append("Convolutions are not normalized.")
+
+    def _check_flatten_linear(self, layers, total, dataset_stats, suggestions, findings) -> None:
+        for previous, layer in zip(layers, layers[1:]):
+            if previous.type != "Flatten" or layer.type not in LINEAR_TYPES:
+                continue
+            share = layer.parameters / total if total else 0.0
+            if layer.parameters > FLATTEN_LINEAR_MAX_PARAMS or (share > FLATTEN_LINEAR_MAX_SHARE and layer.parameters > 100_000):
+                in_features = layer.input_shape[0] if layer.input_shape else 0
+                suggestions.append(_suggestion(
+                    f"Linear after Flatten (layer {layer.index + 1})",
+                    f"{in_features} -> {layer.output_shape[0]} ({_format_count(layer.parameters)} params, {share:.0%} of model)",
+                    "Add AdaptiveAvgPool2d(1) or more pooling before Flatten",
+                    "Flattening a large feature map into a dense layer concentrates most parameters in one layer, which is slow and overfits easily; global pooling keeps the features with a fraction of the weights.",
+                    "High", "architecture",
+                ))
+                findings.append(f"The first dense layer holds {share:.0%} of all parameters.")
+
+    def _check_downsampling(self, layers, total, dataset_stats, suggestions, findings) -> None:
+        for layer in layers:
+            if len(layer.input_shape) != 3 or len(layer.output_shape) != 3 or min(layer.output_shape) <= 0:
+                continue
+            factor = layer.input_shape[1] / layer.output_shape[1]
+            if factor >= MAX_DOWNSAMPLE_FACTOR and layer.type != "AdaptiveAvgPool2d":
+                suggestions.append(_suggestion(
+                    f"{layer.type} (layer {layer.index + 1})",
+                    f"{layer.input_shape[1]}x{layer.input_shape[2]} -> {layer.output_shape[1]}x{layer.output_shape[2]}",
+                    "Downsample in steps of 2 (stride 2 or 2x2 pooling)",
+                    "Shrinking the feature map by 4x or more in one layer discards spatial detail before the network can extract features from it.",
+                    "Medium", "architecture",
+                ))
+                findings.append(f"Layer {layer.index + 1} downsamples by {factor:.0f}x at once.")
+                break
+
+        flatten = next((layer for layer in layers if layer.type == "Flatten"), None)
+        if flatten is not None and len(flatten.input_shape) == 3:
+            _, height, width = flatten.input_shape
+            convs_before = [layer for layer in layers[:flatten.index] if layer.type in CONV_TYPES]
+            # Global pooling shrinks to 1x1 on purpose
+            pooled = any(layer.type == "AdaptiveAvgPool2d" for layer in layers[:flatten.index])
+            if not pooled and 0 < min(height, width) < MIN_SPATIAL_SIZE and len(convs_before) <= 2:
+                suggestions.append(_suggestion(
+                    "Downsampling",
+                    f"{height}x{width} feature map after {len(convs_before)} conv layers",
+                    "Use fewer pooling/stride-2 layers or add convolutions between them",
+                    "The input is reduced to a tiny feature map before the network has enough layers to build useful features.",
+                    "Medium", "architecture",
+                ))
+                findings.append("The input is downsampled too aggressively for the network depth.")
+
+    def _check_output(self, layers, total, dataset_stats, suggestions, findings) -> None:
+        distribution = dataset_stats.get('classDistribution')
+        num_classes = len(distribution) if isinstance(distribution, dict) else 0
+        last_linear = next((layer for layer in reversed(layers) if layer.type in LINEAR_TYPES), None)
+        if num_classes and last_linear is not None and last_linear.output_shape[0] != num_classes:
+            suggestions.append(_suggestion(
+                f"Output layer (layer {last_linear.index + 1})",
+                f"out_features={last_linear.output_shape[0]}",
+                f"out_features={num_classes}",
+                f"The dataset has {num_classes} classes, so the final Linear layer should produce one logit per class.",
+                "High", "architecture",
+            ))
+            findings.append("The output size does not match the number of classes.")
+
+    def _check_capacity(self, layers, total, dataset_stats, suggestions, findings) -> None:
+        samples = _int(dataset_stats.get('totalSamples'), 0)
+        has_dropout = any(layer.type == "Dropout" for layer in layers)
+        if samples and total > PARAMS_PER_SAMPLE * samples and not has_dropout:
+            suggestions.append(_suggestion(
+                "Dropout",
+                "None",
+                "Add Dropout(0.3-0.5) before the dense layers",
+                f"The model has {_format_count(total)} parameters for {samples} samples ({total // samples} per sample) and no dropout, so it can memorise the training set.",
+                "Medium", "regularization",
+            ))
+            findings.append("The model is large relative to the dataset.")
+
+    def _check_dataset(self, dataset_stats, layers, suggestions, findings) -> None:
+        counts = [count for count in _class_counts(dataset_stats) if count > 0]
+        if len(counts) >= 2 and max(counts) / min(counts) >= CLASS_IMBALANCE_RATIO:
+            suggestions.append(_suggestion(
+                "Class Balance",
+                f"{max(counts) / min(counts):.0f}:1 largest to smallest class",
+                "Class-weighted loss or balanced sampling",
+                "With strongly imbalanced classes the model can reach high accuracy by favouring the majority class; reweighting keeps minority classes in the loss.",
+                "Medium", "learning",
+            ))
+            findings.append("Classes are strongly imbalanced.")
+
+        if dataset_stats.get('noiseLevel') in ('medium', 'high') and not dataset_stats.get('augmentation'):
+            suggestions.append(_suggestion(
+                "Data Augmentation",
+                "Disabled",
+                "Enable flips, rotations and color shifts",
+                "Noisy data benefits from augmentation, which makes the model rely on robust features instead of noise.",
+                "Medium", "regularization",
+            ))
+
+    def _check_training(self, layers, training_metrics, suggestions, findings) -> None:
+        if not training_metrics:
+            return
+        first, last = training_metrics[0], training_metrics[-1]
+        # Metrics come from the client; anything that is not a number counts as missing
+        first_loss = _float(first.get('trainLoss'))
+        train_loss, val_loss = _float(last.get('trainLoss')), _float(last.get('valLoss'))
+        train_acc, val_acc = _float(last.get('trainAcc')), _float(last.get('valAcc'))
+
+        if train_loss is not None and first_loss is not None and (
+            train_loss != train_loss or train_loss > first_loss * 1.05
+        ):
+            suggestions.append(_suggestion(
+                "Learning Rate",
+                "Current",
+                "Reduce by 10x",
+                "Training loss did not decrease (or diverged), which usually means the learning rate is too high.",
+                "High", "learning",
+            ))
+            findings.append("Training loss is not decreasing.")
+            return
+
+        overfit = False
+        if train_loss is not None and val_loss is not None and train_loss > 0:
+            overfit = (val_loss - train_loss) / train_loss > OVERFIT_LOSS_GAP
+        if train_acc is not None and val_acc is not None:
+            overfit = overfit or train_acc - val_acc > OVERFIT_ACC_GAP
+        if overfit:
+            val_losses = {i: _float(epoch.get('valLoss')) for i, epoch in enumerate(training_metrics)}
+            reported = [i for i, loss in val_losses.items() if loss is not None]
+            best_epoch = min(reported, key=val_losses.get) if reported else len(training_metrics) - 1
+            has_dropout = any(layer.type == "Dropout" for layer in layers)
+            suggestions.append(_suggestion(
+                "Regularization",
+                f"train/val loss {train_loss:.3f}/{val_loss:.3f}" if train_loss is not None and val_loss is not None else "N/A",
+                "Increase Dropout and add weight decay (1e-4)" if has_dropout else "Add Dropout(0.5) and weight decay (1e-4)",
+                "Validation results are clearly worse than training results, a sign of overfitting.",
+                "High", "regularization",
+            ))
+            if best_epoch < len(training_metrics) - 1:
+                suggestions.append(_suggestion(
+                    "Epochs",
+                    str(len(training_metrics)),
+                    str(best_epoch + 1),
+                    f"Validation loss was lowest at epoch {best_epoch + 1}; use early stopping to keep that model.",
+                    "Medium", "optimization",
+                ))
+            findings.append("Training shows an overfitting gap.")
+        elif train_acc is not None and train_acc < 0.6 and len(training_metrics) >= 10:
+            suggestions.append(_suggestion(
+                "Model Capacity",
+                f"train accuracy {train_acc:.0%}",
+                "Add conv layers/channels or train longer",
+                "The model does not fit even the training data well, a sign of underfitting.",
+                "High", "architecture",
+            ))
+            findings.append("The model underfits.")
+
+architecture_analyzer = ArchitectureAnalyzer()
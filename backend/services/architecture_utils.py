@@ -0,0 +1,43 @@
+"""
+Helpers for the architecture documents the editor and saved versions use
+
+Kept free of torch and the training runtime so prompt, cache and analysis
+modules can import them cheaply.
+"""
+from typing import Any, Dict, List
+
+def architecture_layers(architecture: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Layer list for `ModelBuilder`
+
+    Saved versions carry `layers`; the editor sends React Flow `nodes` and
+    `edges`, which are converted the way the frontend does on save
+    (type + config), ordered along the edges when they form a chain.
+    """
+    if architecture.get("layers"):
+        return architecture["layers"]
+
+    nodes = architecture.get("nodes", [])
+    by_id = {node.get("id"): node for node in nodes}
+    successors = {}
+    has_incoming = set()
+    for edge in architecture.get("edges", []):
+        if edge.get("source") in by_id and edge.get("target") in by_id:
+            successors.setdefault(edge["source"], edge["target"])
+            has_incoming.add(edge["target"])
+
+    ordered = nodes
+    heads = [node for node in nodes if node.get("id") not in has_incoming]
+    if len(heads) == 1:
+        chain, seen, current = [], set(), heads[0].get("id")
+        while current is not None and current not in seen:
+            seen.add(current)
+            chain.append(by_id[current])
+            current = successors.get(current)
+        if len(chain) == len(nodes):
+            ordered = chain
+
+    return [
+        {"type": node.get("data", {}).get("type"), "params": node.get("data", {}).get("config") or {}}
+        for node in ordered
+    ]
@@ -0,0 +1,174 @@
+"""
+Serialized model artifacts (TorchScript, ONNX) with an on-disk cache
+"""
+import asyncio
+import copy
+import hashlib
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from starlette.concurrency import run_in_threadpool
+from backend.core.config import settings
+from backend.db.models import ModelVersion
+from backend.services.version_store import version_store
+from backend.services.weight_store import shared_weights
+
+FORMAT_TORCHSCRIPT = "torchscript"
+FORMAT_ONNX = "onnx"
+
+# format -> (file extension, media type)
+ARTIFACT_FORMATS: Dict[str, Tuple[str, str]] = {
+    FORMAT_TORCHSCRIPT: (".pt", "application/octet-stream"),
+    FORMAT_ONNX: (".onnx", "application/octet-stream"),
+}
+
+# Paths handed out by `get` are not pruned for this long, so a response can still open them
+RECENT_PATH_SECONDS = 300.0
+
+ONNX_OPSET = 17
+ONNX_INPUT_NAME = "input"
+ONNX_OUTPUT_NAME = "output"
+
+Runner = Callable[..., Awaitable[Any]]
+
+def artifact_key(arch_hash: str, input_shape: List[int]) -> str:
+    """Artifacts depend on the architecture and the shape used to resolve it"""
+    shape = ",".join(str(int(d)) for d in input_shape)
+    return hashlib.sha256(f"{arch_hash}:{shape}".encode("utf-8")).hexdigest()
+
+def example_input_shape(input_shape: List[int]) -> List[int]:
+    shape = [int(d) for d in input_shape]
+    return [1] + shape if len(shape) == 3 else shape
+
+def _build_seeded(architecture: Dict[str, Any], input_shape: List[int], key: str):
+    import torch
+    from backend.services.model_builder import ModelBuilder
+
+    with torch.random.fork_rng():
+        torch.manual_seed(int(key[:15], 16))
+        return ModelBuilder(copy.deepcopy(architecture), input_shape=list(input_shape)).build()
+
+def build_eval_model(architecture: Dict[str, Any], input_shape: List[int], key: str):
+    """
+    Build the model for `architecture` in eval mode
+
+    Weights are initialised from a seed derived from `key` so every build of
+    the same architecture yields identical parameters (and identical
+    artifacts) without disturbing the global RNG. With SHARED_WEIGHTS_DIR
+    set, the parameters are memory-mapped from a file shared by all worker
+    processes instead of allocated per process.
+    """
+    if shared_weights is not None:
+        return shared_weights.load(key, lambda: _build_seeded(architecture, input_shape, key))
+    return _build_seeded(architecture, input_shape, key).eval()
+
+class ArtifactExporter:
+    """Builds TorchScript/ONNX files once per architecture and keeps them on disk"""
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._locks: Dict[str, asyncio.Lock] = {}
+        # path -> time.monotonic() it was last returned by `get`
+        self._recent: Dict[Path, float] = {}
+
+    def path_for(self, key: str, fmt: str) -> Path:
+        extension, _ = ARTIFACT_FORMATS[fmt]
+        return self.cache_dir / f"{key}{extension}"
+
+    async def get(self, version: ModelVersion, fmt: str, run: Optional[Runner] = None) -> Path:
+        """
+        Return the path of the artifact for `version`, building it if needed
+
+        Args:
+            version: Model version to export
+            fmt: One of ARTIFACT_FORMATS
+            run: Coroutine function used to execute the blocking build
+                (defaults to the threadpool)
+        """
+        if fmt not in ARTIFACT_FORMATS:
+            raise ValueError(f"Unknown artifact format: {fmt!r}")
+        key = artifact_key(await version_store.get_architecture_hash(version), version.input_shape)
+        path = self.path_for(key, fmt)
+        if not path.exists():
+            # Concurrent requests for the same artifact wait for a single build
+            name = f"{key}{fmt}"
+            lock = self._locks.setdefault(name, asyncio.Lock())
+            async with lock:
+                try:
+                    if not path.exists():
+                        await version_store.resolve(version)
+                        run = run or run_in_threadpool
+                        await run(self.build, version.architecture, list(version.input_shape), fmt, key)
+                finally:
+                    # Also when the build fails, so a failed key does not keep its lock forever
+                    self._locks.pop(name, None)
+        self._recent[path] = time.monotonic()
+        return path
+
+    def build(self, architecture: Dict[str, Any], input_shape: List[int], fmt: str, key: str) -> Path:
+        """Build and atomically write an artifact (blocking)"""
+        import torch
+
+        path = self.path_for(key, fmt)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            model = build_eval_model(architecture, input_shape, key)
+            example = torch.zeros(*example_input_shape(input_shape))
+        except Exception as e:
+            raise ValueError(f"Failed to build model: {e}")
+
+        fd, tmp_name = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        os.close(fd)
+        try:
+            with torch.no_grad():
+                if fmt == FORMAT_TORCHSCRIPT:
+                    traced = torch.jit.trace(model, example)
+                    torch.jit.save(traced, tmp_name)
+                else:
+                    torch.onnx.export(
+                        model,
+                        example,
+                        tmp_name,
+                        input_names=[ONNX_INPUT_NAME],
+                        output_names=[ONNX_OUTPUT_NAME],
+                        dynamic_axes={ONNX_INPUT_NAME: {0: "batch"}, ONNX_OUTPUT_NAME: {0: "batch"}},
+                        opset_version=ONNX_OPSET,
+                    )
+            os.replace(tmp_name, path)
+        finally:
+            if os.path.exists(tmp_name):
+                os.remove(tmp_name)
+        self._prune(keep=path)
+        return path
+
+    def _prune(self, keep: Path) -> None:
+        """Delete least recently modified artifacts beyond the size budget"""
+        cutoff = time.monotonic() - RECENT_PATH_SECONDS
+        for path, returned_at in list(self._recent.items()):
+            if returned_at < cutoff:
+                self._recent.pop(path, None)
+        protected = set(self._recent) | {keep}
+
+        # Builds prune concurrently; files may vanish between listing and stat
+        files = []
+        for file in self.cache_dir.iterdir():
+            if file.suffix not in (".pt", ".onnx"):
+                continue
+            try:
+                stat = file.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, file))
+        total = sum(size for _, size, _ in files)
+        for _, size, old in sorted(files):
+            if total <= self.max_bytes:
+                break
+            if old in protected:
+                continue
+            total -= size
+            old.unlink(missing_ok=True)
+
+artifact_exporter = ArtifactExporter(settings.ARTIFACT_CACHE_DIR, settings.ARTIFACT_CACHE_MAX_BYTES)
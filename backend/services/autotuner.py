@@ -0,0 +1,207 @@
+"""
+Per-architecture selection of the fastest prediction backend
+
+Different architectures run fastest on different paths: eager, traced and
+frozen, dynamically quantized or onnxruntime. The autotuner benchmarks
+every backend available here on the version's `input_shape`, rejects those
+whose outputs disagree with eager, and records the winner
+on the version. Results are shared by every version with the same
+architecture hash and input shape, so tuning runs once per architecture.
+"""
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from starlette.concurrency import run_in_threadpool
+from backend.core.cache import LRUCache
+from backend.core.config import settings
+from backend.db.models import ModelVersion
+from backend.services.artifact_exporter import artifact_key, example_input_shape
+from backend.services.inference_backends import (
+    BACKEND_EAGER,
+    BACKEND_QUANTIZED,
+    InferenceBackend,
+    available_backends,
+    backend_pool,
+)
+from backend.services.version_store import version_store
+
+Runner = Callable[..., Awaitable[Any]]
+
+WARMUP_ITERATIONS = 3
+
+# Backends that trade exactness for speed. Dynamic int8 quantization never matches eager
+# within float tolerances, so these are judged on whether they predict the same class
+APPROXIMATE_BACKENDS = (BACKEND_QUANTIZED,)
+# Random inputs used to measure top-1 agreement with eager
+AGREEMENT_SAMPLES = 32
+
+def _top1_agreement(backend: InferenceBackend, inputs: List[Any], reference_top1: List[int]) -> float:
+    """Share of `inputs` where `backend` picks the same highest-scoring output as eager"""
+    import numpy as np
+
+    matches = sum(
+        int(np.argmax(backend.predict(sample)[0]) == expected)
+        for sample, expected in zip(inputs, reference_top1)
+    )
+    return matches / len(inputs)
+
+def benchmark_backends(
+    backends: Dict[str, InferenceBackend],
+    input_shape: List[int],
+    iterations: int,
+    rtol: float,
+    atol: float,
+    min_agreement: float = 0.95,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Time each backend on the same random batch and compare it with eager (blocking)
+
+    Exact backends must match eager within `rtol`/`atol`. Backends in
+    APPROXIMATE_BACKENDS with a multi-class output must instead agree with
+    eager's top-1 output on at least `min_agreement` of AGREEMENT_SAMPLES
+    random inputs.
+
+    Returns:
+        backend name -> {"median_ms", "max_abs_diff", "top1_agreement"?, "within_tolerance"}
+        (or {"error", "within_tolerance": False} when the backend fails)
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    shape = example_input_shape(input_shape)
+    batch = rng.random(shape, dtype=np.float32)
+    reference = backends[BACKEND_EAGER].predict(batch)
+    results: Dict[str, Dict[str, Any]] = {}
+
+    agreement_inputs: List[Any] = []
+    reference_top1: List[int] = []
+    classifies = reference.ndim >= 1 and reference.shape[-1] > 1
+    if classifies and any(name in APPROXIMATE_BACKENDS for name in backends):
+        agreement_inputs = [rng.random(shape, dtype=np.float32) for _ in range(AGREEMENT_SAMPLES)]
+        reference_top1 = [int(np.argmax(backends[BACKEND_EAGER].predict(sample)[0])) for sample in agreement_inputs]
+
+    for name, backend in backends.items():
+        try:
+            output = np.asarray(backend.predict(batch))
+            for _ in range(WARMUP_ITERATIONS):
+                backend.predict(batch)
+            samples = []
+            for _ in range(max(1, iterations)):
+                start = time.perf_counter()
+                backend.predict(batch)
+                samples.append(time.perf_counter() - start)
+            approximate = name in APPROXIMATE_BACKENDS and bool(agreement_inputs)
+            agreement = _top1_agreement(backend, agreement_inputs, reference_top1) if approximate else None
+        except Exception as e:
+            results[name] = {"error": str(e), "within_tolerance": False}
+            continue
+
+        same_shape = output.shape == reference.shape
+        result = {
+            "median_ms": float(np.median(samples)) * 1000,
+            "max_abs_diff": float(np.max(np.abs(output - reference))) if same_shape else None,
+        }
+        if agreement is not None:
+            result["top1_agreement"] = agreement
+            result["within_tolerance"] = bool(same_shape and agreement >= min_agreement)
+        else:
+            result["within_tolerance"] = bool(same_shape and np.allclose(output, reference, rtol=rtol, atol=atol))
+        results[name] = result
+    return results
+
+def pick_backend(results: Dict[str, Dict[str, Any]]) -> str:
+    """Fastest backend whose outputs agree with eager"""
+    accurate = {name: r["median_ms"] for name, r in results.items() if r.get("within_tolerance")}
+    if not accurate:
+        return BACKEND_EAGER
+    return min(accurate, key=accurate.get)
+
+class Autotuner:
+    """Benchmarks backends per architecture and remembers the winner"""
+
+    def __init__(self, iterations: int, rtol: float, atol: float, max_entries: int, min_agreement: float = 0.95):
+        self.iterations = iterations
+        self.rtol = rtol
+        self.atol = atol
+        self.min_agreement = min_agreement
+        self._cache = LRUCache(max_entries, name="autotune")
+
+    async def _key(self, version: ModelVersion) -> str:
+        return artifact_key(await version_store.get_architecture_hash(version), version.input_shape)
+
+    async def preferred_backend(self, version: ModelVersion) -> Optional[str]:
+        """Tuned backend for `version`, or None if its architecture has not been tuned"""
+        if version.execution_backend:
+            return version.execution_backend
+        cached = self._cache.get(await self._key(version))
+        return cached["backend"] if cached else None
+
+    async def _find_tuned(self, version: ModelVersion) -> Optional[Dict[str, Any]]:
+        """Results recorded on another version with the same architecture and input shape"""
+        tuned = await ModelVersion.find_one(
+            ModelVersion.architecture_hash == await version_store.get_architecture_hash(version),
+            ModelVersion.input_shape == list(version.input_shape),
+            ModelVersion.execution_backend != None,  # noqa: E711
+        )
+        return tuned.tuning_results if tuned and tuned.tuning_results else None
+
+    async def tune(self, version: ModelVersion, run: Optional[Runner] = None, force: bool = False) -> Dict[str, Any]:
+        """
+        Select and record the fastest accurate backend for `version`
+
+        Args:
+            version: Model version to tune
+            run: Coroutine function used to execute blocking work
+                (defaults to the threadpool)
+            force: Benchmark again even if results exist
+
+        Returns:
+            {"backend", "results", "tuned_at"} as stored on the version
+        """
+        run = run or run_in_threadpool
+        key = await self._key(version)
+
+        entry = None if force else (self._cache.get(key) or await self._find_tuned(version))
+        if entry is None:
+            backends: Dict[str, InferenceBackend] = {}
+            load_errors: Dict[str, Dict[str, Any]] = {}
+            for name in available_backends():
+                try:
+                    backends[name] = await backend_pool.get(version, name, run=run)
+                except Exception as e:
+                    if name == BACKEND_EAGER:
+                        raise
+                    load_errors[name] = {"error": str(e), "within_tolerance": False}
+
+            results = await run(
+                benchmark_backends,
+                backends,
+                list(version.input_shape),
+                self.iterations,
+                self.rtol,
+                self.atol,
+                self.min_agreement,
+            )
+            results.update(load_errors)
+            entry = {
+                "backend": pick_backend(results),
+                "results": results,
+                "tuned_at": datetime.utcnow().isoformat(),
+            }
+
+        self._cache.set(key, entry)
+        if version.execution_backend != entry["backend"] or version.tuning_results != entry:
+            # Partial update: `version` may hold a reconstructed architecture that must not be persisted
+            await version.set({
+                ModelVersion.execution_backend: entry["backend"],
+                ModelVersion.tuning_results: entry,
+            })
+        return entry
+
+autotuner = Autotuner(
+    settings.AUTOTUNE_ITERATIONS,
+    rtol=settings.AUTOTUNE_RTOL,
+    atol=settings.AUTOTUNE_ATOL,
+    max_entries=settings.AUTOTUNE_CACHE_SIZE,
+    min_agreement=settings.AUTOTUNE_MIN_TOP1_AGREEMENT,
+)
@@ -0,0 +1,59 @@
+"""
+In-memory cache of generated export code
+"""
+from typing import Iterator, NamedTuple
+from starlette.concurrency import run_in_threadpool
+from backend.core.cache import LRUCache
+from backend.core.config import settings
+from backend.db.models import ModelVersion
+from backend.services.code_generator import CodeGenerator, TARGET_STANDARD
+from backend.services.version_store import version_store
+
+class GeneratedCode(NamedTuple):
+    text: str
+    data: bytes  # UTF-8 encoded `text`, ready to send
+
+class CodeCache:
+    """
+    Bounded LRU of generated PyTorch code
+
+    Entries are keyed by version id, last update time, architecture hash,
+    model name (which the code embeds) and export target, so a cache hit
+    needs neither the materialised architecture nor any string building.
+    """
+
+    def __init__(self, max_entries: int):
+        self._cache = LRUCache(max_entries, name="generated_code")
+
+    async def get(self, version: ModelVersion, model_name: str, target: str = TARGET_STANDARD) -> GeneratedCode:
+        key = (
+            str(version.id),
+            (version.updated_at or version.created_at).isoformat(),
+            await version_store.get_architecture_hash(version),
+            model_name,
+            target,
+        )
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        await version_store.resolve(version)
+        generator = CodeGenerator(version)
+        if target == TARGET_STANDARD:
+            text = generator.generate(model_name, target)
+        else:
+            # Other targets build the model to resolve shapes; keep that off the event loop
+            text = await run_in_threadpool(generator.generate, model_name, target)
+        generated = GeneratedCode(text, text.encode("utf-8"))
+        self._cache.set(key, generated)
+        return generated
+
+    def stats(self):
+        return self._cache.stats()
+
+def iter_chunks(data: bytes, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Yield `data` in chunks for a streaming response"""
+    for start in range(0, len(data), chunk_size):
+        yield data[start:start + chunk_size]
+
+code_cache = CodeCache(settings.CODE_CACHE_SIZE)
@@ -1,15 +1,28 @@
 """
 Code generator for exporting models as Python PyTorch code
 """
-from typing import Dict, Any
+import copy
+from typing import Dict, Any, List, Tuple
 from backend.db.models import ModelVersion
 
+TARGET_STANDARD = "standard"
+TARGET_OPTIMIZED = "optimized"
+TARGETS = (TARGET_STANDARD, TARGET_OPTIMIZED)
+
 class CodeGenerator:
     """Generates Python PyTorch code from model versions"""
     
     def __init__(self, version: ModelVersion):
         self.version = version
     
+    def generate(self, model_name: str = "Model", target: str = TARGET_STANDARD) -> str:
+        """Generate code for the given export target"""
+        if target == TARGET_OPTIMIZED:
+            return self.generate_optimized_code(model_name=model_name)
+        if target == TARGET_STANDARD:
+            return self.generate_pytorch_code(model_name=model_name)
+        raise ValueError(f"Unknown export target: {target!r}")
+    
     def generate_pytorch_code(self, model_name: str = "Model") -> str:
         """Generate complete PyTorch model code"""
         architecture = self.version.architecture
@@ -156,3 +169,229 @@ if __name__ == "__main__":
         
         return "\n".join(lines) if lines else "        pass"
 
+
+    def generate_optimized_code(self, model_name: str = "Model") -> str:
+        """
+        Generate inference-oriented PyTorch code
+
+        Layer parameters come from the model `ModelBuilder` actually builds
+        (so inferred `in_features` are exact) and every layer is annotated
+        with its output shape. The file folds Conv2d+BatchNorm2d pairs when
+        loading for inference, runs in channels-last under
+        `torch.inference_mode`, and includes a latency/throughput benchmark
+        for the version's `input_shape`.
+        """
+        layers, shapes = self._resolve_layers()
+        input_shape = list(self.version.input_shape)
+        custom_loss = self.version.custom_loss or "nn.CrossEntropyLoss()"
+        
+        init_lines = []
+        forward_lines = []
+        for i, (module, shape) in enumerate(zip(layers, shapes)):
+            init_lines.append(f"        self.layer_{i} = {self._module_constructor(module)}  # -> {shape}")
+            forward_lines.append(f"        x = self.layer_{i}(x)")
+        
+        fusible = self._fusible_conv_bn_pairs(layers)
+        fusible_code = ", ".join(f'("layer_{conv}", "layer_{bn}")' for conv, bn in fusible)
+        total_params = sum(p.numel() for m in layers for p in m.parameters())
+        
+        return f'''"""
+PyTorch Model: {model_name} - Version {self.version.version_number} (optimized for inference)
+Generated by DL Model Builder & Visualizer Platform
+
+Parameters: {total_params:,}
+Input shape: {input_shape}
+"""
+
+import argparse
+import time
+
+import torch
+import torch.nn as nn
+from torch.nn.utils.fusion import fuse_conv_bn_eval
+
+
+INPUT_SHAPE = {input_shape}
+
+# (Conv2d, BatchNorm2d) attribute pairs folded into a single conv at load time
+FUSIBLE_CONV_BN = [{fusible_code}]
+
+
+class Model(nn.Module):
+    """
+    Model Architecture:
+    {self._format_architecture(self.version.architecture)}
+    """
+    
+    def __init__(self):
+        super(Model, self).__init__()
+        
+{chr(10).join(init_lines) if init_lines else "        pass"}
+    
+    def forward(self, x):
+{chr(10).join(forward_lines) if forward_lines else "        pass"}
+        return x
+
+
+# Custom Loss Function
+def get_loss_function():
+    """
+    Custom loss function for this model
+    """
+    return {custom_loss}
+
+
+def fuse_conv_bn(model):
+    """Fold BatchNorm2d into the preceding Conv2d (eval mode only)"""
+    for conv_name, bn_name in FUSIBLE_CONV_BN:
+        conv = getattr(model, conv_name)
+        bn = getattr(model, bn_name)
+        setattr(model, conv_name, fuse_conv_bn_eval(conv, bn))
+        setattr(model, bn_name, nn.Identity())
+    return model
+
+
+def _batched_shape(batch_size=None):
+    shape = list(INPUT_SHAPE)
+    if len(shape) == 3:
+        shape = [1] + shape
+    if batch_size:
+        shape[0] = batch_size
+    return shape
+
+
+def load_for_inference(weights_path=None, channels_last=True):
+    """Create the model, load weights, fold Conv+BN and set the memory format"""
+    model = Model()
+    if weights_path:
+        model.load_state_dict(torch.load(weights_path, map_location="cpu"))
+    model.eval()
+    fuse_conv_bn(model)
+    if channels_last and len(_batched_shape()) == 4:
+        model = model.to(memory_format=torch.channels_last)
+    return model
+
+
+def predict(model, x, channels_last=True):
+    """Run a forward pass without autograd bookkeeping"""
+    with torch.inference_mode():
+        if channels_last and x.dim() == 4:
+            x = x.contiguous(memory_format=torch.channels_last)
+        return model(x)
+
+
+def benchmark(model, batch_size=None, warmup=10, iters=100, channels_last=True):
+    """Measure latency and throughput for INPUT_SHAPE"""
+    shape = _batched_shape(batch_size)
+    x = torch.randn(*shape)
+    for _ in range(warmup):
+        predict(model, x, channels_last)
+    
+    timings = []
+    for _ in range(iters):
+        start = time.perf_counter()
+        predict(model, x, channels_last)
+        timings.append(time.perf_counter() - start)
+    
+    timings.sort()
+    total = sum(timings)
+    return {{
+        "batch_size": shape[0],
+        "iterations": iters,
+        "mean_ms": total / iters * 1000,
+        "p50_ms": timings[iters // 2] * 1000,
+        "p95_ms": timings[min(iters - 1, int(iters * 0.95))] * 1000,
+        "throughput_per_s": shape[0] * iters / total,
+    }}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark {model_name} v{self.version.version_number}")
+    parser.add_argument("--weights", help="Path to a state_dict to load")
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--iters", type=int, default=100)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--no-channels-last", action="store_true")
+    args = parser.parse_args()
+    
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    channels_last = not args.no_channels_last
+    
+    model = load_for_inference(args.weights, channels_last=channels_last)
+    print(model)
+    
+    output = predict(model, torch.randn(*_batched_shape(args.batch_size)), channels_last)
+    print(f"Output shape: {{tuple(output.shape)}}")
+    
+    results = benchmark(model, args.batch_size, args.warmup, args.iters, channels_last)
+    print(
+        f"batch={{results['batch_size']}} "
+        f"mean={{results['mean_ms']:.3f}} ms "
+        f"p50={{results['p50_ms']:.3f}} ms "
+        f"p95={{results['p95_ms']:.3f}} ms "
+        f"throughput={{results['throughput_per_s']:.1f}}/s"
+    )
+'''
+    
+    def _resolve_layers(self) -> Tuple[List[Any], List[List[int]]]:
+        """Build the model with ModelBuilder and record each layer's output shape"""
+        import torch
+        from backend.services.model_builder import ModelBuilder
+        
+        input_shape = list(self.version.input_shape)
+        try:
+            builder = ModelBuilder(copy.deepcopy(self.version.architecture), input_shape=input_shape)
+            model = builder.build()
+            model.eval()
+            x = torch.zeros(*input_shape)
+            if x.dim() == 3:
+                x = x.unsqueeze(0)
+            layers, shapes = [], []
+            with torch.no_grad():
+                for module in model:
+                    x = module(x)
+                    layers.append(module)
+                    shapes.append(list(x.shape))
+        except Exception as e:
+            raise ValueError(f"Cannot resolve layer shapes for input {input_shape}: {e}")
+        return layers, shapes
+    
+    def _module_constructor(self, module: Any) -> str:
+        """Python expression that recreates `module` with its resolved parameters"""
+        name = type(module).__name__
+        if name == "Conv2d":
+            return (
+                f"nn.Conv2d({module.in_channels}, {module.out_channels}, "
+                f"kernel_size={module.kernel_size}, stride={module.stride}, "
+                f"padding={module.padding}, bias={module.bias is not None})"
+            )
+        if name == "Linear":
+            return f"nn.Linear({module.in_features}, {module.out_features}, bias={module.bias is not None})"
+        if name == "BatchNorm2d":
+            return f"nn.BatchNorm2d({module.num_features}, eps={module.eps}, momentum={module.momentum})"
+        if name in ("MaxPool2d", "AvgPool2d"):
+            return f"nn.{name}(kernel_size={module.kernel_size}, stride={module.stride}, padding={module.padding})"
+        if name == "AdaptiveAvgPool2d":
+            return f"nn.AdaptiveAvgPool2d(output_size={module.output_size})"
+        if name == "Dropout":
+            return f"nn.Dropout(p={module.p})"
+        if name == "Flatten":
+            return f"nn.Flatten(start_dim={module.start_dim}, end_dim={module.end_dim})"
+        if name == "ReLU":
+            return "nn.ReLU(inplace=True)"
+        return f"nn.{name}()"
+    
+    def _fusible_conv_bn_pairs(self, layers: List[Any]) -> List[Tuple[int, int]]:
+        """Indices of Conv2d layers immediately followed by a matching BatchNorm2d"""
+        pairs = []
+        for i in range(len(layers) - 1):
+            conv, bn = layers[i], layers[i + 1]
+            if (
+                type(conv).__name__ == "Conv2d"
+                and type(bn).__name__ == "BatchNorm2d"
+                and conv.out_channels == bn.num_features
+            ):
+                pairs.append((i, i + 1))
+        return pairs
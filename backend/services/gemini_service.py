@@ -1,17 +1,81 @@
+import asyncio
+import copy
 import os
-import google.generativeai as genai
-from typing import Dict, Any, List
+import time
+from typing import Dict, Any, AsyncIterator, List, Optional
 from backend.core.config import settings
+from backend.core.metrics import Counter, Histogram
+from backend.core.resilience import CircuitBreaker, CircuitOpenError, SingleFlight
+from backend.services.architecture_analyzer import architecture_analyzer
+from backend.services.suggestion_cache import SuggestionCache, suggestion_cache, suggestion_key
+from backend.services.suggestion_parser import SuggestionStreamParser
+from backend.services.prompt_serializer import serialize_architecture
+
+GEMINI_MODEL_NAME = 'gemini-2.0-flash'
+
+GEMINI_REQUESTS = Counter(
+    "gemini_requests_total",
+    "Suggestion requests by outcome",
+    ("outcome",),  # cache_hit, coalesced, success, invalid_response, error, timeout, saturated, circuit_open
+)
+GEMINI_LATENCY = Histogram(
+    "gemini_request_duration_seconds",
+    "Upstream Gemini call time (stream: until the last chunk), failures included",
+    ("mode",),  # complete, stream
+)
+GEMINI_FIRST_CHUNK = Histogram(
+    "gemini_stream_first_chunk_seconds",
+    "Time until the first chunk of a streamed Gemini answer",
+)
+
+class UpstreamBusyError(Exception):
+    """Raised when no concurrency slot frees up before the deadline"""
 
 class GeminiService:
-    def __init__(self):
+    def __init__(
+        self,
+        model: Optional[Any] = None,
+        cache: Optional[SuggestionCache] = None,
+        timeout: float = settings.GEMINI_TIMEOUT_SECONDS,
+        max_concurrency: int = settings.GEMINI_MAX_CONCURRENCY,
+        breaker: Optional[CircuitBreaker] = None,
+        fallback: Optional[Any] = None,
+    ):
+        """
+        Args:
+            model: Object with an async `generate_content_async(prompt)` returning a
+                response with `.text`; built from GEMINI_API_KEY when omitted
+            cache: Suggestion cache; every request goes to the model when omitted
+            timeout: Deadline in seconds for the upstream call, and separately for
+                the wait for a concurrency slot
+            max_concurrency: Upstream calls allowed in flight at once
+            breaker: Circuit breaker guarding the upstream
+            fallback: Local analyzer (`analyze(architecture, dataset_stats, training_metrics)`)
+                answering while the upstream is unavailable
+        """
+        self.fallback = fallback
+        self.cache = cache
+        self.timeout = timeout
+        self._slots = asyncio.Semaphore(max(1, max_concurrency))
+        self._inflight = SingleFlight()
+        self.breaker = breaker or CircuitBreaker(
+            "gemini",
+            failure_threshold=settings.GEMINI_BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=settings.GEMINI_BREAKER_RESET_SECONDS,
+        )
+        if model is not None:
+            self.model = model
+            return
         api_key = settings.GEMINI_API_KEY
         if not api_key:
             print("Warning: GEMINI_API_KEY not found in settings.")
             self.model = None
         else:
+            # The SDK takes most of a second to import; only pay for it when it will be used
+            import google.generativeai as genai
+
             genai.configure(api_key=api_key)
-            self.model = genai.GenerativeModel('gemini-2.0-flash')
+            self.model = genai.GenerativeModel(GEMINI_MODEL_NAME)
 
     async def get_optimization_suggestions(self, architecture: Dict[str, Any], dataset_stats: Dict[str, Any], training_metrics: List[Dict[str, Any]] = None) -> Dict[str, Any]:
         if not self.model:
@@ -21,11 +85,28 @@ class GeminiService:
                 "analysis": "Please configure GEMINI_API_KEY to get AI suggestions."
             }
 
+        key = suggestion_key(architecture, dataset_stats, training_metrics, GEMINI_MODEL_NAME)
+        if self.cache is not None:
+            cached = await self.cache.get(key)
+            if cached is not None:
+                GEMINI_REQUESTS.inc(outcome="cache_hit")
+                return cached
+
         prompt = self._construct_optimization_prompt(architecture, dataset_stats, training_metrics)
         
         try:
-            response = await self.model.generate_content_async(prompt)
-            return self._parse_response(response.text)
+            # Identical prompts already in flight share one upstream call
+            result, shared = await self._inflight.do(key, lambda: self._generate(key, prompt))
+            if shared:
+                GEMINI_REQUESTS.inc(outcome="coalesced")
+                return copy.deepcopy(result)
+            return result
+        except CircuitOpenError:
+            return self._fallback("Gemini is temporarily unavailable; try again shortly.", architecture, dataset_stats, training_metrics)
+        except UpstreamBusyError:
+            return self._fallback("Too many suggestion requests in progress; try again shortly.", architecture, dataset_stats, training_metrics)
+        except asyncio.TimeoutError:
+            return self._fallback(f"Gemini did not answer within {self.timeout:g} seconds.", architecture, dataset_stats, training_metrics)
         except Exception as e:
             print(f"Error generating content: {e}")
             return {
@@ -34,15 +115,155 @@ class GeminiService:
                 "analysis": "Failed to generate suggestions."
             }
 
+    async def _acquire(self) -> None:
+        """Pass the circuit breaker and take a concurrency slot (raises CircuitOpenError/UpstreamBusyError)"""
+        if not self.breaker.allow():
+            GEMINI_REQUESTS.inc(outcome="circuit_open")
+            raise CircuitOpenError()
+
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            # Local queueing says nothing about upstream health; leave the breaker alone
+            GEMINI_REQUESTS.inc(outcome="saturated")
+            self.breaker.release_probe()
+            raise UpstreamBusyError()
+
+    def _record_failure(self, error: Exception) -> None:
+        GEMINI_REQUESTS.inc(outcome="timeout" if isinstance(error, asyncio.TimeoutError) else "error")
+        self.breaker.record_failure()
+
+    def _record_answer(self, result: Dict[str, Any]) -> bool:
+        """Count a completed upstream call; returns True if the answer may be cached"""
+        if result.get("error"):
+            # The model answered, but not in the requested schema: not a success, and not
+            # worth reusing for the cache TTL
+            GEMINI_REQUESTS.inc(outcome="invalid_response")
+            self.breaker.release_probe()
+            return False
+        GEMINI_REQUESTS.inc(outcome="success")
+        self.breaker.record_success()
+        return True
+
+    async def _generate(self, key: str, prompt: str) -> Dict[str, Any]:
+        """One guarded upstream call: circuit breaker, concurrency slot, deadline"""
+        await self._acquire()
+        start = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(
+                self.model.generate_content_async(prompt),
+                timeout=self.timeout
+            )
+            result = self._parse_response(response.text)
+        except Exception as e:
+            self._record_failure(e)
+            raise
+        finally:
+            self._slots.release()
+            GEMINI_LATENCY.observe(time.perf_counter() - start, mode="complete")
+
+        if self._record_answer(result) and self.cache is not None:
+            await self.cache.set(key, result)
+        return result
+
+    async def stream_optimization_suggestions(self, architecture: Dict[str, Any], dataset_stats: Dict[str, Any], training_metrics: List[Dict[str, Any]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream suggestions as the model produces them
+
+        Yields {"type": "analysis", "analysis"} and {"type": "suggestion", "suggestion"}
+        events as soon as each part of the answer is complete, then
+        {"type": "done", "cached"}; failures yield {"type": "error", "detail"}.
+        The deadline applies to the gap between chunks, so a long answer that
+        keeps streaming is not cut off.
+        """
+        if not self.model:
+            yield {"type": "error", "detail": "Gemini API key not configured"}
+            return
+
+        key = suggestion_key(architecture, dataset_stats, training_metrics, GEMINI_MODEL_NAME)
+        if self.cache is not None:
+            cached = await self.cache.get(key)
+            if cached is not None:
+                GEMINI_REQUESTS.inc(outcome="cache_hit")
+                yield {"type": "analysis", "analysis": cached.get("analysis", "")}
+                for suggestion in cached.get("suggestions", []):
+                    yield {"type": "suggestion", "suggestion": suggestion}
+                yield {"type": "done", "cached": True}
+                return
+
+        prompt = self._construct_optimization_prompt(architecture, dataset_stats, training_metrics)
+        try:
+            await self._acquire()
+        except CircuitOpenError:
+            yield {"type": "error", "detail": "Gemini is temporarily unavailable; try again shortly."}
+            return
+        except UpstreamBusyError:
+            yield {"type": "error", "detail": "Too many suggestion requests in progress; try again shortly."}
+            return
+
+        parser = SuggestionStreamParser()
+        settled = False
+        start = time.perf_counter()
+        first_chunk = True
+        try:
+            try:
+                response = await asyncio.wait_for(
+                    self.model.generate_content_async(prompt, stream=True),
+                    timeout=self.timeout
+                )
+                chunks = response.__aiter__()
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), timeout=self.timeout)
+                    except StopAsyncIteration:
+                        break
+                    if first_chunk:
+                        GEMINI_FIRST_CHUNK.observe(time.perf_counter() - start)
+                        first_chunk = False
+                    for kind, value in parser.feed(chunk.text):
+                        yield {"type": kind, kind: value}
+            except Exception as e:
+                self._record_failure(e)
+                settled = True
+                detail = f"Gemini did not answer within {self.timeout:g} seconds." if isinstance(e, asyncio.TimeoutError) else str(e)
+                print(f"Error streaming content: {detail}")
+                yield {"type": "error", "detail": detail}
+                return
+            # Whatever the incremental parser could not pick up (e.g. a non-JSON answer) comes from the full text
+            result = self._parse_response(parser.text)
+            cacheable = self._record_answer(result)
+            settled = True
+        finally:
+            self._slots.release()
+            if settled:
+                GEMINI_LATENCY.observe(time.perf_counter() - start, mode="stream")
+            else:
+                # The client went away mid-stream; that says nothing about upstream health
+                self.breaker.release_probe()
+
+        if parser.analysis is None:
+            yield {"type": "analysis", "analysis": result.get("analysis", "")}
+        for suggestion in result.get("suggestions", [])[len(parser.suggestions):]:
+            yield {"type": "suggestion", "suggestion": suggestion}
+        if cacheable and self.cache is not None:
+            await self.cache.set(key, result)
+        yield {"type": "done", "cached": False}
+
+    def _fallback(self, reason: str, architecture: Dict[str, Any], dataset_stats: Dict[str, Any], training_metrics: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Fast answer used while the upstream is unavailable"""
+        if self.fallback is not None:
+            result = self.fallback.analyze(architecture, dataset_stats, training_metrics)
+            result["error"] = reason
+            return result
+        return {
+            "error": reason,
+            "suggestions": [],
+            "analysis": "Failed to generate suggestions."
+        }
+
     def _construct_optimization_prompt(self, architecture: Dict[str, Any], dataset_stats: Dict[str, Any], training_metrics: List[Dict[str, Any]] = None) -> str:
-        nodes = architecture.get('nodes', [])
-        edges = architecture.get('edges', [])
-        
-        layers_desc = []
-        for node in nodes:
-            layer_type = node.get('data', {}).get('type', 'Unknown')
-            config = node.get('data', {}).get('config', {})
-            layers_desc.append(f"- {layer_type}: {config}")
+        # Repeated blocks collapsed, with output shapes and parameter counts
+        layers_desc = serialize_architecture(architecture, dataset_stats, settings.PROMPT_ARCHITECTURE_TOKEN_BUDGET)
 
         stats_desc = f"""
         Dataset Statistics:
@@ -67,8 +288,8 @@ class GeminiService:
         return f"""
         Act as an expert Deep Learning Engineer. Analyze the following neural network architecture and dataset statistics to provide optimization suggestions.
 
-        Architecture:
-        {chr(10).join(layers_desc)}
+        Architecture (layer → output shape, parameters; "N× [...]" is a block repeated N times):
+        {layers_desc}
 
         {stats_desc}
 
@@ -104,9 +325,23 @@ class GeminiService:
             text = re.sub(r'```json\s*', '', response_text)
             text = re.sub(r'```\s*', '', text)
             text = text.strip()
-            return json.loads(text)
+            result = json.loads(text)
+            if isinstance(result, dict):
+                return result
         except json.JSONDecodeError:
-            return {
-                "analysis": response_text,
-                "suggestions": []
-            }
+            pass
+        # Marked with "error" so it is neither cached nor counted as a success
+        return {
+            "error": "Gemini returned an answer that is not a JSON object",
+            "analysis": response_text,
+            "suggestions": []
+        }
+
+_gemini_service: Optional[GeminiService] = None
+
+def get_gemini_service() -> GeminiService:
+    """Shared service, built on first use (or warm-up) rather than at import"""
+    global _gemini_service
+    if _gemini_service is None:
+        _gemini_service = GeminiService(cache=suggestion_cache, fallback=architecture_analyzer)
+    return _gemini_service
@@ -0,0 +1,240 @@
+"""
+Execution backends for prediction-only inference
+
+`InferenceEngine` runs the eager PyTorch model with hooks on every layer so
+the UI can show activations. Requests that only need the prediction skip
+the hooks and run through an `InferenceBackend` instead: the eager model,
+a traced and frozen TorchScript module, a dynamically quantized model, or
+the version's exported ONNX graph on onnxruntime. Loaded backends are kept
+in an LRU keyed by artifact key (architecture hash + input shape). With
+several server workers, the eager and quantized backends use the shared
+memory-mapped weights; traced modules and ORT sessions copy them.
+"""
+import time
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional
+from starlette.concurrency import run_in_threadpool
+from backend.core.cache import LRUCache
+from backend.core.config import settings
+from backend.db.models import ModelVersion
+from backend.services.artifact_exporter import (
+    FORMAT_ONNX,
+    ONNX_INPUT_NAME,
+    artifact_exporter,
+    artifact_key,
+    build_eval_model,
+    example_input_shape,
+)
+from backend.services.inference_engine import INFERENCE_PHASE_SECONDS, prepare_input, summarize_output
+from backend.services.version_store import version_store
+
+if TYPE_CHECKING:
+    import numpy as np
+
+BACKEND_EAGER = "eager"
+BACKEND_TRACED = "traced"
+BACKEND_QUANTIZED = "quantized"
+BACKEND_ONNXRUNTIME = "onnxruntime"
+BACKENDS = (BACKEND_EAGER, BACKEND_TRACED, BACKEND_QUANTIZED, BACKEND_ONNXRUNTIME)
+
+Runner = Callable[..., Awaitable[Any]]
+
+class InferenceBackend(ABC):
+    """Runs a forward pass on a float32 batch and returns the output array"""
+
+    name = ""
+
+    @abstractmethod
+    def predict(self, input_array: "np.ndarray") -> "np.ndarray":
+        """Output array for `input_array` (blocking)"""
+
+class EagerBackend(InferenceBackend):
+    """PyTorch eager mode without layer hooks"""
+
+    name = BACKEND_EAGER
+
+    def __init__(self, model):
+        self.model = model
+
+    @classmethod
+    def from_architecture(cls, architecture: Dict[str, Any], input_shape: List[int], key: str) -> "EagerBackend":
+        return cls(build_eval_model(architecture, input_shape, key))
+
+    def predict(self, input_array: "np.ndarray") -> "np.ndarray":
+        import torch
+
+        with torch.inference_mode():
+            output = self.model(torch.from_numpy(input_array))
+        return output.detach().cpu().numpy()
+
+class TracedBackend(EagerBackend):
+    """TorchScript trace, frozen so Conv/BatchNorm pairs and constants are folded"""
+
+    name = BACKEND_TRACED
+
+    @classmethod
+    def from_architecture(cls, architecture: Dict[str, Any], input_shape: List[int], key: str) -> "TracedBackend":
+        import torch
+
+        model = build_eval_model(architecture, input_shape, key)
+        example = torch.zeros(*example_input_shape(input_shape))
+        with torch.no_grad():
+            traced = torch.jit.trace(model, example)
+            return cls(torch.jit.optimize_for_inference(torch.jit.freeze(traced)))
+
+class QuantizedBackend(EagerBackend):
+    """Dynamic int8 quantization of Linear layers (weights quantized ahead of time)"""
+
+    name = BACKEND_QUANTIZED
+
+    @classmethod
+    def from_architecture(cls, architecture: Dict[str, Any], input_shape: List[int], key: str) -> "QuantizedBackend":
+        import torch
+
+        model = build_eval_model(architecture, input_shape, key)
+        # In place: the default deep copy would turn shared (memory-mapped) weights into private ones.
+        # Only the Linear layers get new int8 weights; the rest keep the shared parameters.
+        return cls(torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True))
+
+# Backends built directly from the architecture
+TORCH_BACKENDS = {
+    BACKEND_EAGER: EagerBackend,
+    BACKEND_TRACED: TracedBackend,
+    BACKEND_QUANTIZED: QuantizedBackend,
+}
+
+def quantization_available() -> bool:
+    import torch
+
+    return any(engine != "none" for engine in torch.backends.quantized.supported_engines)
+
+def onnxruntime_available() -> bool:
+    try:
+        import onnxruntime  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+class OnnxRuntimeBackend(InferenceBackend):
+    """Exported ONNX graph on the onnxruntime CPU execution provider"""
+
+    name = BACKEND_ONNXRUNTIME
+
+    def __init__(
+        self,
+        model_path: str,
+        graph_optimization_level: str = "all",
+        intra_op_threads: int = 1,
+        inter_op_threads: int = 1,
+    ):
+        import onnxruntime as ort
+
+        levels = {
+            "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+            "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+            "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+            "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+        }
+        if graph_optimization_level not in levels:
+            raise ValueError(f"Unknown ORT graph optimization level: {graph_optimization_level!r}")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = levels[graph_optimization_level]
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = inter_op_threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        # Everything but the batch axis is fixed at export time
+        self.input_shape = list(self.session.get_inputs()[0].shape)
+
+    @classmethod
+    def from_settings(cls, model_path: str) -> "OnnxRuntimeBackend":
+        return cls(
+            model_path,
+            graph_optimization_level=settings.ORT_GRAPH_OPTIMIZATION_LEVEL,
+            intra_op_threads=settings.ORT_INTRA_OP_THREADS,
+            inter_op_threads=settings.ORT_INTER_OP_THREADS,
+        )
+
+    def predict(self, input_array: "np.ndarray") -> "np.ndarray":
+        import numpy as np
+
+        expected = self.input_shape[1:]
+        if list(input_array.shape[1:]) != expected:
+            raise ValueError(f"Input shape {list(input_array.shape)} does not match exported shape [batch, {', '.join(map(str, expected))}]")
+        return self.session.run(None, {ONNX_INPUT_NAME: np.ascontiguousarray(input_array)})[0]
+
+def available_backends() -> List[str]:
+    """Backends that can run in this environment"""
+    names = [BACKEND_EAGER, BACKEND_TRACED]
+    if quantization_available():
+        names.append(BACKEND_QUANTIZED)
+    if onnxruntime_available():
+        names.append(BACKEND_ONNXRUNTIME)
+    return names
+
+def run_prediction(
+    backend: InferenceBackend,
+    input_data: List[Any],
+    input_shape: Optional[List[int]] = None,
+) -> Dict[str, Any]:
+    """Prediction-only counterpart of `InferenceEngine.run_inference` (no layer outputs)"""
+    import numpy as np
+
+    start_time = time.time()
+    input_array = prepare_input(input_data, input_shape)
+    with INFERENCE_PHASE_SECONDS.time(phase="forward"):
+        output = backend.predict(input_array)
+    return {
+        **summarize_output(np.asarray(output)),
+        "layer_outputs": [],
+        "processing_time": time.time() - start_time,
+        "backend": backend.name,
+    }
+
+class BackendPool:
+    """LRU of loaded backends keyed by (artifact key, backend name)"""
+
+    def __init__(self, max_entries: int):
+        self._cache = LRUCache(max_entries, name="inference_backends")
+
+    def resolve_name(self, name: Optional[str]) -> str:
+        """Requested backend, or the configured default; falls back to eager when unavailable here"""
+        name = name or settings.INFERENCE_PREDICTION_BACKEND
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown inference backend '{name}'. Choose one of: {', '.join(BACKENDS)}")
+        if name not in available_backends():
+            return BACKEND_EAGER
+        return name
+
+    async def get(self, version: ModelVersion, name: str, run: Optional[Runner] = None) -> InferenceBackend:
+        """
+        Return a loaded backend for `version`
+
+        Args:
+            version: Model version to serve
+            name: One of BACKENDS (see `resolve_name`)
+            run: Coroutine function used to execute blocking loads
+                (defaults to the threadpool)
+        """
+        run = run or run_in_threadpool
+        key = artifact_key(await version_store.get_architecture_hash(version), version.input_shape)
+        cached = self._cache.get((key, name))
+        if cached is not None:
+            return cached
+
+        # Only misses are timed: a build is what this phase measures, not a cache lookup
+        with INFERENCE_PHASE_SECONDS.time(phase="model_build"):
+            if name == BACKEND_ONNXRUNTIME:
+                path = await artifact_exporter.get(version, FORMAT_ONNX, run=run)
+                backend = await run(OnnxRuntimeBackend.from_settings, str(path))
+            else:
+                await version_store.resolve(version)
+                loader = TORCH_BACKENDS[name].from_architecture
+                backend = await run(loader, version.architecture, list(version.input_shape), key)
+        self._cache.set((key, name), backend)
+        return backend
+
+    def stats(self):
+        return self._cache.stats()
+
+backend_pool = BackendPool(settings.INFERENCE_SESSION_CACHE_SIZE)
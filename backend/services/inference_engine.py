@@ -1,27 +1,101 @@
 """
 Inference engine for running models and extracting layer outputs
 """
-import torch
-import torch.nn as nn
-from typing import Dict, List, Any, Optional, Tuple
-import numpy as np
+from typing import TYPE_CHECKING, Dict, List, Any, Optional, Tuple
 import time
+from backend.core.metrics import Histogram
 from backend.db.models import ModelVersion
-from backend.services.model_builder import ModelBuilder
+
+# torch and numpy cost seconds to import; load them on first inference, not at app startup
+if TYPE_CHECKING:
+    import numpy as np
+    import torch
+    import torch.nn as nn
+
+INFERENCE_PHASE_SECONDS = Histogram(
+    "inference_phase_seconds",
+    "Time spent in each phase of an inference request",
+    # version_lookup, model_build, hook_capture, forward, stats, serialization
+    ("phase",),
+)
+
+def prepare_input(input_data: List[Any], input_shape: Optional[List[int]] = None) -> "np.ndarray":
+    """
+    Convert request input into a float32 batch array
+    
+    Args:
+        input_data: Flattened input data or nested list
+        input_shape: Optional shape to reshape input (e.g., [1, 3, 224, 224])
+    """
+    import numpy as np
+
+    input_array = np.array(input_data, dtype=np.float32)
+    
+    # Reshape if needed
+    if input_shape:
+        try:
+            input_array = input_array.reshape(input_shape)
+        except ValueError as e:
+            raise ValueError(f"Cannot reshape input to {input_shape}: {str(e)}")
+    
+    # Add batch dimension if needed
+    if input_array.ndim == 3:  # (C, H, W)
+        input_array = np.expand_dims(input_array, 0)
+    
+    return input_array
+
+def summarize_output(output_np: "np.ndarray") -> Dict[str, Any]:
+    """Flatten model output and derive class prediction for classifiers"""
+    import numpy as np
+
+    predicted_class = None
+    confidence = None
+    
+    # For classification: compute predicted class and confidence
+    if len(output_np.shape) == 2:  # Batch output
+        # Get probabilities if output looks like softmax (values between 0-1, sum ~1)
+        if output_np.shape[1] > 1:  # Multiple classes
+            # Apply softmax if not already applied
+            batch_output = output_np[0]  # First sample in batch
+            if np.max(batch_output) > 1.0 or np.sum(batch_output) < 0.99:
+                # Apply softmax
+                exp_output = np.exp(batch_output - np.max(batch_output))
+                probabilities = exp_output / exp_output.sum()
+            else:
+                probabilities = batch_output
+            
+            predicted_class = int(np.argmax(probabilities))
+            confidence = float(np.max(probabilities))
+    
+    return {
+        "output": output_np.flatten().tolist(),
+        "output_shape": list(output_np.shape),
+        "predicted_class": predicted_class,
+        "confidence": confidence,
+    }
 
 class InferenceEngine:
     """Engine for running inference and extracting layer-wise outputs"""
     
     def __init__(self, version: ModelVersion, device: str = 'cpu'):
+        import torch
+
         self.version = version
         self.model = None
         self.device = torch.device(device)
         self.hooks = []
         self.layer_outputs = []
+        # Time spent inside forward hooks during the current pass, and the part of it computing stats
+        self._hook_seconds = 0.0
+        self._stats_seconds = 0.0
         self._build_model()
     
     def _build_model(self) -> None:
         """Build PyTorch model from version architecture"""
+        from backend.services.artifact_exporter import artifact_key, build_eval_model
+        from backend.services.model_builder import ModelBuilder
+        from backend.services.version_store import architecture_hash
+
         try:
             # Pass input_shape to ModelBuilder so it can infer Linear sizes
             input_shape = None
@@ -31,41 +105,58 @@ class InferenceEngine:
             except Exception:
                 input_shape = None
 
-            builder = ModelBuilder(self.version.architecture, input_shape=input_shape)
-            self.model = builder.build()
-            self.model.to(self.device)
-            self.model.eval()  # Set to evaluation mode
+            with INFERENCE_PHASE_SECONDS.time(phase="model_build"):
+                if input_shape:
+                    # Same seeded weights as the prediction backends, memory-mapped from the
+                    # shared store when several workers run
+                    arch_hash = getattr(self.version, 'architecture_hash', None) or architecture_hash(self.version.architecture)
+                    key = artifact_key(arch_hash, input_shape)
+                    self.model = build_eval_model(self.version.architecture, input_shape, key)
+                else:
+                    builder = ModelBuilder(self.version.architecture, input_shape=input_shape)
+                    self.model = builder.build()
+                self.model.to(self.device)
+                self.model.eval()  # Set to evaluation mode
         except Exception as e:
             raise RuntimeError(f"Failed to build model: {str(e)}")
     
-    def _is_leaf_module(self, module: nn.Module) -> bool:
+    def _is_leaf_module(self, module: "nn.Module") -> bool:
         """Check if module is a leaf (no children)"""
         return len(list(module.children())) == 0
     
-    def _get_layer_type(self, module: nn.Module) -> str:
+    def _get_layer_type(self, module: "nn.Module") -> str:
         """Get the type name of a layer"""
         return module.__class__.__name__
     
-    def _compute_activation_stats(self, tensor: torch.Tensor) -> Dict[str, float]:
+    def _compute_activation_stats(self, tensor: "torch.Tensor") -> Dict[str, float]:
         """Compute statistics for a tensor"""
+        import numpy as np
+
+        start = time.perf_counter()
         data = tensor.detach().cpu().numpy().astype(np.float32)
-        return {
+        stats = {
             "min": float(np.min(data)),
             "max": float(np.max(data)),
             "mean": float(np.mean(data)),
             "std": float(np.std(data)),
             "median": float(np.median(data)),
         }
+        self._stats_seconds += time.perf_counter() - start
+        return stats
     
     def _register_hooks(self) -> None:
         """Register forward hooks on all leaf modules"""
         if not self.model:
             raise RuntimeError("Model not built")
+        import torch
         
         self.layer_outputs = []
+        self._hook_seconds = 0.0
+        self._stats_seconds = 0.0
         
         def create_hook(name: str, layer_type: str):
             def hook(module, input, output):
+                start = time.perf_counter()
                 # Handle various output types
                 if isinstance(output, torch.Tensor):
                     output_shape = list(output.shape)
@@ -89,6 +180,7 @@ class InferenceEngine:
                     "activation_stats": stats,
                     "output_data": output_data[:1000],  # Limit stored data
                 })
+                self._hook_seconds += time.perf_counter() - start
             return hook
         
         # Register hooks for leaf modules
@@ -119,67 +211,40 @@ class InferenceEngine:
         Returns:
             Dict containing model output, layer outputs, and timing info
         """
+        import torch
+
         start_time = time.time()
         
         try:
             # Register hooks before inference
+            register_start = time.perf_counter()
             self._register_hooks()
+            register_seconds = time.perf_counter() - register_start
             
-            # Convert input to tensor
-            input_array = np.array(input_data, dtype=np.float32)
-            
-            # Reshape if needed
-            if input_shape:
-                try:
-                    input_array = input_array.reshape(input_shape)
-                except ValueError as e:
-                    raise ValueError(f"Cannot reshape input to {input_shape}: {str(e)}")
-            
-            # Add batch dimension if needed
-            if input_array.ndim == 3:  # (C, H, W)
-                input_array = np.expand_dims(input_array, 0)
-            
-            input_tensor = torch.from_numpy(input_array).to(self.device)
+            input_tensor = torch.from_numpy(prepare_input(input_data, input_shape)).to(self.device)
             
             # Run forward pass
+            forward_start = time.perf_counter()
             with torch.no_grad():
                 output = self.model(input_tensor)
-            
-            # Convert output to numpy
-            predicted_class = None
-            confidence = None
+            forward_seconds = time.perf_counter() - forward_start
+
+            # Hooks run inside the forward pass; report the model's own compute separately
+            INFERENCE_PHASE_SECONDS.observe(forward_seconds - self._hook_seconds, phase="forward")
+            INFERENCE_PHASE_SECONDS.observe(register_seconds + self._hook_seconds - self._stats_seconds, phase="hook_capture")
+            INFERENCE_PHASE_SECONDS.observe(self._stats_seconds, phase="stats")
             
             if isinstance(output, torch.Tensor):
-                output_np = output.detach().cpu().numpy()
-                output_list = output_np.flatten().tolist()
-                
-                # For classification: compute predicted class and confidence
-                if len(output_np.shape) == 2:  # Batch output
-                    # Get probabilities if output looks like softmax (values between 0-1, sum ~1)
-                    if output_np.shape[1] > 1:  # Multiple classes
-                        # Apply softmax if not already applied
-                        batch_output = output_np[0]  # First sample in batch
-                        if np.max(batch_output) > 1.0 or np.sum(batch_output) < 0.99:
-                            # Apply softmax
-                            exp_output = np.exp(batch_output - np.max(batch_output))
-                            probabilities = exp_output / exp_output.sum()
-                        else:
-                            probabilities = batch_output
-                        
-                        predicted_class = int(np.argmax(probabilities))
-                        confidence = float(np.max(probabilities))
+                summary = summarize_output(output.detach().cpu().numpy())
             else:
-                output_list = []
+                summary = {"output": [], "output_shape": [], "predicted_class": None, "confidence": None}
             
             processing_time = time.time() - start_time
             
             return {
-                "output": output_list,
+                **summary,
                 "layer_outputs": self.layer_outputs,
                 "processing_time": processing_time,
-                "output_shape": list(output.shape) if isinstance(output, torch.Tensor) else [],
-                "predicted_class": predicted_class,
-                "confidence": confidence,
             }
         
         except Exception as e:
@@ -0,0 +1,250 @@
+"""
+Weighted fair scheduling of inference work across users
+
+Blocking model work (building, forward passes) runs on a small thread pool.
+Instead of feeding that pool first-come-first-served, jobs wait in per-user
+queues that are drained with deficit round robin (DRR), so one user's batch
+job cannot starve everybody else. Jobs are also split into priority classes:
+interactive single-input requests are always served before batch and
+profiling work.
+"""
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional
+from backend.core.config import settings
+from backend.core.metrics import EXECUTOR_QUEUE_DEPTH, EXECUTOR_RUNNING
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BATCH = "batch"
+PRIORITY_PROFILING = "profiling"
+
+# Lower level is served first
+PRIORITY_LEVELS = {
+    PRIORITY_INTERACTIVE: 0,
+    PRIORITY_BATCH: 1,
+    PRIORITY_PROFILING: 1,
+}
+
+class SchedulerQueueFull(Exception):
+    """Raised when a tenant already has too many queued jobs"""
+
+class SchedulerShutdown(Exception):
+    """Raised for jobs submitted after, or still queued at, shutdown"""
+
+class _Job:
+    __slots__ = ("tenant", "level", "cost", "func", "args", "future", "enqueued_at")
+
+    def __init__(self, tenant: str, level: int, cost: float, func: Callable, args: tuple, future: asyncio.Future):
+        self.tenant = tenant
+        self.level = level
+        self.cost = cost
+        self.func = func
+        self.args = args
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+class _TenantStats:
+    __slots__ = ("queued", "served", "total_wait", "max_wait", "last_active")
+
+    def __init__(self):
+        self.queued = 0
+        self.served = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.last_active = time.monotonic()
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "queued": self.queued,
+            "served": self.served,
+            "avg_wait_ms": (self.total_wait / self.served * 1000) if self.served else 0.0,
+            "max_wait_ms": self.max_wait * 1000,
+        }
+
+class FairScheduler:
+    """Deficit round robin over per-tenant queues with strict priority classes"""
+
+    def __init__(
+        self,
+        workers: int,
+        quantum: float = 1.0,
+        weights: Optional[Dict[str, float]] = None,
+        max_queue_per_tenant: int = 32,
+        stats_idle_seconds: float = 600.0,
+    ):
+        self.workers = max(1, workers)
+        self.quantum = quantum
+        self.weights = dict(weights or {})
+        self.max_queue_per_tenant = max_queue_per_tenant
+        self.stats_idle_seconds = stats_idle_seconds
+        levels = max(PRIORITY_LEVELS.values()) + 1
+        self._queues: List[Dict[str, Deque[_Job]]] = [{} for _ in range(levels)]
+        self._active: List[Deque[str]] = [deque() for _ in range(levels)]
+        self._deficit: List[Dict[str, float]] = [{} for _ in range(levels)]
+        self._turn_open = [False] * levels
+        self._stats: Dict[str, _TenantStats] = {}
+        self._next_prune = time.monotonic() + stats_idle_seconds
+        self._running = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Optional[asyncio.Semaphore] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self._closed = False
+
+    def _weight(self, tenant: str) -> float:
+        return max(self.weights.get(tenant, 1.0), 1e-3)
+
+    def _ensure_started(self) -> None:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+            self._pending = asyncio.Semaphore(0)
+            self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def submit(
+        self,
+        tenant: str,
+        func: Callable,
+        *args: Any,
+        priority: str = PRIORITY_INTERACTIVE,
+        cost: float = 1.0,
+    ) -> Any:
+        """Queue `func(*args)` for `tenant` and wait for its result"""
+        if self._closed:
+            raise SchedulerShutdown("The server is shutting down")
+        self._ensure_started()
+        level = PRIORITY_LEVELS[priority]
+        stats = self._stats.get(tenant)
+        if stats is None:
+            self._prune_stats()
+            stats = self._stats[tenant] = _TenantStats()
+        stats.last_active = time.monotonic()
+        if stats.queued >= self.max_queue_per_tenant:
+            raise SchedulerQueueFull(f"Too many queued jobs for {tenant}")
+
+        job = _Job(tenant, level, max(cost, 1e-3), func, args, asyncio.get_running_loop().create_future())
+        queues = self._queues[level]
+        if tenant not in queues:
+            queues[tenant] = deque()
+            self._active[level].append(tenant)
+            self._deficit[level][tenant] = 0.0
+        queues[tenant].append(job)
+        stats.queued += 1
+        self._pending.release()
+        return await job.future
+
+    def _pick(self) -> Optional[_Job]:
+        for level, active in enumerate(self._active):
+            queues = self._queues[level]
+            deficits = self._deficit[level]
+            while active:
+                tenant = active[0]
+                if not self._turn_open[level]:
+                    deficits[tenant] += self.quantum * self._weight(tenant)
+                    self._turn_open[level] = True
+                queue = queues[tenant]
+                job = queue[0]
+                if deficits[tenant] >= job.cost:
+                    deficits[tenant] -= job.cost
+                    queue.popleft()
+                    if not queue:
+                        # Idle tenants do not bank credit
+                        active.popleft()
+                        del queues[tenant]
+                        del deficits[tenant]
+                        self._turn_open[level] = False
+                    return job
+                active.rotate(-1)
+                self._turn_open[level] = False
+        return None
+
+    async def _worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._pending.acquire()
+            job = self._pick()
+            if job is None:
+                continue
+            stats = self._stats[job.tenant]
+            stats.queued -= 1
+            if job.future.cancelled():
+                continue
+            stats.last_active = time.monotonic()
+            wait = stats.last_active - job.enqueued_at
+            stats.served += 1
+            stats.total_wait += wait
+            stats.max_wait = max(stats.max_wait, wait)
+
+            self._running += 1
+            try:
+                result = await loop.run_in_executor(self._executor, job.func, *job.args)
+            except asyncio.CancelledError:
+                # Shutdown; the caller would otherwise wait for a result nobody delivers
+                if not job.future.done():
+                    job.future.set_exception(SchedulerShutdown("The server is shutting down"))
+                raise
+            except Exception as e:
+                if not job.future.cancelled():
+                    job.future.set_exception(e)
+            else:
+                if not job.future.cancelled():
+                    job.future.set_result(result)
+            finally:
+                self._running -= 1
+
+    def _prune_stats(self) -> None:
+        """Forget tenants with nothing queued that have been idle for `stats_idle_seconds`"""
+        # Every client key (including per-IP anonymous ones) gets an entry; sweep at most
+        # once per idle interval so adding a tenant stays O(1) amortized
+        now = time.monotonic()
+        if now < self._next_prune:
+            return
+        self._next_prune = now + self.stats_idle_seconds
+        idle = [
+            tenant for tenant, stats in self._stats.items()
+            if stats.queued == 0 and now - stats.last_active >= self.stats_idle_seconds
+        ]
+        for tenant in idle:
+            del self._stats[tenant]
+
+    def queue_depth(self) -> int:
+        return sum(len(q) for queues in self._queues for q in queues.values())
+
+    def stats(self, tenant: Optional[str] = None) -> Dict[str, Any]:
+        """Queue depth and per-tenant wait statistics"""
+        tenants = self._stats if tenant is None else {tenant: self._stats.get(tenant, _TenantStats())}
+        return {
+            "workers": self.workers,
+            "running": self._running,
+            "queued": self.queue_depth(),
+            "tenants": {name: s.as_dict() for name, s in tenants.items()},
+        }
+
+    async def shutdown(self) -> None:
+        """Stop the workers and fail every queued job with SchedulerShutdown"""
+        self._closed = True
+        for task in self._worker_tasks:
+            task.cancel()
+        self._worker_tasks = []
+        for level, queues in enumerate(self._queues):
+            for tenant, jobs in queues.items():
+                self._stats[tenant].queued -= len(jobs)
+                for job in jobs:
+                    if not job.future.done():
+                        job.future.set_exception(SchedulerShutdown("The server is shutting down"))
+            queues.clear()
+            self._active[level].clear()
+            self._deficit[level].clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+inference_scheduler = FairScheduler(
+    settings.INFERENCE_WORKERS,
+    quantum=settings.SCHEDULER_QUANTUM,
+    weights=settings.SCHEDULER_TENANT_WEIGHTS,
+    max_queue_per_tenant=settings.SCHEDULER_MAX_QUEUE_PER_TENANT,
+    stats_idle_seconds=settings.SCHEDULER_STATS_IDLE_SECONDS,
+)
+EXECUTOR_QUEUE_DEPTH.set_function(inference_scheduler.queue_depth, executor="inference")
+EXECUTOR_RUNNING.set_function(lambda: inference_scheduler._running, executor="inference")
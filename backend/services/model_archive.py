@@ -0,0 +1,118 @@
+"""
+Streaming zip archive of every version of a model
+
+The archive is produced while it is sent: versions are read through an
+async cursor, each delta is applied once against the previous version,
+and zip bytes are handed to the response as soon as each entry is
+written. zipfile writes to an unseekable sink (sizes go in data
+descriptors), so memory stays bounded by one entry's chunk however many
+versions the model has.
+"""
+import io
+import json
+import zipfile
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+from backend.db.models import Model, ModelVersion
+from backend.services.artifact_exporter import FORMAT_TORCHSCRIPT, artifact_exporter
+from backend.services.code_cache import code_cache
+from backend.services.version_store import version_store
+
+Runner = Callable[..., Awaitable[Any]]
+
+FILE_CHUNK_SIZE = 64 * 1024
+
+class _StreamSink(io.RawIOBase):
+    """Write-only, unseekable buffer drained after every zip write"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def _entry(name: str, version: ModelVersion) -> zipfile.ZipInfo:
+    info = zipfile.ZipInfo(name, date_time=version.created_at.timetuple()[:6])
+    info.compress_type = zipfile.ZIP_DEFLATED
+    return info
+
+def _version_metadata(version: ModelVersion) -> Dict[str, Any]:
+    return {
+        "id": str(version.id),
+        "version_number": version.version_number,
+        "input_shape": version.input_shape,
+        "output_shape": version.output_shape,
+        "class_labels": version.class_labels,
+        "notes": version.notes,
+        "created_at": version.created_at.isoformat(),
+    }
+
+async def iter_model_archive(
+    model: Model,
+    include_torchscript: bool = False,
+    run: Optional[Runner] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Yield a zip archive with generated code for every version of `model`
+
+    Layout: v{n}/model.py and v{n}/version.json per version, plus
+    v{n}/model.pt when `include_torchscript` is set. A version whose
+    TorchScript build fails gets v{n}/model.pt.error.txt instead, since the
+    response has already started.
+
+    Args:
+        model: Model whose versions are archived
+        include_torchscript: Also add traced TorchScript modules
+        run: Coroutine function used to execute blocking artifact builds
+    """
+    sink = _StreamSink()
+    archive = zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED)
+    previous = None
+
+    async for version in ModelVersion.find(
+        ModelVersion.model_id == model.id
+    ).sort(+ModelVersion.version_number):
+        await version_store.resolve_after(version, previous)
+        folder = f"v{version.version_number}"
+
+        code = await code_cache.get(version, model.name)
+        archive.writestr(_entry(f"{folder}/model.py", version), code.data)
+        archive.writestr(
+            _entry(f"{folder}/version.json", version),
+            json.dumps(_version_metadata(version), indent=2),
+        )
+        yield sink.drain()
+
+        if include_torchscript:
+            try:
+                path = await artifact_exporter.get(version, FORMAT_TORCHSCRIPT, run=run)
+                # Opened before the zip entry starts: the file may have been pruned since,
+                # and an open descriptor stays readable even if it is pruned later
+                source = open(path, "rb")
+            except Exception as e:
+                archive.writestr(_entry(f"{folder}/model.pt.error.txt", version), str(e))
+            else:
+                with source, archive.open(_entry(f"{folder}/model.pt", version), mode="w") as target:
+                    while True:
+                        chunk = source.read(FILE_CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        target.write(chunk)
+                        data = sink.drain()
+                        if data:
+                            yield data
+            yield sink.drain()
+
+        previous = version
+
+    archive.close()
+    yield sink.drain()
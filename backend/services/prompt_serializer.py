@@ -0,0 +1,152 @@
+"""
+Compact architecture description for LLM prompts
+
+Each layer becomes a short signature (`Conv2d(64,3x3,s2,p1)`, `BN`,
+`ReLU`), runs of identical blocks are collapsed
+(`3× [Conv2d(64,3x3,p1) → BN → ReLU]`), and every line carries the
+derived output shape and parameter count, so the model sees the
+information it needs instead of raw config dicts. The text is kept under
+a token budget by dropping detail in stages and, as a last resort,
+eliding the middle of the network.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from backend.services.architecture_analyzer import LayerInfo, infer_layers, input_shape_from_stats
+from backend.services.architecture_utils import architecture_layers
+
+# Rough characters per token for English/code text
+CHARS_PER_TOKEN = 4
+# Longest block (in layers) considered for run-length collapsing
+MAX_BLOCK_LENGTH = 8
+
+SHORT_NAMES = {
+    "BatchNorm2d": "BN",
+    "AdaptiveAvgPool2d": "GAP",
+    "Dense": "Linear",
+}
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def _format_count(count: int) -> str:
+    if count >= 1_000_000:
+        return f"{count / 1_000_000:.1f}M"
+    if count >= 1_000:
+        return f"{count / 1_000:.1f}K"
+    return str(count)
+
+def _shape(shape: Tuple[int, ...]) -> str:
+    return "x".join(str(dim) for dim in shape)
+
+def layer_signature(layer: LayerInfo) -> str:
+    """Short description of a layer's own settings (input-independent, so repeats match)"""
+    params = layer.params
+    name = SHORT_NAMES.get(layer.type, layer.type)
+
+    def get(key, default):
+        value = params.get(key, default)
+        if isinstance(value, (list, tuple)) and value:
+            value = value[0]
+        return value
+
+    if layer.type in ("Conv2d", "ConvBNReLU", "ConvBNLeakyReLU", "ResidualBlock"):
+        kernel = get("kernel_size", 3)
+        parts = [str(layer.output_shape[0]) if layer.output_shape else str(get("out_channels", 64)), f"{kernel}x{kernel}"]
+        if str(get("stride", 1)) != "1":
+            parts.append(f"s{get('stride', 1)}")
+        if str(get("padding", 0)) != "0":
+            parts.append(f"p{get('padding', 0)}")
+        return f"{name}({','.join(parts)})"
+    if layer.type in ("MaxPool2d", "AvgPool2d"):
+        kernel, stride = get("kernel_size", 2), get("stride", 2)
+        return f"{name}({kernel})" if str(kernel) == str(stride) else f"{name}({kernel},s{stride})"
+    if layer.type in ("Linear", "Dense"):
+        return f"{name}({layer.output_shape[0]})"
+    if layer.type == "Dropout":
+        return f"Dropout({get('p', 0.5)})"
+    if layer.type in ("LeakyReLU", "ELU") and params:
+        value = next(iter(params.values()))
+        return f"{name}({value})"
+    return name
+
+def collapse_runs(signatures: List[str], max_block: int = MAX_BLOCK_LENGTH) -> List[Tuple[int, int, int]]:
+    """
+    Greedy run-length encoding of repeated blocks
+
+    Returns (start, block_length, repeats) groups covering `signatures` in
+    order; at each position the block that removes the most layers wins.
+    """
+    groups = []
+    i = 0
+    while i < len(signatures):
+        best = (1, 1)
+        for length in range(1, min(max_block, (len(signatures) - i) // 2) + 1):
+            block = signatures[i:i + length]
+            repeats = 1
+            while signatures[i + repeats * length:i + (repeats + 1) * length] == block:
+                repeats += 1
+            if repeats > 1 and length * (repeats - 1) > best[0] * (best[1] - 1):
+                best = (length, repeats)
+        groups.append((i, best[0], best[1]))
+        i += best[0] * best[1]
+    return groups
+
+def _lines(layers: List[LayerInfo], groups, with_params: bool, with_shapes: bool) -> List[str]:
+    signatures = [layer_signature(layer) for layer in layers]
+    lines = []
+    for start, length, repeats in groups:
+        block = " → ".join(signatures[start:start + length])
+        if repeats > 1:
+            block = f"{repeats}× [{block}]" if length > 1 else f"{repeats}× {block}"
+        end = start + length * repeats
+        details = []
+        if with_shapes:
+            details.append(_shape(layers[end - 1].output_shape))
+        if with_params:
+            count = sum(layer.parameters for layer in layers[start:end])
+            if count:
+                details.append(f"{_format_count(count)} params")
+        lines.append(f"- {block}" + (f" → {', '.join(details)}" if details else ""))
+    return lines
+
+def serialize_architecture(
+    architecture: Dict[str, Any],
+    dataset_stats: Optional[Dict[str, Any]] = None,
+    token_budget: Optional[int] = None,
+) -> str:
+    """
+    Compact, canonical text for the architecture, within `token_budget`
+
+    Detail is dropped in stages until the text fits: per-line parameter
+    counts first, then shapes, then the middle lines of the network.
+    """
+    input_shape = input_shape_from_stats(dataset_stats or {})
+    layers = infer_layers(architecture_layers(architecture or {}), input_shape)
+    if not layers:
+        return "(no layers)"
+
+    total = sum(layer.parameters for layer in layers)
+    header = (
+        f"Input {_shape(input_shape)}, {len(layers)} layers, {_format_count(total)} params, "
+        f"output {_shape(layers[-1].output_shape)}"
+    )
+    groups = collapse_runs([layer_signature(layer) for layer in layers])
+
+    for with_params, with_shapes in ((True, True), (False, True), (False, False)):
+        text = "\n".join([header] + _lines(layers, groups, with_params, with_shapes))
+        if token_budget is None or estimate_tokens(text) <= token_budget:
+            return text
+
+    # Keep the stem and the head, where most design problems show, and elide the middle
+    lines = _lines(layers, groups, False, True)
+    keep_head, keep_tail = len(lines) // 2, len(lines) - len(lines) // 2
+    while keep_head + keep_tail > 2:
+        if keep_head >= keep_tail:
+            keep_head -= 1
+        else:
+            keep_tail -= 1
+        omitted = len(lines) - keep_head - keep_tail
+        kept = lines[:keep_head] + [f"- … {omitted} lines omitted …"] + lines[len(lines) - keep_tail:]
+        text = "\n".join([header] + kept)
+        if estimate_tokens(text) <= token_budget:
+            return text
+    return text
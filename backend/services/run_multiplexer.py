@@ -0,0 +1,132 @@
+"""
+Many simulation/training runs over one connection
+
+`RunMultiplexer` drives any number of metric streams (the same async
+iterators the SSE endpoints use) and forwards their output through a
+single `send` coroutine, the connection's only writer. Runs never write
+to the connection themselves: they append to a per-run pending list and
+one sender task flushes whatever has accumulated. A slow client therefore receives fewer, larger
+messages instead of stalling the runs; at most `max_pending` epochs are
+kept per run, and older ones are dropped (and counted in the message) if
+the client falls further behind. Heartbeats keep idle connections alive. Closing the multiplexer
+(e.g. on disconnect) cancels every run, which closes its stream and stops
+the underlying work.
+"""
+import asyncio
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional
+
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+class RunMultiplexer:
+    """Runs metric streams concurrently and coalesces their updates into one sender"""
+
+    def __init__(self, send: Send, heartbeat_interval: float = 15.0, max_runs: int = 8, max_pending: int = 256):
+        self.send = send
+        self.heartbeat_interval = heartbeat_interval
+        self.max_runs = max_runs
+        self.max_pending = max(1, max_pending)
+        self._runs: Dict[str, asyncio.Task] = {}
+        # run id -> latest metrics not yet sent (bounded), and terminal messages queued behind them
+        self._pending: Dict[str, Deque[Dict[str, Any]]] = {}
+        # run id -> epochs dropped from a full pending buffer since the last flush
+        self._skipped: Dict[str, int] = {}
+        self._final: List[Dict[str, Any]] = []
+        self._dirty = asyncio.Event()
+        self._sender: Optional[asyncio.Task] = None
+
+    @property
+    def active_runs(self) -> List[str]:
+        return list(self._runs)
+
+    def check_available(self, run_id: str) -> None:
+        """Raise ValueError if `run_id` is taken or the run limit is reached"""
+        if run_id in self._runs:
+            raise ValueError(f"Run '{run_id}' is already active")
+        if len(self._runs) >= self.max_runs:
+            raise ValueError(f"At most {self.max_runs} concurrent runs per connection")
+
+    def start(self, run_id: str, stream: AsyncIterator[Dict[str, Any]]) -> None:
+        """Start forwarding `stream` under `run_id`"""
+        self.check_available(run_id)
+        self._runs[run_id] = asyncio.create_task(self._forward(run_id, stream))
+
+    def cancel(self, run_id: str) -> bool:
+        """Cancel a run; returns False if it is not active"""
+        task = self._runs.get(run_id)
+        if task is None:
+            return False
+        task.cancel()
+        return True
+
+    def post(self, message: Dict[str, Any]) -> None:
+        """Queue a message for the client behind any pending metrics"""
+        self._final.append(message)
+        self._dirty.set()
+
+    async def _forward(self, run_id: str, stream: AsyncIterator[Dict[str, Any]]) -> None:
+        try:
+            outcome = {"type": "done", "id": run_id}
+            async for metrics in stream:
+                if "type" in metrics:
+                    # A terminal event (e.g. {"type": "stopped", "reason"}) replaces "done"
+                    outcome = {**metrics, "id": run_id}
+                    break
+                pending = self._pending.setdefault(run_id, deque(maxlen=self.max_pending))
+                if len(pending) == self.max_pending:
+                    self._skipped[run_id] = self._skipped.get(run_id, 0) + 1
+                pending.append(metrics)
+                self._dirty.set()
+        except asyncio.CancelledError:
+            self.post({"type": "cancelled", "id": run_id})
+            # Let close() and the event loop see the cancellation
+            raise
+        except Exception as e:
+            outcome = {"type": "error", "id": run_id, "detail": str(e)}
+        finally:
+            # Closing the stream is what stops a real training job
+            aclose = getattr(stream, "aclose", None)
+            if aclose is not None:
+                await aclose()
+            self._runs.pop(run_id, None)
+        self.post(outcome)
+
+    async def _flush(self) -> None:
+        pending, self._pending = self._pending, {}
+        skipped, self._skipped = self._skipped, {}
+        final, self._final = self._final, []
+        for run_id, metrics in pending.items():
+            message = {"type": "metrics", "id": run_id, "data": list(metrics)}
+            if run_id in skipped:
+                message["skipped"] = skipped[run_id]
+            await self.send(message)
+        for message in final:
+            await self.send(message)
+
+    async def _send_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._dirty.wait(), timeout=self.heartbeat_interval)
+            except asyncio.TimeoutError:
+                await self.send({"type": "heartbeat", "active": self.active_runs})
+                continue
+            self._dirty.clear()
+            await self._flush()
+
+    async def __aenter__(self) -> "RunMultiplexer":
+        self._sender = asyncio.create_task(self._send_loop())
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Cancel every run and stop the sender"""
+        tasks = list(self._runs.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._sender is not None:
+            self._sender.cancel()
+            await asyncio.gather(self._sender, return_exceptions=True)
+            self._sender = None
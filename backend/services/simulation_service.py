@@ -1,20 +1,18 @@
 import math
-import random
 import asyncio
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
+from backend.core.config import settings
+from backend.services.synthetic_data import AUGMENTATION_TYPES
+
+# Delivery rate of the paced (demo) mode
+PACED_EPOCHS_PER_SECOND = 10.0
 
 class SimulationService:
     def __init__(self):
         pass
 
-    async def simulate_training(self, architecture: Dict[str, Any], dataset_stats: Dict[str, Any], training_config: Dict[str, Any]):
-        """
-        Generator that yields training metrics for each epoch.
-        """
-        epochs = training_config.get('epochs', 50)
-        batch_size = training_config.get('batch_size', 32)
-        learning_rate = training_config.get('learning_rate', 0.001)
-        
+    def _base_loss(self, architecture: Dict[str, Any], dataset_stats: Dict[str, Any]) -> Tuple[float, float]:
+        """Starting loss and architecture complexity used to shape the curves"""
         nodes = architecture.get('nodes', [])
         num_layers = len(nodes)
         
@@ -38,35 +36,97 @@ class SimulationService:
             
             if dataset_stats.get('augmentation'):
                 base_loss *= 0.92
+        
+        return base_loss, complexity
 
-        for epoch in range(epochs):
-            progress = (epoch + 1) / epochs
-            noise_decay = math.exp(-progress * 3)
-            
-            # Training loss
-            train_loss = base_loss * math.exp(-progress * 4) * (0.8 + random.random() * noise_decay * 0.4)
-            
-            # Validation loss
-            overfitting_factor = 1 + max(0, progress - 0.7) * 0.5
-            val_loss = train_loss * overfitting_factor * (0.95 + random.random() * 0.1)
-            
-            # Accuracy
-            max_train_acc = min(0.99, 0.5 + progress * 0.5 * math.sqrt(1 / complexity))
-            train_acc = max_train_acc * (0.9 + random.random() * 0.1 * noise_decay)
-            
-            max_val_acc = max_train_acc * (0.98 - max(0, progress - 0.7) * 0.1)
-            val_acc = max_val_acc * (0.95 + random.random() * 0.05 * noise_decay)
-            
-            metrics = {
-                "epoch": epoch + 1,
-                "trainLoss": max(0.01, train_loss),
-                "valLoss": max(0.01, val_loss),
-                "trainAcc": min(1, train_acc),
-                "valAcc": min(1, val_acc)
-            }
-            
-            yield metrics
-            await asyncio.sleep(0.1)  # Simulate processing time
+    def check_config(self, training_config: Dict[str, Any]) -> int:
+        """Validate a training config without computing curves; returns its epoch count"""
+        epochs = int(training_config.get('epochs', 50))
+        if epochs > settings.SIMULATION_MAX_EPOCHS:
+            raise ValueError(f"epochs must be at most {settings.SIMULATION_MAX_EPOCHS}")
+        return epochs
+
+    def simulate_curves(
+        self,
+        architecture: Dict[str, Any],
+        dataset_stats: Dict[str, Any],
+        training_config: Dict[str, Any],
+        seed: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Compute metrics for every epoch at once (vectorized over epochs).
+        
+        The same `seed` always produces the same curves.
+        """
+        import numpy as np
+
+        epochs = self.check_config(training_config)
+        if epochs <= 0:
+            return []
+        
+        base_loss, complexity = self._base_loss(architecture, dataset_stats)
+        rng = np.random.default_rng(seed)
+        r_train, r_val, r_train_acc, r_val_acc = rng.random((4, epochs))
+        
+        progress = np.arange(1, epochs + 1) / epochs
+        noise_decay = np.exp(-progress * 3)
+        late = np.maximum(0, progress - 0.7)
+        
+        # Training loss
+        train_loss = base_loss * np.exp(-progress * 4) * (0.8 + r_train * noise_decay * 0.4)
+        
+        # Validation loss
+        val_loss = train_loss * (1 + late * 0.5) * (0.95 + r_val * 0.1)
+        
+        # Accuracy (a single-layer network has zero complexity; cap its capacity term)
+        capacity = math.sqrt(1 / complexity) if complexity > 0 else math.inf
+        max_train_acc = np.minimum(0.99, 0.5 + progress * 0.5 * capacity)
+        train_acc = max_train_acc * (0.9 + r_train_acc * 0.1 * noise_decay)
+        
+        max_val_acc = max_train_acc * (0.98 - late * 0.1)
+        val_acc = max_val_acc * (0.95 + r_val_acc * 0.05 * noise_decay)
+        
+        columns = zip(
+            range(1, epochs + 1),
+            np.maximum(0.01, train_loss).tolist(),
+            np.maximum(0.01, val_loss).tolist(),
+            np.minimum(1, train_acc).tolist(),
+            np.minimum(1, val_acc).tolist(),
+        )
+        return [
+            {"epoch": epoch, "trainLoss": tl, "valLoss": vl, "trainAcc": ta, "valAcc": va}
+            for epoch, tl, vl, ta, va in columns
+        ]
+
+    async def pace(self, metrics: List[Dict[str, Any]], epochs_per_second: Optional[float] = None):
+        """
+        Yield precomputed epoch metrics at `epochs_per_second`
+        (None or 0 yields everything without waiting).
+        """
+        interval = 1 / epochs_per_second if epochs_per_second else 0.0
+        loop = asyncio.get_running_loop()
+        next_at = loop.time()
+        for epoch_metrics in metrics:
+            yield epoch_metrics
+            if interval:
+                # Schedule against a fixed timeline so per-epoch work does not add drift
+                next_at += interval
+                await asyncio.sleep(max(0.0, next_at - loop.time()))
+
+    async def simulate_training(
+        self,
+        architecture: Dict[str, Any],
+        dataset_stats: Dict[str, Any],
+        training_config: Dict[str, Any],
+        seed: Optional[int] = None,
+        epochs_per_second: Optional[float] = PACED_EPOCHS_PER_SECOND,
+    ):
+        """
+        Generator that yields training metrics for each epoch.
+        """
+        metrics = self.simulate_curves(architecture, dataset_stats, training_config, seed)
+        async for epoch_metrics in self.pace(metrics, epochs_per_second):
+            yield epoch_metrics
 
     def generate_synthetic_batch(self, dataset_stats: Dict[str, Any], batch_size: int) -> Dict[str, Any]:
         """
@@ -93,5 +153,5 @@ class SimulationService:
             "channels": dataset_stats.get('channels', 3),
             "batchSize": batch_size,
             "classes": classes_in_batch,
-            "augmentationTypes": ['Rotation', 'Zoom', 'Flip', 'Color Shift'] if dataset_stats.get('augmentation') else []
+            "augmentationTypes": AUGMENTATION_TYPES if dataset_stats.get('augmentation') else []
         }
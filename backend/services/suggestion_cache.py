@@ -0,0 +1,158 @@
+"""
+Cache of optimization suggestions keyed by their prompt inputs
+
+Identical architecture, dataset statistics and final training metrics
+produce the same prompt, so the model's answer is reused instead of
+paying seconds for another remote call. Keys are a hash of a canonical
+form of those inputs built from the same layer list as the prompt, so
+editor-only fields (node ids, positions, selection state) are dropped and
+moving a node on the canvas does not miss the cache. Entries expire after
+a TTL; an optional disk tier keeps them across restarts and processes.
+"""
+import copy
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from starlette.concurrency import run_in_threadpool
+from backend.core.cache import LRUCache
+from backend.core.config import settings
+from backend.services.architecture_utils import architecture_layers
+
+# Bump when the prompt changes so answers to the old prompt are not reused
+PROMPT_VERSION = 3
+
+def canonical_inputs(
+    architecture: Dict[str, Any],
+    dataset_stats: Dict[str, Any],
+    training_metrics: Optional[List[Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """The parts of a suggestion request that determine the prompt, in a stable form"""
+    # Exactly the layer list the prompt serializer reads: saved `layers`, or editor
+    # `nodes` ordered along their edges, reduced to type and settings
+    layers = [
+        {"type": layer.get('type', 'Unknown'), "params": layer.get('params') or {}}
+        for layer in architecture_layers(architecture or {})
+    ]
+    final_epoch = None
+    if training_metrics:
+        final_epoch = {
+            name: training_metrics[-1].get(name)
+            for name in ('trainLoss', 'valLoss', 'trainAcc', 'valAcc')
+        }
+    return {
+        "layers": layers,
+        "dataset_stats": dataset_stats or {},
+        "final_epoch": final_epoch,
+        "epochs": len(training_metrics or []),
+    }
+
+def suggestion_key(
+    architecture: Dict[str, Any],
+    dataset_stats: Dict[str, Any],
+    training_metrics: Optional[List[Dict[str, Any]]] = None,
+    model_name: str = "",
+) -> str:
+    """SHA-256 of the canonical inputs, the model name and the prompt version"""
+    payload = {
+        "inputs": canonical_inputs(architecture, dataset_stats, training_metrics),
+        "model": model_name,
+        "prompt_version": PROMPT_VERSION,
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+class SuggestionCache:
+    """Bounded in-memory LRU with TTL, optionally backed by a directory of JSON files"""
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        disk_dir: Optional[str] = None,
+        disk_max_entries: int = 10000,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_entries = disk_max_entries
+        # key -> (expires_at, suggestions)
+        self._memory = LRUCache(max_entries, name="suggestions")
+
+    @classmethod
+    def from_settings(cls) -> "SuggestionCache":
+        return cls(
+            settings.SUGGESTION_CACHE_SIZE,
+            settings.SUGGESTION_CACHE_TTL_SECONDS,
+            disk_dir=settings.SUGGESTION_CACHE_DIR,
+            disk_max_entries=settings.SUGGESTION_CACHE_DISK_MAX_ENTRIES,
+        )
+
+    def _path(self, key: str) -> Path:
+        return self.disk_dir / f"{key}.json"
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached suggestions for `key`, or None if missing or expired"""
+        entry = self._memory.get(key)
+        if entry is None and self.disk_dir is not None:
+            entry = await run_in_threadpool(self._read_disk, key)
+            if entry is not None:
+                self._memory.set(key, entry)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.time():
+            self._memory.pop(key)
+            return None
+        # Callers may modify the response; never hand out the cached object
+        return copy.deepcopy(value)
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        entry = (time.time() + self.ttl_seconds, copy.deepcopy(value))
+        self._memory.set(key, entry)
+        if self.disk_dir is not None:
+            await run_in_threadpool(self._write_disk, key, entry)
+
+    def _read_disk(self, key: str):
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                stored = json.load(f)
+            return stored["expires_at"], stored["value"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write_disk(self, key: str, entry) -> None:
+        expires_at, value = entry
+        try:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=self.disk_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"expires_at": expires_at, "value": value}, f)
+            os.replace(tmp_name, self._path(key))
+            self._prune_disk()
+        except OSError as e:
+            # The disk tier is an optimisation; a full or read-only disk must not fail the request
+            print(f"Could not write suggestion cache entry: {e}")
+
+    def _prune_disk(self) -> None:
+        """Delete expired entries, then the oldest ones beyond the entry budget"""
+        now = time.time()
+        files = sorted(self.disk_dir.glob("*.json"), key=lambda p: p.stat().st_mtime)
+        excess = len(files) - self.disk_max_entries
+        for i, path in enumerate(files):
+            if i < excess or path.stat().st_mtime + self.ttl_seconds <= now:
+                path.unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        self._memory.clear()
+        if self.disk_dir is not None and self.disk_dir.exists():
+            for path in self.disk_dir.glob("*.json"):
+                path.unlink(missing_ok=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return self._memory.stats()
+
+suggestion_cache = SuggestionCache.from_settings()
@@ -0,0 +1,99 @@
+"""
+Incremental parser for streamed suggestion JSON
+
+The model streams `{"analysis": "...", "suggestions": [{...}, {...}]}`
+in arbitrary chunks, sometimes wrapped in a markdown code fence. The
+parser scans each character once, tracking string/escape state and
+nesting depth, and emits the analysis string and each suggestion object
+as soon as its closing quote or brace arrives, without waiting for (or
+re-parsing) the whole document.
+"""
+import json
+from typing import Any, Dict, List, Optional
+
+class SuggestionStreamParser:
+    """Feed text chunks; get ("analysis", str) and ("suggestion", dict) events back"""
+
+    def __init__(self):
+        self.text = ""
+        self._pos = 0
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._after_colon = False
+        self._string_is_value = False
+        self._key: Optional[str] = None
+        self._suggestions_depth: Optional[int] = None
+        self._object_start: Optional[int] = None
+        self.analysis: Optional[str] = None
+        self.suggestions: List[Dict[str, Any]] = []
+
+    def feed(self, chunk: str) -> List[tuple]:
+        """Consume `chunk` and return the events it completed"""
+        self.text += chunk
+        events = []
+        text = self.text
+        while self._pos < len(text):
+            char = text[self._pos]
+            index = self._pos
+            self._pos += 1
+
+            if not self._started:
+                # Skip anything before the document, e.g. a ```json fence
+                if char == "{":
+                    self._started = True
+                    self._depth = 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_string = json.loads(text[self._string_start:index + 1], strict=False)
+                        if self._string_is_value and self._key == "analysis" and self.analysis is None:
+                            self.analysis = self._last_string
+                            events.append(("analysis", self.analysis))
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = index
+                self._string_is_value = self._after_colon
+                self._after_colon = False
+            elif char == ":" and self._depth == 1:
+                self._key = self._last_string
+                self._after_colon = True
+            elif char == ",":
+                self._after_colon = False
+            elif char in "{[":
+                self._after_colon = False
+                self._depth += 1
+                if char == "[" and self._depth == 2 and self._key == "suggestions":
+                    self._suggestions_depth = 2
+                elif char == "{" and self._suggestions_depth is not None and self._depth == self._suggestions_depth + 1:
+                    self._object_start = index
+            elif char in "}]":
+                if (
+                    char == "}"
+                    and self._object_start is not None
+                    and self._depth == (self._suggestions_depth or 0) + 1
+                ):
+                    try:
+                        suggestion = json.loads(text[self._object_start:index + 1], strict=False)
+                    except ValueError:
+                        suggestion = None
+                    self._object_start = None
+                    if isinstance(suggestion, dict):
+                        self.suggestions.append(suggestion)
+                        events.append(("suggestion", suggestion))
+                elif char == "]" and self._depth == self._suggestions_depth:
+                    self._suggestions_depth = None
+                self._depth -= 1
+        return events
@@ -0,0 +1,247 @@
+"""
+Hyperparameter sweeps over training_config
+
+A sweep expands a grid or random-search spec into trials, runs them
+concurrently (bounded by a semaphore) on either the vectorized simulation
+or the real training engine, and stops trials early with the median
+stopping rule: after a grace period, a trial whose best metric so far is
+worse than the median of the other trials' best at the same epoch is
+dropped. Progress is reported as a stream of events ending in a ranked
+summary.
+"""
+import asyncio
+import itertools
+import math
+import random
+import statistics
+from typing import Any, AsyncIterator, Dict, List, Optional
+from starlette.concurrency import run_in_threadpool
+from backend.core.config import settings
+
+SEARCH_GRID = "grid"
+SEARCH_RANDOM = "random"
+
+# Events buffered between the trials and the client
+EVENT_QUEUE_SIZE = 64
+
+# metric -> True when larger is better
+METRICS = {
+    "valLoss": False,
+    "trainLoss": False,
+    "valAcc": True,
+    "trainAcc": True,
+}
+
+def _sample(rng: random.Random, space: Any) -> Any:
+    """Draw one value from a list of choices or a {"min", "max", "log", "type"} range"""
+    if isinstance(space, list):
+        return rng.choice(space)
+    low, high = float(space["min"]), float(space["max"])
+    if space.get("log"):
+        value = math.exp(rng.uniform(math.log(low), math.log(high)))
+    else:
+        value = rng.uniform(low, high)
+    return int(round(value)) if space.get("type") == "int" else value
+
+def expand_trials(
+    base_config: Dict[str, Any],
+    parameters: Dict[str, Any],
+    search: str = SEARCH_GRID,
+    num_trials: Optional[int] = None,
+    seed: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Training configs for every trial (raises ValueError on an invalid spec)
+
+    Grid search takes a list of values per parameter and runs their
+    Cartesian product. Random search draws `num_trials` configs, each
+    parameter from a list of choices or a numeric range.
+    """
+    if not parameters:
+        raise ValueError("parameters must name at least one training_config key")
+
+    if search == SEARCH_GRID:
+        names = list(parameters)
+        for name in names:
+            if not isinstance(parameters[name], list) or not parameters[name]:
+                raise ValueError(f"Grid search needs a non-empty list of values for '{name}'")
+        total = math.prod(len(parameters[name]) for name in names)
+        if total > settings.SWEEP_MAX_TRIALS:
+            raise ValueError(f"Grid has {total} trials; the limit is {settings.SWEEP_MAX_TRIALS}")
+        return [
+            {**base_config, **dict(zip(names, values))}
+            for values in itertools.product(*(parameters[name] for name in names))
+        ]
+
+    if search == SEARCH_RANDOM:
+        count = num_trials or 10
+        if not 1 <= count <= settings.SWEEP_MAX_TRIALS:
+            raise ValueError(f"num_trials must be between 1 and {settings.SWEEP_MAX_TRIALS}")
+        rng = random.Random(seed)
+        try:
+            return [
+                {**base_config, **{name: _sample(rng, space) for name, space in parameters.items()}}
+                for _ in range(count)
+            ]
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid random search space: {e}")
+
+    raise ValueError(f"Unknown search '{search}'. Choose 'grid' or 'random'")
+
+class MedianStoppingRule:
+    """Stop a trial whose best metric trails the median of the other trials at the same epoch"""
+
+    def __init__(self, metric: str, grace_epochs: int, min_trials: int = 3):
+        self.higher_is_better = METRICS[metric]
+        self.metric = metric
+        self.grace_epochs = grace_epochs
+        self.min_trials = min_trials
+        # trial -> best metric so far, indexed by epoch - 1
+        self._best: Dict[int, List[float]] = {}
+
+    def _better(self, a: float, b: float) -> bool:
+        return a > b if self.higher_is_better else a < b
+
+    def report(self, trial: int, metrics: Dict[str, Any]) -> bool:
+        """Record one epoch; returns True if the trial should stop"""
+        value = float(metrics[self.metric])
+        history = self._best.setdefault(trial, [])
+        history.append(value if not history or self._better(value, history[-1]) else history[-1])
+
+        epoch = len(history)
+        if epoch < self.grace_epochs:
+            return False
+        others = [h[epoch - 1] for t, h in self._best.items() if t != trial and len(h) >= epoch]
+        if len(others) + 1 < self.min_trials:
+            return False
+        return self._better(statistics.median(others), history[-1])
+
+class SweepService:
+    """Runs the trials of a sweep concurrently and streams their progress"""
+
+    def __init__(self, simulation_service, training_engine):
+        self.simulation_service = simulation_service
+        self.training_engine = training_engine
+
+    def prepare(
+        self,
+        mode: str,
+        architecture: Dict[str, Any],
+        dataset_stats: Dict[str, Any],
+        configs: List[Dict[str, Any]],
+        seed: Optional[int] = None,
+    ) -> List[Any]:
+        """Validate every trial up front so a bad config fails the request, not the stream"""
+        trials = []
+        for index, config in enumerate(configs):
+            trial_seed = None if seed is None else seed + index
+            if mode == "real":
+                trials.append(self.training_engine.prepare(architecture, dataset_stats, config, seed=trial_seed))
+            else:
+                # Curves are computed when the trial starts, so only running trials hold them
+                self.simulation_service.check_config(config)
+                trials.append((architecture, dataset_stats, config, trial_seed))
+        return trials
+
+    async def _simulated(self, trial: Any) -> AsyncIterator[Dict[str, Any]]:
+        architecture, dataset_stats, config, seed = trial
+        curves = await run_in_threadpool(self.simulation_service.simulate_curves, architecture, dataset_stats, config, seed)
+        async for metrics in self.simulation_service.pace(curves):
+            yield metrics
+
+    def _metrics(self, mode: str, trial: Any) -> AsyncIterator[Dict[str, Any]]:
+        if mode == "real":
+            # Admitted once for the whole sweep; trials wait on the sweep's semaphore
+            # for a worker instead of being rejected by the shared queue limit
+            return self.training_engine.run(trial, limit_queue=False)
+        return self._simulated(trial)
+
+    async def run(
+        self,
+        mode: str,
+        configs: List[Dict[str, Any]],
+        trials: List[Any],
+        metric: str = "valLoss",
+        max_concurrency: int = 4,
+        early_stopping: bool = True,
+        grace_epochs: int = 5,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Run all trials and yield events:
+            {"type": "trial_start", "trial", "config"}
+            {"type": "progress", "trial", "metrics"}
+            {"type": "trial_end", "trial", "status", "epochs", "best", "reason"?, "error"?}
+            {"type": "summary", "metric", "ranking"}
+        where status is "completed", "stopped" or "failed"; a stopped trial's
+        reason is "early_stopping" or "time_budget".
+        """
+        higher_is_better = METRICS[metric]
+        rule = MedianStoppingRule(metric, grace_epochs) if early_stopping else None
+        if mode == "real":
+            # More concurrent trials than workers would only queue in the pool
+            max_concurrency = min(max_concurrency, self.training_engine.workers)
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        # Bounded so trials wait for a slow client instead of buffering the whole sweep
+        events: asyncio.Queue = asyncio.Queue(maxsize=EVENT_QUEUE_SIZE)
+        results: Dict[int, Dict[str, Any]] = {}
+
+        async def run_trial(index: int) -> None:
+            async with semaphore:
+                await events.put({"type": "trial_start", "trial": index, "config": configs[index]})
+                best, epochs, status, error, reason = None, 0, "completed", None, None
+                source = self._metrics(mode, trials[index])
+                try:
+                    async for metrics in source:
+                        if metrics.get("type") == "stopped":
+                            # Real training hit its time budget; the trial is truncated, not complete
+                            status, reason = "stopped", metrics.get("reason")
+                            break
+                        epochs += 1
+                        value = float(metrics[metric])
+                        if best is None or (value > best if higher_is_better else value < best):
+                            best = value
+                        await events.put({"type": "progress", "trial": index, "metrics": metrics})
+                        if rule is not None and rule.report(index, metrics):
+                            status, reason = "stopped", "early_stopping"
+                            break
+                        # Let the other trials report the same epoch before comparing again
+                        await asyncio.sleep(0)
+                except Exception as e:
+                    status, error = "failed", str(e)
+                finally:
+                    # Closing a real training stream cancels the worker job
+                    await source.aclose()
+
+                result = {"trial": index, "config": configs[index], "status": status, "epochs": epochs, "best": best}
+                if reason:
+                    result["reason"] = reason
+                if error:
+                    result["error"] = error
+                results[index] = result
+                await events.put({"type": "trial_end", **result})
+
+        tasks = [asyncio.create_task(run_trial(index)) for index in range(len(configs))]
+        try:
+            pending = len(tasks)
+            while pending:
+                event = await events.get()
+                if event["type"] == "trial_end":
+                    pending -= 1
+                yield event
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        def rank_key(result: Dict[str, Any]):
+            # Best metric first; failed trials and trials without a metric go last
+            best = result["best"]
+            if result["status"] == "failed" or best is None:
+                return (1, math.inf)
+            return (0, -best if higher_is_better else best)
+
+        yield {
+            "type": "summary",
+            "metric": metric,
+            "ranking": sorted(results.values(), key=rank_key),
+        }
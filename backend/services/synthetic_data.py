@@ -0,0 +1,270 @@
+"""
+Synthetic image batches shaped by dataset statistics
+
+`SyntheticDataset` turns `dataset_stats` (image size, channels, class
+distribution, pixel mean/std, noise level, augmentation) into a
+class-conditional distribution: each class has a smooth random pattern,
+samples are that pattern plus Gaussian noise, and labels follow the class
+distribution so imbalance is preserved. `SyntheticBatchGenerator` draws
+batches from it on a background thread into a small ring of preallocated
+buffers, giving training, profiling and calibration code a fast,
+reproducible input source without a real dataset.
+"""
+import math
+import queue
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+AUGMENTATION_TYPES = ['Rotation', 'Zoom', 'Flip', 'Color Shift']
+
+# Per-pixel noise standard deviation (in units of the pixel std)
+NOISE_LEVELS = {
+    'none': 0.1,
+    'low': 0.3,
+    'medium': 0.6,
+    'high': 1.0,
+}
+
+# Class patterns are drawn at this resolution and upsampled to the image size
+PATTERN_RESOLUTION = 8
+# Per-pixel amplitude of the class pattern; small enough that learning takes several epochs
+CLASS_SEPARATION = 0.05
+
+# Upper bound on the upsampled class patterns (classes x C x H x W float32)
+MAX_PATTERN_BYTES = 256 * 1024 * 1024
+
+MAX_ROTATION_DEGREES = 15.0
+MAX_ZOOM = 0.1
+# Per-image, per-channel offset, in units of the pixel std
+COLOR_SHIFT_STD = 0.05
+
+class SyntheticDataset:
+    """Class-conditional image distribution; fills caller-provided tensors"""
+
+    def __init__(
+        self,
+        image_shape: Sequence[int],
+        class_weights: Sequence[float],
+        noise: float = NOISE_LEVELS['none'],
+        pixel_mean: float = 0.0,
+        pixel_std: float = 1.0,
+        augmentations: Optional[List[str]] = None,
+        seed: int = 0,
+        max_pattern_bytes: int = MAX_PATTERN_BYTES,
+    ):
+        import torch
+        import torch.nn.functional as F
+
+        channels, height, width = (int(d) for d in image_shape)
+        if min(channels, height, width) <= 0:
+            raise ValueError("Image channels, height and width must be positive")
+        weights = [max(0.0, float(w)) for w in class_weights]
+        if not weights or sum(weights) <= 0:
+            raise ValueError("At least one class must have a positive weight")
+        unknown = set(augmentations or []) - set(AUGMENTATION_TYPES)
+        if unknown:
+            raise ValueError(f"Unknown augmentation types: {', '.join(sorted(unknown))}")
+
+        pattern_bytes = len(weights) * channels * height * width * 4
+        if pattern_bytes > max_pattern_bytes:
+            raise ValueError(
+                f"{len(weights)} classes at {channels}x{height}x{width} need "
+                f"{pattern_bytes // (1024 * 1024)} MB of class patterns; the limit is {max_pattern_bytes // (1024 * 1024)} MB"
+            )
+
+        self.image_shape = (channels, height, width)
+        self.num_classes = len(weights)
+        self.noise = float(noise)
+        self.pixel_mean = float(pixel_mean)
+        self.pixel_std = float(pixel_std)
+        self.augmentations = list(augmentations or [])
+        self.seed = seed
+        self.weights = torch.tensor(weights, dtype=torch.float32)
+
+        generator = torch.Generator().manual_seed(seed)
+        low = torch.randn(self.num_classes, channels, PATTERN_RESOLUTION, PATTERN_RESOLUTION, generator=generator)
+        # Upsampled once; every batch then only gathers rows of this tensor
+        self.patterns = F.interpolate(low, size=(height, width), mode="bilinear", align_corners=False)
+        self.patterns.mul_(CLASS_SEPARATION)
+
+    @classmethod
+    def from_dataset_stats(cls, dataset_stats: Dict[str, Any], seed: int = 0) -> "SyntheticDataset":
+        """Build from the `dataset_stats` dict the frontend sends"""
+        image_size = dataset_stats.get('imageSize') or [224, 224]
+        distribution = dataset_stats.get('classDistribution') or {}
+        return cls(
+            (int(dataset_stats.get('channels', 3)), int(image_size[0]), int(image_size[-1])),
+            [float(count) for count in distribution.values()],
+            noise=NOISE_LEVELS.get(dataset_stats.get('noiseLevel', 'none'), NOISE_LEVELS['none']),
+            pixel_mean=float(dataset_stats.get('meanPixelValue', 0.0)),
+            pixel_std=float(dataset_stats.get('stdPixelValue', 1.0)) or 1.0,
+            augmentations=AUGMENTATION_TYPES if dataset_stats.get('augmentation') else [],
+            seed=seed,
+        )
+
+    def fill(self, images, labels, generator, augment: bool = True, scratch=None) -> None:
+        """
+        Sample len(labels) examples into `images` (N, C, H, W) and `labels` (N,) in place
+
+        Args:
+            images: float32 tensor to overwrite
+            labels: int64 tensor to overwrite
+            generator: torch.Generator driving the sampling
+            augment: Apply the dataset's augmentations (disable for validation)
+            scratch: Optional tensor shaped like `images` reused for the noise
+        """
+        import torch
+
+        count = len(labels)
+        torch.multinomial(self.weights, count, replacement=True, generator=generator, out=labels)
+        torch.index_select(self.patterns, 0, labels, out=images)
+
+        if augment and self.augmentations:
+            self._augment(images, generator)
+
+        if scratch is None:
+            scratch = torch.empty_like(images)
+        scratch.normal_(generator=generator)
+        images.add_(scratch, alpha=self.noise)
+        images.mul_(self.pixel_std).add_(self.pixel_mean)
+
+    def _augment(self, images, generator) -> None:
+        import torch
+        import torch.nn.functional as F
+
+        count = images.shape[0]
+        if 'Flip' in self.augmentations:
+            flipped = torch.rand(count, generator=generator) < 0.5
+            if flipped.any():
+                images[flipped] = images[flipped].flip(-1)
+
+        rotate = 'Rotation' in self.augmentations
+        zoom = 'Zoom' in self.augmentations
+        if rotate or zoom:
+            angles = torch.zeros(count)
+            scales = torch.ones(count)
+            if rotate:
+                angles = (torch.rand(count, generator=generator) * 2 - 1) * math.radians(MAX_ROTATION_DEGREES)
+            if zoom:
+                scales = 1 + (torch.rand(count, generator=generator) * 2 - 1) * MAX_ZOOM
+            cos, sin = torch.cos(angles) / scales, torch.sin(angles) / scales
+            theta = torch.zeros(count, 2, 3)
+            theta[:, 0, 0], theta[:, 0, 1] = cos, -sin
+            theta[:, 1, 0], theta[:, 1, 1] = sin, cos
+            grid = F.affine_grid(theta, list(images.shape), align_corners=False)
+            images.copy_(F.grid_sample(images, grid, padding_mode="reflection", align_corners=False))
+
+        if 'Color Shift' in self.augmentations:
+            images.add_(torch.randn(count, images.shape[1], 1, 1, generator=generator) * COLOR_SHIFT_STD)
+
+_END = object()
+
+class SyntheticBatchGenerator:
+    """
+    Iterable of (images, labels) batches prefetched on a background thread
+
+    Batches are written into `prefetch + 1` preallocated buffers that are
+    reused in turn, so the tensors yielded by one iteration are only valid
+    until the next batch is requested; copy them to keep them longer.
+    With `prefetch=0` batches are produced synchronously in `__next__`.
+    """
+
+    def __init__(
+        self,
+        dataset: SyntheticDataset,
+        batch_size: int,
+        num_batches: Optional[int] = None,
+        seed: int = 0,
+        prefetch: int = 2,
+        augment: bool = True,
+    ):
+        import torch
+
+        if batch_size <= 0:
+            raise ValueError("batch_size must be positive")
+        self.dataset = dataset
+        self.batch_size = batch_size
+        self.num_batches = num_batches
+        self.prefetch = max(0, prefetch)
+        self.augment = augment
+        self._generator = torch.Generator().manual_seed(seed)
+        self._buffers = [
+            (torch.empty(batch_size, *dataset.image_shape), torch.empty(batch_size, dtype=torch.int64))
+            for _ in range(self.prefetch + 1)
+        ]
+        # Only the producing thread draws noise, so one scratch buffer serves every slot
+        self._scratch = torch.empty(batch_size, *dataset.image_shape)
+        self._free: "queue.Queue" = queue.Queue()
+        self._ready: "queue.Queue" = queue.Queue()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._current: Optional[int] = None
+        self._produced = 0
+        # Set once the batches ran out, the producer failed or the generator was closed;
+        # the producer thread is gone then, so later calls must not wait on `_ready`
+        self._exhausted = False
+
+    def __iter__(self) -> "SyntheticBatchGenerator":
+        if self.prefetch and self._thread is None and not self._exhausted:
+            for slot in range(len(self._buffers)):
+                self._free.put(slot)
+            self._thread = threading.Thread(target=self._produce, name="synthetic-prefetch", daemon=True)
+            self._thread.start()
+        return self
+
+    def _produce(self) -> None:
+        try:
+            produced = 0
+            while self.num_batches is None or produced < self.num_batches:
+                slot = self._free.get()
+                if slot is None or self._stop.is_set():
+                    return
+                images, labels = self._buffers[slot]
+                self.dataset.fill(images, labels, self._generator, augment=self.augment, scratch=self._scratch)
+                self._ready.put(slot)
+                produced += 1
+            self._ready.put(_END)
+        except BaseException as e:
+            self._ready.put(e)
+
+    def __next__(self) -> Tuple[Any, Any]:
+        if self._exhausted:
+            raise StopIteration
+        if not self.prefetch:
+            if self.num_batches is not None and self._produced >= self.num_batches:
+                raise StopIteration
+            images, labels = self._buffers[0]
+            self.dataset.fill(images, labels, self._generator, augment=self.augment, scratch=self._scratch)
+            self._produced += 1
+            return images, labels
+
+        if self._thread is None:
+            iter(self)
+        # The previous batch's buffer can be refilled now
+        if self._current is not None:
+            self._free.put(self._current)
+            self._current = None
+        item = self._ready.get()
+        if item is _END:
+            self._exhausted = True
+            raise StopIteration
+        if isinstance(item, BaseException):
+            self._exhausted = True
+            raise item
+        self._current = item
+        return self._buffers[item]
+
+    def close(self) -> None:
+        """Stop the prefetch thread; iteration ends"""
+        self._exhausted = True
+        self._stop.set()
+        if self._thread is not None:
+            self._free.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "SyntheticBatchGenerator":
+        return iter(self)
+
+    def __exit__(self, *exc) -> None:
+        self.close()
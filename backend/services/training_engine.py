@@ -0,0 +1,329 @@
+"""
+Real CPU training on synthetic data
+
+Builds the architecture with `ModelBuilder` and trains it on synthetic,
+class-conditional tensors shaped by `dataset_stats` (image size, channels,
+class distribution, noise level). Training runs in a spawned process pool
+so it never blocks the event loop; per-epoch metrics come back through a
+manager queue in the same format as `SimulationService.simulate_training`.
+
+Every run is bounded: steps per epoch, batch size in bytes, parameter count
+and wall-clock time are capped by settings, batches are generated on the
+fly by a prefetching `SyntheticBatchGenerator` instead of materialising a
+dataset, and runs stop at the next step once cancelled (e.g. when the
+client disconnects).
+"""
+import asyncio
+import math
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, List, Optional
+from starlette.concurrency import run_in_threadpool
+from backend.core.config import settings
+from backend.core.metrics import EXECUTOR_QUEUE_DEPTH, EXECUTOR_RUNNING
+from backend.services.architecture_utils import architecture_layers
+from backend.services.synthetic_data import AUGMENTATION_TYPES, MAX_PATTERN_BYTES, NOISE_LEVELS
+
+OPTIMIZERS = ("adam", "adamw", "sgd", "rmsprop")
+
+# Seconds between checks of the worker while waiting for the next event
+POLL_INTERVAL = 0.5
+
+class TrainingError(Exception):
+    """Raised when a training run fails inside the worker"""
+
+class TrainingQueueFull(TrainingError):
+    """Raised when TRAINING_MAX_QUEUED runs are already waiting for a worker"""
+
+def _class_weights(dataset_stats: Dict[str, Any]) -> List[float]:
+    distribution = dataset_stats.get('classDistribution') or {}
+    weights = [max(0.0, float(count)) for count in distribution.values()]
+    if weights and sum(weights) <= 0:
+        raise ValueError("classDistribution must contain a positive count")
+    return weights
+
+def _make_optimizer(name: str, parameters, learning_rate: float):
+    import torch
+
+    if name == "sgd":
+        return torch.optim.SGD(parameters, lr=learning_rate, momentum=0.9)
+    if name == "rmsprop":
+        return torch.optim.RMSprop(parameters, lr=learning_rate)
+    if name == "adamw":
+        return torch.optim.AdamW(parameters, lr=learning_rate)
+    return torch.optim.Adam(parameters, lr=learning_rate)
+
+def _interrupted(events, cancel, deadline: float) -> bool:
+    """Report a cancelled job or a spent time budget; True if the job must end"""
+    if cancel.is_set():
+        events.put(("cancelled", None))
+        return True
+    if time.monotonic() > deadline:
+        events.put(("stopped", "time_budget"))
+        return True
+    return False
+
+def _train_worker(spec: Dict[str, Any], events, cancel) -> None:
+    """Training loop run in a pool process; reports through `events`"""
+    try:
+        # A job cancelled while it waited in the pool queue does not build anything
+        if cancel.is_set():
+            events.put(("cancelled", None))
+            return
+        import torch
+        import torch.nn.functional as F
+        from backend.services.model_builder import ModelBuilder
+        from backend.services.synthetic_data import SyntheticBatchGenerator, SyntheticDataset
+
+        torch.set_num_threads(spec["threads"])
+        deadline = time.monotonic() + spec["time_budget"]
+        torch.manual_seed(spec["seed"])
+
+        model = ModelBuilder({"layers": spec["layers"]}, input_shape=spec["input_shape"]).build()
+        num_parameters = sum(p.numel() for p in model.parameters())
+        if num_parameters > spec["max_parameters"]:
+            raise ValueError(f"Model has {num_parameters} parameters; real training allows at most {spec['max_parameters']}")
+        if num_parameters == 0:
+            raise ValueError("Model has no trainable parameters")
+
+        num_classes = len(spec["class_weights"])
+        with torch.no_grad():
+            model.eval()
+            output = model(torch.zeros(*spec["input_shape"]))
+        if output.dim() != 2 or output.shape[1] != num_classes:
+            raise ValueError(
+                f"Model output shape {list(output.shape)} does not match {num_classes} classes; "
+                "end the network with Flatten and Linear(out_features=number of classes)"
+            )
+        # Building a large model can take a good part of the budget
+        if _interrupted(events, cancel, deadline):
+            return
+
+        dataset = SyntheticDataset(
+            spec["input_shape"][1:],
+            spec["class_weights"],
+            noise=spec["noise"],
+            pixel_mean=spec["pixel_mean"],
+            pixel_std=spec["pixel_std"],
+            augmentations=spec["augmentations"],
+            seed=spec["seed"],
+        )
+        optimizer = _make_optimizer(spec["optimizer"], model.parameters(), spec["learning_rate"])
+        batch_size = spec["batch_size"]
+        val_batches = math.ceil(spec["validation_samples"] / batch_size)
+
+        # The next batches are generated while the model trains on the current one
+        with SyntheticBatchGenerator(
+            dataset, batch_size, num_batches=spec["epochs"] * spec["steps_per_epoch"], seed=spec["seed"] + 1,
+        ) as batches:
+            for epoch in range(1, spec["epochs"] + 1):
+                model.train()
+                train_loss, train_correct, train_seen = 0.0, 0, 0
+                for _ in range(spec["steps_per_epoch"]):
+                    if _interrupted(events, cancel, deadline):
+                        return
+                    inputs, labels = next(batches)
+                    optimizer.zero_grad(set_to_none=True)
+                    logits = model(inputs)
+                    loss = F.cross_entropy(logits, labels)
+                    loss.backward()
+                    optimizer.step()
+                    train_loss += loss.item() * len(labels)
+                    train_correct += int((logits.argmax(dim=1) == labels).sum())
+                    train_seen += len(labels)
+
+                # The validation set is regenerated from a fixed seed instead of being kept in memory
+                model.eval()
+                val_loss, val_correct, val_seen = 0.0, 0, 0
+                validation = SyntheticBatchGenerator(
+                    dataset, batch_size, num_batches=val_batches, seed=spec["seed"] + 2, prefetch=0, augment=False,
+                )
+                with torch.inference_mode():
+                    for inputs, labels in validation:
+                        logits = model(inputs)
+                        val_loss += F.cross_entropy(logits, labels, reduction="sum").item()
+                        val_correct += int((logits.argmax(dim=1) == labels).sum())
+                        val_seen += len(labels)
+
+                events.put(("epoch", {
+                    "epoch": epoch,
+                    "trainLoss": train_loss / train_seen,
+                    "valLoss": val_loss / val_seen,
+                    "trainAcc": train_correct / train_seen,
+                    "valAcc": val_correct / val_seen,
+                }))
+        events.put(("done", None))
+    except Exception as e:
+        events.put(("error", str(e)))
+
+class TrainingEngine:
+    """Runs training jobs on a spawned process pool and streams their metrics"""
+
+    def __init__(self, workers: int, max_queued: int = 8):
+        self.workers = max(1, workers)
+        self.max_queued = max(0, max_queued)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._manager = None
+        # Blocking reads of the event queues; one thread per admitted run, so
+        # waiting runs never take threads from the shared AnyIO pool
+        self._pollers: Optional[ThreadPoolExecutor] = None
+        self._start_lock = threading.Lock()
+        self._submitted = 0  # Runs handed to the pool and not finished yet
+
+    def _ensure_started(self) -> None:
+        """Start the manager and pools (blocking: spawning the manager takes a while)"""
+        with self._start_lock:
+            if self._pool is None:
+                # Spawn rather than fork: the server process holds threads and an event loop
+                context = multiprocessing.get_context("spawn")
+                self._manager = context.Manager()
+                self._pollers = ThreadPoolExecutor(
+                    max_workers=self.workers + self.max_queued, thread_name_prefix="training-events"
+                )
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+
+    def check_capacity(self) -> None:
+        """Raise TrainingQueueFull if a new run would wait behind too many others"""
+        if self._submitted >= self.workers + self.max_queued:
+            raise TrainingQueueFull(f"{self._submitted - self.workers} training runs are already queued")
+
+    def prepare(
+        self,
+        architecture: Dict[str, Any],
+        dataset_stats: Dict[str, Any],
+        training_config: Dict[str, Any],
+        seed: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Validate a request against the budgets and build the job spec (raises ValueError)"""
+        dataset_stats = dataset_stats or {}
+        layers = architecture_layers(architecture)
+        if not layers:
+            raise ValueError("Architecture has no layers")
+
+        image_size = dataset_stats.get('imageSize') or [224, 224]
+        height, width = int(image_size[0]), int(image_size[-1])
+        channels = int(dataset_stats.get('channels', 3))
+        if min(height, width, channels) <= 0:
+            raise ValueError("imageSize and channels must be positive")
+
+        class_weights = _class_weights(dataset_stats)
+        if not class_weights:
+            raise ValueError("dataset_stats.classDistribution is required for real training")
+
+        epochs = int(training_config.get('epochs', 50))
+        batch_size = int(training_config.get('batch_size', 32))
+        learning_rate = float(training_config.get('learning_rate', 0.001))
+        optimizer = str(training_config.get('optimizer', 'adam')).lower()
+        if not 1 <= epochs <= settings.SIMULATION_MAX_EPOCHS:
+            raise ValueError(f"epochs must be between 1 and {settings.SIMULATION_MAX_EPOCHS}")
+        if batch_size <= 0 or learning_rate <= 0:
+            raise ValueError("batch_size and learning_rate must be positive")
+        if optimizer not in OPTIMIZERS:
+            raise ValueError(f"Unknown optimizer '{optimizer}'. Choose one of: {', '.join(OPTIMIZERS)}")
+
+        batch_bytes = batch_size * channels * height * width * 4
+        if batch_bytes > settings.TRAINING_MAX_BATCH_BYTES:
+            raise ValueError(
+                f"A batch of {batch_size} x {channels}x{height}x{width} needs {batch_bytes // (1024 * 1024)} MB; "
+                f"the limit is {settings.TRAINING_MAX_BATCH_BYTES // (1024 * 1024)} MB"
+            )
+
+        if len(class_weights) * channels * height * width * 4 > MAX_PATTERN_BYTES:
+            raise ValueError(f"Too many classes ({len(class_weights)}) for {channels}x{height}x{width} synthetic images")
+
+        total_samples = int(dataset_stats.get('totalSamples', 5000))
+        noise = NOISE_LEVELS.get(dataset_stats.get('noiseLevel', 'none'), NOISE_LEVELS['none'])
+        return {
+            "layers": layers,
+            "input_shape": [1, channels, height, width],
+            "class_weights": class_weights,
+            "noise": noise,
+            "pixel_mean": float(dataset_stats.get('meanPixelValue', 0.0)),
+            "pixel_std": float(dataset_stats.get('stdPixelValue', 1.0)) or 1.0,
+            "augmentations": AUGMENTATION_TYPES if dataset_stats.get('augmentation') else [],
+            "epochs": epochs,
+            "batch_size": batch_size,
+            "learning_rate": learning_rate,
+            "optimizer": optimizer,
+            "steps_per_epoch": max(1, min(math.ceil(total_samples / batch_size), settings.TRAINING_MAX_STEPS_PER_EPOCH)),
+            "validation_samples": settings.TRAINING_VALIDATION_SAMPLES,
+            "max_parameters": settings.TRAINING_MAX_PARAMETERS,
+            "time_budget": settings.TRAINING_TIME_BUDGET_SECONDS,
+            "threads": settings.TRAINING_THREADS_PER_WORKER,
+            "seed": seed if seed is not None else int.from_bytes(os.urandom(4), "little"),
+        }
+
+    async def run(self, spec: Dict[str, Any], limit_queue: bool = True) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Train according to `spec` (from `prepare`) and yield per-epoch metrics
+
+        If the time budget runs out, the last item is {"type": "stopped",
+        "reason": "time_budget"} instead of epoch metrics. Closing the
+        generator (e.g. on client disconnect) cancels the run. Raises
+        TrainingQueueFull when too many runs are waiting (unless
+        `limit_queue` is False, for callers that queue their own runs), and
+        TrainingError if the worker fails.
+        """
+        if limit_queue:
+            self.check_capacity()
+        loop = asyncio.get_running_loop()
+        # Counted before the first await so concurrent callers see each other
+        self._submitted += 1
+        future = None
+        cancel = None
+        try:
+            if self._pool is None:
+                await run_in_threadpool(self._ensure_started)
+            events = self._manager.Queue()
+            cancel = self._manager.Event()
+            future = loop.run_in_executor(self._pool, _train_worker, spec, events, cancel)
+            future.add_done_callback(self._run_finished)
+            while True:
+                try:
+                    kind, payload = await loop.run_in_executor(self._pollers, events.get, True, POLL_INTERVAL)
+                except queue.Empty:
+                    if future.done():
+                        future.result()  # Surfaces a crashed worker process
+                        raise TrainingError("Training worker exited without reporting a result")
+                    continue
+
+                if kind == "epoch":
+                    yield payload
+                elif kind == "error":
+                    raise TrainingError(payload)
+                elif kind == "stopped":
+                    yield {"type": "stopped", "reason": payload}
+                    return
+                else:
+                    return
+        finally:
+            if cancel is not None:
+                cancel.set()
+            if future is None:
+                self._submitted -= 1
+
+    def _run_finished(self, future) -> None:
+        self._submitted -= 1
+
+    def stats(self) -> Dict[str, int]:
+        running = min(self._submitted, self.workers)
+        return {"workers": self.workers, "running": running, "queued": self._submitted - running}
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        if self._pollers is not None:
+            self._pollers.shutdown(wait=False, cancel_futures=True)
+            self._pollers = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+training_engine = TrainingEngine(settings.TRAINING_WORKERS, max_queued=settings.TRAINING_MAX_QUEUED)
+EXECUTOR_QUEUE_DEPTH.set_function(lambda: training_engine.stats()["queued"], executor="training")
+EXECUTOR_RUNNING.set_function(lambda: training_engine.stats()["running"], executor="training")
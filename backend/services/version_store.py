@@ -0,0 +1,307 @@
+"""
+Delta-encoded storage for model version architectures
+
+Most auto-saves only change a handful of layer parameters, so instead of
+persisting the full `architecture` on every `ModelVersion` we keep a full
+snapshot every `VERSION_SNAPSHOT_INTERVAL` versions and store JSON-patch
+(RFC 6902 subset: add/remove/replace) deltas against the previous version in
+between. Reads reconstruct the architecture from the nearest snapshot and keep
+recently materialised architectures in a small LRU cache.
+"""
+import copy
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Tuple
+from backend.core.cache import LRUCache
+from backend.core.http_cache import make_etag
+from backend.core.config import settings
+from backend.db.models import ModelVersion
+
+Patch = List[Dict[str, Any]]
+
+def _escape(token: str) -> str:
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+def _same(a: Any, b: Any) -> bool:
+    # `1 == True` and `1 == 1.0` in Python, but they serialise differently
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(_same(a[k], b[k]) for k in a)
+    if isinstance(a, list):
+        return len(a) == len(b) and all(_same(x, y) for x, y in zip(a, b))
+    return a == b
+
+def make_patch(old: Any, new: Any, path: str = "") -> Patch:
+    """Compute a JSON patch that transforms `old` into `new`"""
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops: Patch = []
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+        for key, value in new.items():
+            child = f"{path}/{_escape(key)}"
+            if key not in old:
+                ops.append({"op": "add", "path": child, "value": copy.deepcopy(value)})
+            else:
+                ops.extend(make_patch(old[key], value, child))
+        return ops
+
+    if isinstance(old, list) and isinstance(new, list):
+        # Trim the common prefix and suffix so that inserting or deleting a
+        # layer in the middle of the graph produces a single op
+        start = 0
+        while start < len(old) and start < len(new) and _same(old[start], new[start]):
+            start += 1
+        old_end, new_end = len(old), len(new)
+        while old_end > start and new_end > start and _same(old[old_end - 1], new[new_end - 1]):
+            old_end -= 1
+            new_end -= 1
+
+        ops = []
+        paired = min(old_end, new_end) - start
+        for offset in range(paired):
+            index = start + offset
+            ops.extend(make_patch(old[index], new[index], f"{path}/{index}"))
+        index = start + paired
+        for _ in range(old_end - start - paired):
+            ops.append({"op": "remove", "path": f"{path}/{index}"})
+        for offset in range(new_end - start - paired):
+            ops.append({
+                "op": "add",
+                "path": f"{path}/{index + offset}",
+                "value": copy.deepcopy(new[index + offset]),
+            })
+        return ops
+
+    if _same(old, new):
+        return []
+    return [{"op": "replace", "path": path, "value": copy.deepcopy(new)}]
+
+def apply_patch(document: Any, patch: Patch) -> Any:
+    """Apply a JSON patch produced by `make_patch` and return a new document"""
+    result = copy.deepcopy(document)
+    for op in patch:
+        kind = op.get("op")
+        tokens = [_unescape(t) for t in op["path"].split("/")[1:]]
+        if not tokens:
+            if kind not in ("replace", "add"):
+                raise ValueError(f"Unsupported root operation: {kind}")
+            result = copy.deepcopy(op["value"])
+            continue
+
+        parent = result
+        for token in tokens[:-1]:
+            parent = parent[int(token)] if isinstance(parent, list) else parent[token]
+        last = tokens[-1]
+
+        if isinstance(parent, list):
+            index = len(parent) if last == "-" else int(last)
+            if kind == "add":
+                parent.insert(index, copy.deepcopy(op["value"]))
+            elif kind == "remove":
+                del parent[index]
+            elif kind == "replace":
+                parent[index] = copy.deepcopy(op["value"])
+            else:
+                raise ValueError(f"Unsupported patch operation: {kind}")
+        else:
+            if kind in ("add", "replace"):
+                parent[last] = copy.deepcopy(op["value"])
+            elif kind == "remove":
+                del parent[last]
+            else:
+                raise ValueError(f"Unsupported patch operation: {kind}")
+    return result
+
+def architecture_hash(architecture: Dict[str, Any]) -> str:
+    """Stable sha256 of an architecture, independent of key order"""
+    canonical = json.dumps(architecture, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def _encoded_size(value: Any) -> int:
+    return len(json.dumps(value, separators=(",", ":"), default=str))
+
+class VersionStore:
+    """Encodes new versions as snapshots or deltas and materialises them on read"""
+
+    def __init__(
+        self,
+        snapshot_interval: Optional[int] = None,
+        cache_size: Optional[int] = None,
+        max_patch_ratio: float = 0.5,
+    ):
+        self.snapshot_interval = max(1, snapshot_interval or settings.VERSION_SNAPSHOT_INTERVAL)
+        self.max_patch_ratio = max_patch_ratio
+        self._cache = LRUCache(cache_size if cache_size is not None else settings.VERSION_CACHE_SIZE, name="versions")
+
+    def encode(
+        self,
+        architecture: Dict[str, Any],
+        version_number: int,
+        previous: Optional[Tuple[int, int, Dict[str, Any]]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Decide how to persist `architecture` for a new version
+
+        Args:
+            architecture: Full architecture of the new version
+            version_number: Number of the new version
+            previous: (version_number, snapshot_version_number, architecture)
+                of the version immediately preceding this one, if any
+
+        Returns:
+            Field values for the new `ModelVersion` document
+        """
+        snapshot = {
+            "architecture": architecture,
+            "architecture_patch": None,
+            "snapshot_version_number": version_number,
+            "architecture_hash": architecture_hash(architecture),
+        }
+        if previous is None:
+            return snapshot
+
+        prev_number, prev_snapshot, prev_architecture = previous
+        if prev_number != version_number - 1:
+            return snapshot
+        if version_number - prev_snapshot >= self.snapshot_interval:
+            return snapshot
+
+        patch = make_patch(prev_architecture, architecture)
+        if _encoded_size(patch) > _encoded_size(architecture) * self.max_patch_ratio:
+            return snapshot
+
+        return {
+            "architecture": {},
+            "architecture_patch": patch,
+            "snapshot_version_number": prev_snapshot,
+            "architecture_hash": snapshot["architecture_hash"],
+        }
+
+    async def latest_version(self, model_id) -> Optional[ModelVersion]:
+        """Return the most recent version of a model (materialised) or None"""
+        latest = await ModelVersion.find(
+            ModelVersion.model_id == model_id
+        ).sort(-ModelVersion.version_number).first_or_none()
+        if latest is not None:
+            await self.resolve(latest)
+        return latest
+
+    async def create_version(self, model_id, architecture: Dict[str, Any], **fields: Any) -> ModelVersion:
+        """Insert the next version of a model using delta encoding where possible"""
+        latest = await self.latest_version(model_id)
+        version_number = (latest.version_number if latest else 0) + 1
+        previous = None
+        if latest is not None:
+            previous = (latest.version_number, self.snapshot_number(latest), latest.architecture)
+
+        encoded = self.encode(architecture, version_number, previous)
+        version = ModelVersion(
+            model_id=model_id,
+            version_number=version_number,
+            **encoded,
+            **fields,
+        )
+        await version.insert()
+        if version.architecture_patch is not None:
+            self._cache.set(str(version.id), copy.deepcopy(architecture))
+        version.architecture = architecture
+        return version
+
+    @staticmethod
+    def snapshot_number(version: ModelVersion) -> int:
+        if version.architecture_patch is None or version.snapshot_version_number is None:
+            return version.version_number
+        return version.snapshot_version_number
+
+    async def get_architecture_hash(self, version: ModelVersion) -> str:
+        """Return the stored architecture hash, computing it for older documents"""
+        if version.architecture_hash is None:
+            await self.resolve(version)
+            version.architecture_hash = architecture_hash(version.architecture)
+        return version.architecture_hash
+
+    async def etag(self, version: ModelVersion, *variant: Any) -> str:
+        """
+        Strong ETag for a representation derived from `version`
+
+        Built from the version id, its last update time and the architecture
+        hash; `variant` distinguishes representations (config, code, ...)
+        and carries any other inputs they depend on.
+        """
+        return make_etag(
+            version.id,
+            (version.updated_at or version.created_at).isoformat(),
+            await self.get_architecture_hash(version),
+            *variant,
+        )
+
+    async def resolve(self, version: ModelVersion) -> ModelVersion:
+        """Populate `version.architecture` with the reconstructed architecture"""
+        if version.architecture_patch is None:
+            return version
+
+        cached = self._cache.get(str(version.id))
+        if cached is not None:
+            version.architecture = copy.deepcopy(cached)
+            return version
+
+        chain = await ModelVersion.find(
+            ModelVersion.model_id == version.model_id,
+            ModelVersion.version_number >= self.snapshot_number(version),
+            ModelVersion.version_number <= version.version_number,
+        ).sort(+ModelVersion.version_number).to_list()
+
+        expected = list(range(self.snapshot_number(version), version.version_number + 1))
+        if [v.version_number for v in chain] != expected or chain[0].architecture_patch is not None:
+            raise RuntimeError(
+                f"Version history for model {version.model_id} is incomplete; "
+                f"cannot reconstruct version {version.version_number}"
+            )
+
+        # Start from the most recent link we already have materialised
+        start, architecture = 0, chain[0].architecture
+        for index in range(len(chain) - 1, 0, -1):
+            cached = self._cache.get(str(chain[index].id))
+            if cached is not None:
+                start, architecture = index, cached
+                break
+
+        for link in chain[start + 1:]:
+            architecture = apply_patch(architecture, link.architecture_patch)
+            self._cache.set(str(link.id), architecture)
+
+        version.architecture = copy.deepcopy(architecture)
+        return version
+
+    async def resolve_many(self, versions: List[ModelVersion]) -> List[ModelVersion]:
+        """Materialise a list of versions, reusing consecutive versions as patch bases"""
+        previous: Optional[ModelVersion] = None
+        for version in sorted(versions, key=lambda v: (str(v.model_id), v.version_number)):
+            await self.resolve_after(version, previous)
+            previous = version
+        return versions
+
+    async def resolve_after(self, version: ModelVersion, previous: Optional[ModelVersion]) -> ModelVersion:
+        """
+        Materialise `version` given the already materialised version before it
+
+        Used when walking a model's history in order (listing, bulk export) so
+        each delta is applied once instead of replaying the chain per version.
+        """
+        if (
+            version.architecture_patch is not None
+            and previous is not None
+            and previous.model_id == version.model_id
+            and previous.version_number == version.version_number - 1
+        ):
+            version.architecture = apply_patch(previous.architecture, version.architecture_patch)
+            self._cache.set(str(version.id), copy.deepcopy(version.architecture))
+            return version
+        return await self.resolve(version)
+
+version_store = VersionStore()
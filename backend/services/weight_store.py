@@ -0,0 +1,120 @@
+"""
+Model weights shared between server processes through memory-mapped files
+
+With several uvicorn workers each process would otherwise build (and keep)
+its own copy of every model's parameters. Instead, the first process to
+need an artifact key saves the state dict to a directory owned by the
+launcher (tmpfs under /dev/shm, so nothing touches disk), and every process
+builds the modules on the meta device and attaches the parameters with
+`torch.load(mmap=True)` + `load_state_dict(assign=True)`. Read-only pages
+of the mapping are shared by the kernel, so adding workers does not add
+copies of the weights.
+"""
+import os
+import tempfile
+import warnings
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+from backend.core.config import settings
+
+class SharedWeightStore:
+    """Directory of `<artifact key>.pt` state dicts, memory-mapped on load"""
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    def path_for(self, key: str) -> Path:
+        return self.directory / f"{key}.pt"
+
+    def load(self, key: str, build: Callable[[], Any]) -> Any:
+        """
+        Return the model for `key` with memory-mapped parameters (blocking)
+
+        Args:
+            key: Artifact key; equal keys must produce equal weights
+            build: Builds the model with its weights. Called once per key to
+                create the file, then under the meta device to get the
+                module structure without allocating parameters.
+        """
+        import torch
+
+        path = self.path_for(key)
+        try:
+            state = self._map(path)
+        except FileNotFoundError:
+            # Not written yet, or pruned by another worker since; an open mapping survives pruning
+            self._create(path, build)
+            state = self._map(path)
+        try:
+            with torch.device("meta"):
+                model = build()
+        except Exception:
+            # A layer that cannot be built on meta still works; its temporary weights are replaced below
+            model = build()
+        model.load_state_dict(state, assign=True)
+        if any(t.is_meta for t in list(model.parameters()) + list(model.buffers())):
+            # Non-persistent buffers are not in the state dict; build them for real
+            model = build()
+            model.load_state_dict(state, assign=True)
+        return model.eval()
+
+    def _map(self, path: Path) -> Dict[str, Any]:
+        import torch
+
+        with warnings.catch_warnings():
+            # torch 2.1's mmap loader goes through the deprecated TypedStorage API internally
+            warnings.filterwarnings("ignore", message="TypedStorage is deprecated")
+            return torch.load(str(path), mmap=True, weights_only=True)
+
+    def _lock_path(self, path: Path) -> Path:
+        return self.directory / f"{path.stem}.lock"
+
+    def _create(self, path: Path, build: Callable[[], Any]) -> None:
+        """Build and write the weights file unless another process already has"""
+        import fcntl
+        import torch
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # One process builds while the others wait, then all of them map the same file;
+        # replacing it after someone mapped it would leave them with a private copy
+        with open(self._lock_path(path), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            if path.exists():
+                return
+            fd, tmp_name = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            os.close(fd)
+            try:
+                torch.save(build().state_dict(), tmp_name)
+                os.replace(tmp_name, path)
+            finally:
+                if os.path.exists(tmp_name):
+                    os.remove(tmp_name)
+        self._prune(keep=path)
+
+    def _prune(self, keep: Path) -> None:
+        """Delete least recently written files beyond the size budget (mapped copies stay valid)"""
+        # Other workers prune the same directory; files may vanish between listing and stat
+        files = []
+        for file in self.directory.glob("*.pt"):
+            try:
+                stat = file.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, file))
+        total = sum(size for _, size, _ in files)
+        for _, size, old in sorted(files):
+            if total <= self.max_bytes:
+                break
+            if old == keep:
+                continue
+            total -= size
+            # The empty `.lock` file stays: another worker may be waiting on it in `_create`,
+            # and a new inode at the same path would let a second builder in
+            old.unlink(missing_ok=True)
+
+shared_weights: Optional[SharedWeightStore] = (
+    SharedWeightStore(settings.SHARED_WEIGHTS_DIR, settings.SHARED_WEIGHTS_MAX_BYTES)
+    if settings.SHARED_WEIGHTS_DIR
+    else None
+)
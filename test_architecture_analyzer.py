@@ -0,0 +1,63 @@
+"""
+Unit tests for the local architecture heuristics
+Run with: python -m pytest test_architecture_analyzer.py
+"""
+from backend.services.architecture_analyzer import ArchitectureAnalyzer, input_shape_from_stats
+
+def _conv(channels):
+    return {"type": "Conv2d", "params": {"out_channels": channels, "kernel_size": 3, "padding": 1}}
+
+ARCHITECTURE = {"layers": [
+    _conv(16), {"type": "ReLU"}, {"type": "MaxPool2d", "params": {"kernel_size": 2}},
+    {"type": "Flatten"}, {"type": "Linear", "params": {"out_features": 5}},
+]}
+
+def _parameters(result):
+    return [suggestion["parameter"] for suggestion in result["suggestions"]]
+
+def test_input_shape_accepts_scalar_and_list_sizes():
+    assert input_shape_from_stats({}) == (3, 224, 224)
+    assert input_shape_from_stats({"imageSize": 32, "channels": 1}) == (1, 32, 32)
+    assert input_shape_from_stats({"imageSize": [28, 36]}) == (3, 28, 36)
+    assert input_shape_from_stats({"imageSize": ["big"], "channels": None}) == (3, 224, 224)
+
+def test_output_size_is_checked_against_the_number_of_classes():
+    stats = {"imageSize": [32, 32], "classDistribution": {str(i): "unknown" for i in range(10)}}
+    result = ArchitectureAnalyzer().analyze(ARCHITECTURE, stats)
+    output = next(s for s in result["suggestions"] if s["parameter"].startswith("Output layer"))
+    assert output["suggested_value"] == "out_features=10"
+
+def test_malformed_dataset_stats_do_not_raise():
+    stats = {"imageSize": "32", "channels": "rgb", "totalSamples": "many", "classDistribution": ["a", "b"]}
+    result = ArchitectureAnalyzer().analyze(ARCHITECTURE, stats)
+    assert result["engine"] == "local"
+    assert "Class Balance" not in _parameters(result)
+
+def test_class_imbalance_skips_non_numeric_counts():
+    stats = {"imageSize": [32, 32], "classDistribution": {"a": 1000, "b": "n/a", "c": 50, "d": 0, "e": 100, "f": 100}}
+    assert "Class Balance" in _parameters(ArchitectureAnalyzer().analyze(ARCHITECTURE, stats))
+
+def test_malformed_training_metrics_do_not_raise():
+    metrics = [
+        {"trainLoss": "n/a", "valLoss": None},
+        {"trainLoss": 1.0, "valLoss": "oops", "trainAcc": True},
+        {"epoch": 3},
+    ]
+    result = ArchitectureAnalyzer().analyze(ARCHITECTURE, {"imageSize": [32, 32]}, metrics)
+    assert "Learning Rate" not in _parameters(result)
+
+def test_early_stopping_uses_the_best_reported_epoch():
+    metrics = [
+        {"trainLoss": 1.0, "valLoss": 1.0},
+        {"trainLoss": 0.5, "valLoss": 0.6},
+        {"trainLoss": 0.3, "valLoss": "nan?"},
+        {"trainLoss": 0.1, "valLoss": 0.9},
+    ]
+    result = ArchitectureAnalyzer().analyze(ARCHITECTURE, {"imageSize": [32, 32]}, metrics)
+    epochs = next(s for s in result["suggestions"] if s["parameter"] == "Epochs")
+    assert epochs["suggested_value"] == "2"
+
+def test_empty_architecture():
+    result = ArchitectureAnalyzer().analyze({}, None)
+    assert result["suggestions"] == []
+    assert "no layers" in result["analysis"]
@@ -0,0 +1,131 @@
+"""
+Unit tests for TorchScript/ONNX artifact export and the artifact cache
+Run with: python -m pytest test_artifact_exporter.py
+"""
+import asyncio
+import os
+import time
+from types import SimpleNamespace
+import pytest
+import torch
+from backend.services.artifact_exporter import (
+    FORMAT_ONNX,
+    FORMAT_TORCHSCRIPT,
+    ONNX_INPUT_NAME,
+    ArtifactExporter,
+    artifact_key,
+    build_eval_model,
+)
+
+ARCHITECTURE = {"layers": [
+    {"type": "Conv2d", "params": {"in_channels": 3, "out_channels": 4, "kernel_size": 3, "padding": 1}},
+    {"type": "ReLU", "params": {}},
+    {"type": "Flatten", "params": {}},
+    {"type": "Linear", "params": {"out_features": 5}},
+]}
+INPUT_SHAPE = [1, 3, 8, 8]
+KEY = artifact_key("hash", INPUT_SHAPE)
+
+def _version(architecture=ARCHITECTURE):
+    return SimpleNamespace(
+        id="v1", architecture=architecture, architecture_hash="hash", architecture_patch=None,
+        input_shape=INPUT_SHAPE,
+    )
+
+def test_artifact_key_depends_on_hash_and_shape():
+    assert artifact_key("a", [1, 3, 8, 8]) == artifact_key("a", [1.0, 3, 8, 8])
+    assert artifact_key("a", [1, 3, 8, 8]) != artifact_key("a", [1, 3, 16, 16])
+    assert artifact_key("a", [1, 3, 8, 8]) != artifact_key("b", [1, 3, 8, 8])
+
+def test_eval_models_are_deterministic_per_key():
+    state = torch.get_rng_state()
+    first = build_eval_model(ARCHITECTURE, INPUT_SHAPE, KEY)
+    second = build_eval_model(ARCHITECTURE, INPUT_SHAPE, KEY)
+    other = build_eval_model(ARCHITECTURE, INPUT_SHAPE, artifact_key("other", INPUT_SHAPE))
+    assert torch.equal(torch.get_rng_state(), state)
+    assert not first.training
+    x = torch.randn(2, 3, 8, 8)
+    assert torch.equal(first(x), second(x))
+    assert not torch.equal(first(x), other(x))
+
+def test_torchscript_export_matches_the_model(tmp_path):
+    path = ArtifactExporter(str(tmp_path), 1 << 30).build(ARCHITECTURE, INPUT_SHAPE, FORMAT_TORCHSCRIPT, KEY)
+    assert path.suffix == ".pt"
+    x = torch.randn(3, 3, 8, 8)
+    expected = build_eval_model(ARCHITECTURE, INPUT_SHAPE, KEY)(x)
+    assert torch.allclose(torch.jit.load(str(path))(x), expected)
+    assert not list(tmp_path.glob("*.tmp"))
+
+def test_onnx_export_has_a_dynamic_batch_axis(tmp_path):
+    ort = pytest.importorskip("onnxruntime")
+    path = ArtifactExporter(str(tmp_path), 1 << 30).build(ARCHITECTURE, INPUT_SHAPE, FORMAT_ONNX, KEY)
+    x = torch.randn(4, 3, 8, 8)
+    expected = build_eval_model(ARCHITECTURE, INPUT_SHAPE, KEY)(x).detach().numpy()
+    output = ort.InferenceSession(str(path), providers=["CPUExecutionProvider"]).run(None, {ONNX_INPUT_NAME: x.numpy()})[0]
+    assert output.shape == (4, 5)
+    assert abs(output - expected).max() < 1e-4
+
+def test_failed_build_raises_value_error_and_leaves_nothing(tmp_path):
+    exporter = ArtifactExporter(str(tmp_path), 1 << 30)
+    with pytest.raises(ValueError):
+        exporter.build({"layers": [{"type": "NoSuchLayer", "params": {}}]}, INPUT_SHAPE, FORMAT_TORCHSCRIPT, KEY)
+    assert list(tmp_path.iterdir()) == []
+
+def test_concurrent_gets_build_once_and_release_the_lock(tmp_path):
+    exporter = ArtifactExporter(str(tmp_path), 1 << 30)
+    builds = []
+
+    async def run(func, *args):
+        builds.append(args)
+        await asyncio.sleep(0.02)
+        return func(*args)
+
+    async def main():
+        paths = await asyncio.gather(*(exporter.get(_version(), FORMAT_TORCHSCRIPT, run=run) for _ in range(4)))
+        return set(paths)
+
+    paths = asyncio.run(main())
+    assert len(builds) == 1
+    assert len(paths) == 1 and next(iter(paths)).exists()
+    assert exporter._locks == {}
+
+def test_failed_get_releases_the_lock(tmp_path):
+    exporter = ArtifactExporter(str(tmp_path), 1 << 30)
+
+    async def run(func, *args):
+        raise RuntimeError("build failed")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(exporter.get(_version(), FORMAT_ONNX, run=run))
+    assert exporter._locks == {}
+    with pytest.raises(ValueError):
+        asyncio.run(exporter.get(_version(), "tflite"))
+
+def _artifact(directory, name, size, age):
+    path = directory / name
+    path.write_bytes(b"x" * size)
+    stamp = time.time() - age
+    os.utime(path, (stamp, stamp))
+    return path
+
+def test_prune_removes_oldest_beyond_the_budget(tmp_path):
+    exporter = ArtifactExporter(str(tmp_path), 250)
+    oldest = _artifact(tmp_path, "a.pt", 100, 300)
+    middle = _artifact(tmp_path, "b.onnx", 100, 200)
+    newest = _artifact(tmp_path, "c.pt", 100, 100)
+    other = _artifact(tmp_path, "notes.txt", 1000, 400)
+    exporter._prune(keep=newest)
+    assert not oldest.exists()
+    assert middle.exists() and newest.exists() and other.exists()
+
+def test_prune_skips_kept_and_recently_returned_paths(tmp_path):
+    exporter = ArtifactExporter(str(tmp_path), 100)
+    served = _artifact(tmp_path, "a.pt", 100, 300)
+    stale = _artifact(tmp_path, "b.pt", 100, 200)
+    kept = _artifact(tmp_path, "c.pt", 100, 100)
+    exporter._recent[served] = time.monotonic()
+    exporter._recent[stale] = time.monotonic() - 10_000
+    exporter._prune(keep=kept)
+    assert served.exists() and kept.exists()
+    assert not stale.exists()
+    assert stale not in exporter._recent
@@ -0,0 +1,96 @@
+"""
+Unit tests for backend benchmarking and selection
+Run with: python -m pytest test_autotuner.py
+"""
+import numpy as np
+import pytest
+from backend.services.autotuner import AGREEMENT_SAMPLES, benchmark_backends, pick_backend
+from backend.services.inference_backends import (
+    BACKEND_EAGER,
+    BACKEND_ONNXRUNTIME,
+    BACKEND_QUANTIZED,
+    BACKEND_TRACED,
+    TORCH_BACKENDS,
+    InferenceBackend,
+    available_backends,
+)
+from backend.services.artifact_exporter import artifact_key
+
+INPUT_SHAPE = [1, 3, 4, 4]
+WEIGHTS = np.random.default_rng(1).standard_normal((48, 6)).astype(np.float32)
+
+class Linear(InferenceBackend):
+    """Fixed linear classifier, optionally perturbed or failing"""
+
+    def __init__(self, noise=0.0, shuffle=False, fail=False):
+        self.noise = noise
+        self.shuffle = shuffle
+        self.fail = fail
+        self.calls = 0
+
+    def predict(self, input_array):
+        if self.fail:
+            raise RuntimeError("backend crashed")
+        self.calls += 1
+        output = input_array.reshape(len(input_array), -1) @ WEIGHTS + self.noise
+        # Reversed logits: same values, different top-1
+        return output[:, ::-1] if self.shuffle else output
+
+def _benchmark(backends, **kwargs):
+    kwargs.setdefault("rtol", 1e-4)
+    kwargs.setdefault("atol", 1e-4)
+    return benchmark_backends({BACKEND_EAGER: Linear(), **backends}, INPUT_SHAPE, iterations=3, **kwargs)
+
+def test_exact_backends_must_match_within_tolerance():
+    results = _benchmark({BACKEND_TRACED: Linear(noise=1e-6), BACKEND_ONNXRUNTIME: Linear(noise=0.5)})
+    assert results[BACKEND_EAGER]["within_tolerance"]
+    assert results[BACKEND_TRACED]["within_tolerance"]
+    assert not results[BACKEND_ONNXRUNTIME]["within_tolerance"]
+    assert results[BACKEND_ONNXRUNTIME]["max_abs_diff"] == pytest.approx(0.5)
+    assert all(r["median_ms"] >= 0 for r in results.values())
+
+def test_approximate_backends_are_judged_on_top1_agreement():
+    # Off by a constant: fails a float tolerance but never changes the predicted class
+    close = _benchmark({BACKEND_QUANTIZED: Linear(noise=0.5)})[BACKEND_QUANTIZED]
+    assert close["top1_agreement"] == 1.0
+    assert close["within_tolerance"]
+
+    wrong = _benchmark({BACKEND_QUANTIZED: Linear(shuffle=True)})[BACKEND_QUANTIZED]
+    assert wrong["top1_agreement"] < 0.95
+    assert not wrong["within_tolerance"]
+
+def test_agreement_threshold_is_configurable():
+    quantized = Linear(shuffle=True)
+    result = _benchmark({BACKEND_QUANTIZED: quantized}, min_agreement=0.0)[BACKEND_QUANTIZED]
+    assert result["within_tolerance"]
+    assert quantized.calls >= AGREEMENT_SAMPLES
+
+def test_failing_backend_is_reported_not_raised():
+    result = _benchmark({BACKEND_TRACED: Linear(fail=True)})[BACKEND_TRACED]
+    assert result == {"error": "backend crashed", "within_tolerance": False}
+
+def test_pick_backend_prefers_the_fastest_accurate_one():
+    results = {
+        BACKEND_EAGER: {"median_ms": 5.0, "within_tolerance": True},
+        BACKEND_TRACED: {"median_ms": 3.0, "within_tolerance": True},
+        BACKEND_QUANTIZED: {"median_ms": 1.0, "within_tolerance": False},
+        BACKEND_ONNXRUNTIME: {"error": "missing", "within_tolerance": False},
+    }
+    assert pick_backend(results) == BACKEND_TRACED
+    assert pick_backend({BACKEND_QUANTIZED: results[BACKEND_QUANTIZED]}) == BACKEND_EAGER
+
+def test_real_quantized_classifier_passes_the_agreement_check():
+    if BACKEND_QUANTIZED not in available_backends():
+        pytest.skip("No quantization engine in this build")
+    architecture = {"layers": [
+        {"type": "Flatten", "params": {}},
+        {"type": "Linear", "params": {"out_features": 64}},
+        {"type": "ReLU", "params": {}},
+        {"type": "Linear", "params": {"out_features": 10}},
+    ]}
+    shape = [1, 3, 16, 16]
+    key = artifact_key("hash", shape)
+    backends = {name: TORCH_BACKENDS[name].from_architecture(architecture, shape, key) for name in (BACKEND_EAGER, BACKEND_QUANTIZED)}
+    result = benchmark_backends(backends, shape, iterations=2, rtol=1e-4, atol=1e-4)[BACKEND_QUANTIZED]
+    assert result["top1_agreement"] >= 0.95
+    assert result["within_tolerance"]
@@ -0,0 +1,74 @@
+"""
+Unit tests for the generated code cache
+Run with: python -m pytest test_code_cache.py
+"""
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import pytest
+from backend.services import code_cache as code_cache_module
+from backend.services.code_cache import CodeCache, iter_chunks
+from backend.services.code_generator import TARGET_OPTIMIZED, TARGET_STANDARD
+
+CREATED = datetime(2024, 1, 1)
+
+class FakeGenerator:
+    """Records every generation instead of building code"""
+
+    calls = []
+
+    def __init__(self, version):
+        self.version = version
+
+    def generate(self, model_name, target):
+        FakeGenerator.calls.append((model_name, target))
+        return f"# {model_name} {target} {self.version.architecture_hash} ü"
+
+@pytest.fixture(autouse=True)
+def generator(monkeypatch):
+    FakeGenerator.calls = []
+    monkeypatch.setattr(code_cache_module, "CodeGenerator", FakeGenerator)
+    return FakeGenerator
+
+def _version(arch_hash="h1", updated_at=None):
+    return SimpleNamespace(
+        id="v1", created_at=CREATED, updated_at=updated_at,
+        architecture_hash=arch_hash, architecture_patch=None, architecture={"layers": []},
+    )
+
+def _get(cache, version, name="Net", target=TARGET_STANDARD):
+    return asyncio.run(cache.get(version, name, target))
+
+def test_hits_do_not_regenerate(generator):
+    cache = CodeCache(8)
+    first = _get(cache, _version())
+    assert _get(cache, _version()) is first
+    assert generator.calls == [("Net", TARGET_STANDARD)]
+    assert first.data == first.text.encode("utf-8")
+
+def test_update_time_and_architecture_hash_invalidate(generator):
+    cache = CodeCache(8)
+    _get(cache, _version())
+    _get(cache, _version(updated_at=CREATED + timedelta(seconds=1)))
+    changed = _get(cache, _version(arch_hash="h2"))
+    assert len(generator.calls) == 3
+    assert "h2" in changed.text
+
+def test_model_name_and_target_are_part_of_the_key(generator):
+    cache = CodeCache(8)
+    _get(cache, _version(), name="Net")
+    _get(cache, _version(), name="Other")
+    _get(cache, _version(), target=TARGET_OPTIMIZED)
+    _get(cache, _version(), target=TARGET_OPTIMIZED)
+    assert generator.calls == [("Net", TARGET_STANDARD), ("Other", TARGET_STANDARD), ("Net", TARGET_OPTIMIZED)]
+
+def test_cache_is_bounded(generator):
+    cache = CodeCache(2)
+    for name in ("a", "b", "c"):
+        _get(cache, _version(), name=name)
+    _get(cache, _version(), name="a")
+    assert [call[0] for call in generator.calls] == ["a", "b", "c", "a"]
+
+def test_iter_chunks():
+    assert list(iter_chunks(b"abcdefg", 3)) == [b"abc", b"def", b"g"]
+    assert list(iter_chunks(b"", 3)) == []
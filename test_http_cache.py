@@ -0,0 +1,46 @@
+"""
+Unit tests for ETag generation and If-None-Match handling
+Run with: python -m pytest test_http_cache.py
+"""
+from fastapi import Response
+from starlette.requests import Request
+from backend.core.http_cache import PRIVATE_REVALIDATE, etag_matches, make_etag, not_modified, set_cache_headers
+
+def _request(if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match is not None else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+def test_make_etag_is_quoted_and_stable():
+    etag = make_etag("version", 3, "abc")
+    assert etag.startswith('"') and etag.endswith('"') and len(etag) == 34
+    assert etag == make_etag("version", 3, "abc")
+
+def test_make_etag_separates_parts():
+    assert make_etag("ab", "c") != make_etag("a", "bc")
+    assert make_etag("a", 1) != make_etag("a", 2)
+
+def test_etag_matching_uses_weak_comparison():
+    etag = make_etag("x")
+    assert etag_matches(etag, etag)
+    assert etag_matches(f"W/{etag}", etag)
+    assert etag_matches(etag, f"W/{etag}")
+    assert etag_matches(f'"other", {etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches("", etag)
+
+def test_not_modified_returns_304_with_cache_headers():
+    etag = make_etag("x")
+    response = not_modified(_request(etag), etag)
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.headers["Cache-Control"] == PRIVATE_REVALIDATE
+    assert not_modified(_request('"stale"'), etag) is None
+    assert not_modified(_request(), etag) is None
+
+def test_set_cache_headers():
+    response = Response()
+    set_cache_headers(response, '"abc"', "private, max-age=60")
+    assert response.headers["ETag"] == '"abc"'
+    assert response.headers["Cache-Control"] == "private, max-age=60"
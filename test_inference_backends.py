@@ -0,0 +1,120 @@
+"""
+Unit tests for the prediction-only inference backends
+Run with: python -m pytest test_inference_backends.py
+"""
+import asyncio
+import sys
+from types import SimpleNamespace
+import numpy as np
+import pytest
+import torch
+from backend.core.config import settings
+from backend.services import inference_backends
+from backend.services.artifact_exporter import FORMAT_ONNX, ArtifactExporter, artifact_key, build_eval_model
+from backend.services.inference_backends import (
+    BACKEND_EAGER,
+    BACKEND_ONNXRUNTIME,
+    BACKEND_QUANTIZED,
+    BACKEND_TRACED,
+    TORCH_BACKENDS,
+    BackendPool,
+    InferenceBackend,
+    OnnxRuntimeBackend,
+    available_backends,
+    onnxruntime_available,
+    run_prediction,
+)
+
+ARCHITECTURE = {"layers": [
+    {"type": "Conv2d", "params": {"in_channels": 3, "out_channels": 4, "kernel_size": 3, "padding": 1}},
+    {"type": "BatchNorm2d", "params": {"num_features": 4}},
+    {"type": "ReLU", "params": {}},
+    {"type": "Flatten", "params": {}},
+    {"type": "Linear", "params": {"out_features": 5}},
+]}
+INPUT_SHAPE = [1, 3, 8, 8]
+KEY = artifact_key("hash", INPUT_SHAPE)
+
+def _expected(batch):
+    with torch.no_grad():
+        return build_eval_model(ARCHITECTURE, INPUT_SHAPE, KEY)(torch.from_numpy(batch)).numpy()
+
+@pytest.mark.parametrize("name", [BACKEND_EAGER, BACKEND_TRACED])
+def test_exact_torch_backends_match_eager(name):
+    batch = np.random.default_rng(0).random((2, 3, 8, 8), dtype=np.float32)
+    backend = TORCH_BACKENDS[name].from_architecture(ARCHITECTURE, INPUT_SHAPE, KEY)
+    assert backend.name == name
+    assert np.allclose(backend.predict(batch), _expected(batch), atol=1e-5)
+
+def test_quantized_backend_keeps_the_output_shape():
+    if BACKEND_QUANTIZED not in available_backends():
+        pytest.skip("No quantization engine in this build")
+    batch = np.random.default_rng(0).random((2, 3, 8, 8), dtype=np.float32)
+    backend = TORCH_BACKENDS[BACKEND_QUANTIZED].from_architecture(ARCHITECTURE, INPUT_SHAPE, KEY)
+    output = backend.predict(batch)
+    assert output.shape == (2, 5)
+    assert np.abs(output - _expected(batch)).max() < 0.1
+
+def test_onnxruntime_backend_checks_the_input_shape(tmp_path):
+    pytest.importorskip("onnxruntime")
+    path = ArtifactExporter(str(tmp_path), 1 << 30).build(ARCHITECTURE, INPUT_SHAPE, FORMAT_ONNX, KEY)
+    backend = OnnxRuntimeBackend(str(path))
+    batch = np.random.default_rng(0).random((3, 3, 8, 8), dtype=np.float32)
+    assert np.allclose(backend.predict(batch), _expected(batch), atol=1e-4)
+    with pytest.raises(ValueError):
+        backend.predict(np.zeros((1, 3, 16, 16), dtype=np.float32))
+    with pytest.raises(ValueError):
+        OnnxRuntimeBackend(str(path), graph_optimization_level="maximum")
+
+def test_missing_onnxruntime_falls_back_to_eager(monkeypatch):
+    # A None entry makes `import onnxruntime` raise ImportError
+    monkeypatch.setitem(sys.modules, "onnxruntime", None)
+    assert not onnxruntime_available()
+    assert BACKEND_ONNXRUNTIME not in available_backends()
+    pool = BackendPool(4)
+    assert pool.resolve_name(BACKEND_ONNXRUNTIME) == BACKEND_EAGER
+    monkeypatch.setattr(settings, "INFERENCE_PREDICTION_BACKEND", BACKEND_ONNXRUNTIME)
+    assert pool.resolve_name(None) == BACKEND_EAGER
+    assert pool.resolve_name(BACKEND_TRACED) == BACKEND_TRACED
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        BackendPool(4).resolve_name("tensorrt")
+
+def test_incomplete_backend_fails_at_construction():
+    class Incomplete(InferenceBackend):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+def test_run_prediction_summarizes_the_output():
+    class Fixed(InferenceBackend):
+        name = "fixed"
+
+        def predict(self, input_array):
+            return np.array([[0.0, 3.0, 1.0]], dtype=np.float32)
+
+    result = run_prediction(Fixed(), [0.0] * 12, [1, 3, 2, 2])
+    assert result["backend"] == "fixed"
+    assert result["predicted_class"] == 1
+    assert result["output_shape"] == [1, 3]
+    assert result["layer_outputs"] == []
+
+def test_pool_loads_each_backend_once(monkeypatch):
+    version = SimpleNamespace(id="v1", architecture=ARCHITECTURE, architecture_hash="hash", architecture_patch=None, input_shape=INPUT_SHAPE)
+    loads = []
+
+    async def run(func, *args):
+        loads.append(args)
+        return func(*args)
+
+    async def main():
+        pool = BackendPool(4)
+        first = await pool.get(version, BACKEND_EAGER, run=run)
+        second = await pool.get(version, BACKEND_EAGER, run=run)
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert first is second
+    assert len(loads) == 1 and loads[0][2] == KEY
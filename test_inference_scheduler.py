@@ -0,0 +1,100 @@
+"""
+Unit tests for deficit round robin scheduling of inference work
+Run with: python -m pytest test_inference_scheduler.py
+"""
+import asyncio
+import time
+from types import SimpleNamespace
+import pytest
+from backend.services import inference_scheduler
+from backend.services.inference_scheduler import (
+    PRIORITY_BATCH,
+    PRIORITY_INTERACTIVE,
+    FairScheduler,
+    SchedulerQueueFull,
+    SchedulerShutdown,
+)
+
+def _run_order(scheduler, jobs):
+    """Submit (tenant, priority, cost) jobs in one go and return the tenants in execution order"""
+    order = []
+
+    async def main():
+        tasks = [
+            asyncio.create_task(scheduler.submit(tenant, order.append, tenant, priority=priority, cost=cost))
+            for tenant, priority, cost in jobs
+        ]
+        await asyncio.gather(*tasks)
+        await scheduler.shutdown()
+
+    asyncio.run(main())
+    return order
+
+def test_tenants_alternate_instead_of_first_come_first_served():
+    jobs = [("heavy", PRIORITY_INTERACTIVE, 1.0)] * 6 + [("light", PRIORITY_INTERACTIVE, 1.0)] * 2
+    order = _run_order(FairScheduler(1), jobs)
+    assert order[:4] == ["heavy", "light", "heavy", "light"]
+    assert order.count("heavy") == 6
+
+def test_weights_set_the_share_per_round():
+    jobs = [("a", PRIORITY_INTERACTIVE, 1.0)] * 6 + [("b", PRIORITY_INTERACTIVE, 1.0)] * 6
+    order = _run_order(FairScheduler(1, weights={"a": 2.0}), jobs)
+    assert order[:6] == ["a", "a", "b", "a", "a", "b"]
+
+def test_costly_jobs_wait_for_enough_credit():
+    jobs = [("big", PRIORITY_INTERACTIVE, 3.0)] * 2 + [("small", PRIORITY_INTERACTIVE, 1.0)] * 4
+    order = _run_order(FairScheduler(1), jobs)
+    # One 3-unit job per three 1-unit jobs of the other tenant
+    assert order.index("big") >= 2
+    assert order[:4].count("small") == 3
+
+def test_interactive_jobs_run_before_batch_jobs():
+    jobs = [("a", PRIORITY_BATCH, 1.0)] * 3 + [("b", PRIORITY_INTERACTIVE, 1.0)] * 2
+    order = _run_order(FairScheduler(1), jobs)
+    assert order[:2] == ["b", "b"]
+
+def test_queue_limit_per_tenant():
+    async def main():
+        scheduler = FairScheduler(1, max_queue_per_tenant=2)
+        tasks = [asyncio.create_task(scheduler.submit("a", time.sleep, 0.01)) for _ in range(3)]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        await scheduler.shutdown()
+        return results
+
+    results = asyncio.run(main())
+    assert sum(isinstance(r, SchedulerQueueFull) for r in results) == 1
+
+def test_shutdown_fails_queued_jobs_and_rejects_new_ones():
+    async def main():
+        scheduler = FairScheduler(1)
+        tasks = [asyncio.create_task(scheduler.submit("a", time.sleep, 0.2)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        await scheduler.shutdown()
+        results = await asyncio.wait_for(asyncio.gather(*tasks, return_exceptions=True), timeout=2)
+        with pytest.raises(SchedulerShutdown):
+            await scheduler.submit("a", time.sleep, 0)
+        return results, scheduler.stats()
+
+    results, stats = asyncio.run(main())
+    assert all(isinstance(r, SchedulerShutdown) for r in results)
+    assert stats["queued"] == 0
+
+def test_idle_tenant_stats_are_dropped(monkeypatch):
+    now = [1000.0]
+    # Only the scheduler's clock; the event loop keeps the real one
+    monkeypatch.setattr(inference_scheduler, "time", SimpleNamespace(monotonic=lambda: now[0]))
+
+    async def main():
+        scheduler = FairScheduler(1, stats_idle_seconds=60)
+        for tenant in ("a", "b"):
+            await scheduler.submit(tenant, int)
+        now[0] += 30
+        await scheduler.submit("a", int)
+        now[0] += 45
+        # "b" has been idle for 75s, "a" for 45s
+        await scheduler.submit("c", int)
+        tenants = set(scheduler.stats()["tenants"])
+        await scheduler.shutdown()
+        return tenants
+
+    assert asyncio.run(main()) == {"a", "c"}
@@ -0,0 +1,64 @@
+"""
+Unit tests for the in-process metrics and their text exposition format
+Run with: python -m pytest test_metrics.py
+"""
+import pytest
+from backend.core import metrics
+from backend.core.metrics import Counter, Gauge, Histogram, render
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    """Register the metrics of each test in a fresh registry"""
+    monkeypatch.setattr(metrics, "REGISTRY", [])
+
+def test_counter_with_labels():
+    requests = Counter("requests_total", "Requests served", ("endpoint", "status"))
+    requests.inc(endpoint="predict", status="200")
+    requests.inc(2, endpoint="predict", status="200")
+    requests.inc(endpoint="predict", status="429")
+    assert render().splitlines() == [
+        "# HELP requests_total Requests served",
+        "# TYPE requests_total counter",
+        'requests_total{endpoint="predict",status="200"} 3.0',
+        'requests_total{endpoint="predict",status="429"} 1.0',
+    ]
+
+def test_gauge_without_labels():
+    depth = Gauge("queue_depth", "Jobs waiting")
+    depth.set(4)
+    depth.dec()
+    assert render().splitlines()[-1] == "queue_depth 3.0"
+
+def test_set_function_is_read_at_scrape_time():
+    depth = Gauge("queue_depth", "Jobs waiting", ("executor",))
+    queue = [1, 2]
+    depth.set_function(lambda: len(queue), executor="training")
+    queue.append(3)
+    assert 'queue_depth{executor="training"} 3.0' in render()
+    assert depth.value(executor="training") == 3.0
+
+def test_histogram_buckets_are_cumulative():
+    latency = Histogram("latency_seconds", "Request latency", ("endpoint",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, endpoint="predict")
+    assert render().splitlines()[2:] == [
+        'latency_seconds_bucket{endpoint="predict",le="0.1"} 2',
+        'latency_seconds_bucket{endpoint="predict",le="1.0"} 3',
+        'latency_seconds_bucket{endpoint="predict",le="+Inf"} 4',
+        'latency_seconds_sum{endpoint="predict"} 3.65',
+        'latency_seconds_count{endpoint="predict"} 4',
+    ]
+    assert latency.snapshot(endpoint="predict") == {"count": 4, "sum": pytest.approx(3.65)}
+    assert latency.snapshot(endpoint="other") == {"count": 0, "sum": 0.0}
+
+def test_help_and_label_values_are_escaped():
+    errors = Counter("errors_total", 'Errors by "kind"\nper endpoint', ("kind",))
+    errors.inc(kind='bad "quote" \\ and\nnewline')
+    lines = render().splitlines()
+    assert lines[0] == '# HELP errors_total Errors by "kind"\\nper endpoint'
+    assert lines[2] == 'errors_total{kind="bad \\"quote\\" \\\\ and\\nnewline"} 1.0'
+
+def test_missing_labels_render_as_empty_strings():
+    events = Counter("events_total", "Events", ("kind", "source"))
+    events.inc(kind="start")
+    assert 'events_total{kind="start",source=""} 1.0' in render()
@@ -0,0 +1,108 @@
+"""
+Unit tests for the streaming model archive
+Run with: python -m pytest test_model_archive.py
+"""
+import asyncio
+import io
+import json
+import zipfile
+from datetime import datetime
+from types import SimpleNamespace
+import pytest
+from backend.services import model_archive
+from backend.services.code_cache import GeneratedCode
+from backend.services.model_archive import FILE_CHUNK_SIZE, iter_model_archive
+
+class FakeQuery:
+    def __init__(self, versions):
+        self.versions = versions
+
+    def sort(self, *args):
+        return self
+
+    async def __aiter__(self):
+        for version in self.versions:
+            yield version
+
+class FakeModelVersion:
+    """Stands in for the document class: `find` returns the versions given to the fixture"""
+
+    model_id = None
+    version_number = 0
+    versions = []
+
+    @classmethod
+    def find(cls, *args):
+        return FakeQuery(cls.versions)
+
+class FakeCodeCache:
+    async def get(self, version, model_name):
+        text = f"# {model_name} v{version.version_number}\n"
+        return GeneratedCode(text, text.encode("utf-8"))
+
+class FakeExporter:
+    def __init__(self, paths):
+        self.paths = paths
+
+    async def get(self, version, fmt, run=None):
+        path = self.paths[version.version_number]
+        if isinstance(path, Exception):
+            raise path
+        return path
+
+def _version(number):
+    return SimpleNamespace(
+        id=f"id{number}", model_id="m", version_number=number, created_at=datetime(2024, 1, number),
+        architecture={"layers": []}, architecture_patch=None,
+        input_shape=[1, 3, 8, 8], output_shape=[1, 10], class_labels=None, notes=None,
+    )
+
+@pytest.fixture
+def versions(monkeypatch):
+    FakeModelVersion.versions = [_version(1), _version(2)]
+    monkeypatch.setattr(model_archive, "ModelVersion", FakeModelVersion)
+    monkeypatch.setattr(model_archive, "code_cache", FakeCodeCache())
+    return FakeModelVersion.versions
+
+def _archive(**kwargs):
+    async def collect():
+        return [chunk async for chunk in iter_model_archive(SimpleNamespace(id="m", name="Net"), **kwargs)]
+    return asyncio.run(collect())
+
+def test_archive_has_code_and_metadata_per_version(versions):
+    chunks = _archive()
+    with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as archive:
+        assert archive.namelist() == ["v1/model.py", "v1/version.json", "v2/model.py", "v2/version.json"]
+        assert archive.read("v2/model.py") == b"# Net v2\n"
+        metadata = json.loads(archive.read("v1/version.json"))
+        assert metadata["id"] == "id1" and metadata["input_shape"] == [1, 3, 8, 8]
+        # Written to an unseekable sink: sizes follow the data in data descriptors
+        assert all(info.flag_bits & 0x08 for info in archive.infolist())
+    # Bytes are handed out per version, not at the end
+    assert len([chunk for chunk in chunks if chunk]) >= 3
+
+def test_torchscript_files_are_streamed_in_chunks(versions, monkeypatch, tmp_path):
+    payload = bytes(range(256)) * (3 * FILE_CHUNK_SIZE // 256 + 1)
+    for number in (1, 2):
+        (tmp_path / f"m{number}.pt").write_bytes(payload)
+    monkeypatch.setattr(model_archive, "artifact_exporter", FakeExporter({n: tmp_path / f"m{n}.pt" for n in (1, 2)}))
+    chunks = _archive(include_torchscript=True)
+    with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as archive:
+        assert archive.read("v1/model.pt") == payload
+        assert archive.read("v2/model.pt") == payload
+    assert max(len(chunk) for chunk in chunks) < len(payload)
+
+def test_failed_or_pruned_artifacts_become_error_files(versions, monkeypatch, tmp_path):
+    exporter = FakeExporter({1: RuntimeError("cannot trace"), 2: tmp_path / "pruned.pt"})
+    monkeypatch.setattr(model_archive, "artifact_exporter", exporter)
+    with zipfile.ZipFile(io.BytesIO(b"".join(_archive(include_torchscript=True)))) as archive:
+        names = archive.namelist()
+        assert "v1/model.pt" not in names and "v2/model.pt" not in names
+        assert archive.read("v1/model.pt.error.txt") == b"cannot trace"
+        assert b"pruned.pt" in archive.read("v2/model.pt.error.txt")
+        assert archive.testzip() is None
+
+def test_empty_model_gives_an_empty_archive(versions):
+    FakeModelVersion.versions = []
+    with zipfile.ZipFile(io.BytesIO(b"".join(_archive()))) as archive:
+        assert archive.namelist() == []
@@ -0,0 +1,83 @@
+"""
+Unit tests for the compact prompt serializer and the suggestion cache key
+Run with: python -m pytest test_prompt_serializer.py
+"""
+from backend.services.prompt_serializer import collapse_runs, estimate_tokens, serialize_architecture
+from backend.services.suggestion_cache import suggestion_key
+
+def _conv(channels, stride=1):
+    return {"type": "Conv2d", "params": {"out_channels": channels, "kernel_size": 3, "stride": stride, "padding": 1}}
+
+def _vgg_like(blocks=3, repeats=3):
+    layers = []
+    for block in range(blocks):
+        for _ in range(repeats):
+            layers += [_conv(64 * 2 ** block), {"type": "BatchNorm2d"}, {"type": "ReLU"}]
+        layers.append({"type": "MaxPool2d", "params": {"kernel_size": 2, "stride": 2}})
+    layers += [{"type": "Flatten"}, {"type": "Linear", "params": {"out_features": 10}}]
+    return {"layers": layers}
+
+def test_collapse_runs_single_and_block_repeats():
+    assert collapse_runs(["A", "A", "A", "B"]) == [(0, 1, 3), (3, 1, 1)]
+    assert collapse_runs(["A", "B", "A", "B", "A", "B", "C"]) == [(0, 2, 3), (6, 1, 1)]
+    assert collapse_runs(["A", "B", "C"]) == [(0, 1, 1), (1, 1, 1), (2, 1, 1)]
+    assert collapse_runs([]) == []
+
+def test_collapse_runs_prefers_the_block_removing_most_layers():
+    signatures = ["A", "A", "B", "A", "A", "B"]
+    assert collapse_runs(signatures) == [(0, 3, 2)]
+
+def test_collapse_runs_respects_max_block():
+    signatures = ["A", "B", "C"] * 2
+    assert collapse_runs(signatures, max_block=2) == [(i, 1, 1) for i in range(6)]
+
+def test_serialized_architecture_collapses_repeated_blocks():
+    text = serialize_architecture(_vgg_like(), {"imageSize": [32, 32], "channels": 3})
+    lines = text.splitlines()
+    assert lines[0].startswith("Input 3x32x32, 32 layers")
+    assert "3× [Conv2d(64,3x3,p1) → BN → ReLU] → 64x32x32" in text
+    assert len(lines) == 1 + 3 * 2 + 2
+
+def test_budget_drops_detail_before_eliding():
+    architecture = _vgg_like()
+    full = serialize_architecture(architecture, {"imageSize": [32, 32]})
+    assert "params" in full.splitlines()[1]
+    trimmed = serialize_architecture(architecture, {"imageSize": [32, 32]}, token_budget=estimate_tokens(full) - 10)
+    assert "params" not in "\n".join(trimmed.splitlines()[1:])
+    assert "omitted" not in trimmed
+
+def test_budget_elides_the_middle_but_keeps_stem_and_head():
+    layers = []
+    for i in range(60):
+        layers.append(_conv(8 + i))
+    layers += [{"type": "Flatten"}, {"type": "Linear", "params": {"out_features": 10}}]
+    text = serialize_architecture({"layers": layers}, {"imageSize": [16, 16]}, token_budget=120)
+    assert estimate_tokens(text) <= 120
+    assert "lines omitted" in text
+    assert "Conv2d(8,3x3,p1)" in text
+    assert "Linear(10)" in text
+
+def test_malformed_dataset_stats_fall_back_to_defaults():
+    text = serialize_architecture(_vgg_like(1, 1), {"imageSize": 32, "channels": "rgb"})
+    assert text.startswith("Input 3x32x32")
+
+def test_suggestion_key_covers_layer_format_architectures():
+    small = {"layers": [_conv(16)]}
+    large = {"layers": [_conv(32)]}
+    assert suggestion_key(small, {}) != suggestion_key(large, {})
+
+def test_suggestion_key_ignores_editor_only_fields():
+    def editor(node_ids, x):
+        nodes = [
+            {"id": node_ids[0], "position": {"x": x}, "data": {"type": "Conv2d", "config": {"out_channels": 16}}},
+            {"id": node_ids[1], "selected": True, "data": {"type": "ReLU", "config": {}}},
+        ]
+        return {"nodes": nodes, "edges": [{"id": "e", "source": node_ids[0], "target": node_ids[1]}]}
+
+    key = suggestion_key(editor(["a", "b"], 0), {"totalSamples": 10})
+    assert key == suggestion_key(editor(["x", "y"], 250), {"totalSamples": 10})
+    assert key == suggestion_key({"layers": [
+        {"type": "Conv2d", "params": {"out_channels": 16}},
+        {"type": "ReLU", "params": {}},
+    ]}, {"totalSamples": 10})
+    assert key != suggestion_key(editor(["a", "b"], 0), {"totalSamples": 11})
@@ -0,0 +1,104 @@
+"""
+Unit tests for token-bucket admission control
+Run with: python -m pytest test_rate_limit.py
+"""
+import asyncio
+import pytest
+from fastapi import HTTPException
+from backend.core import rate_limit
+from backend.core.rate_limit import (
+    MAX_RETRY_AFTER_SECONDS,
+    AdmissionController,
+    InMemoryRateLimitBackend,
+    RateLimitBackend,
+    inference_cost,
+    simulation_cost,
+)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", fake)
+    return fake
+
+def _consume(backend, cost, capacity=10.0, refill=1.0, key="user:1"):
+    return asyncio.run(backend.consume(key, cost, capacity, refill))
+
+def test_bucket_starts_full_and_refills(clock):
+    backend = InMemoryRateLimitBackend()
+    assert _consume(backend, 10) == 0.0
+    assert _consume(backend, 3) == pytest.approx(3.0)
+    clock.now += 3
+    assert _consume(backend, 3) == 0.0
+
+def test_buckets_are_per_key(clock):
+    backend = InMemoryRateLimitBackend()
+    assert _consume(backend, 10, key="a") == 0.0
+    assert _consume(backend, 10, key="b") == 0.0
+    assert _consume(backend, 1, key="a") > 0
+
+def test_refill_never_exceeds_capacity(clock):
+    backend = InMemoryRateLimitBackend()
+    _consume(backend, 10)
+    clock.now += 1000
+    assert _consume(backend, 10) == 0.0
+    assert _consume(backend, 1) > 0
+
+def test_full_buckets_are_pruned(clock):
+    backend = InMemoryRateLimitBackend(max_keys=2)
+    for key in "abc":
+        _consume(backend, 1, key=key)
+    clock.now += 100
+    _consume(backend, 1, key="d")
+    assert list(backend._buckets) == ["d"]
+
+def _admit(controller, cost, **kwargs):
+    asyncio.run(controller.admit("user:1", "test", cost, **kwargs))
+
+def test_admit_raises_429_with_retry_after(clock):
+    controller = AdmissionController(InMemoryRateLimitBackend(), capacity=10, refill_per_second=2)
+    _admit(controller, 10)
+    with pytest.raises(HTTPException) as error:
+        _admit(controller, 5)
+    assert error.value.status_code == 429
+    assert error.value.headers["Retry-After"] == "3"
+
+def test_oversized_cost_is_capped_unless_disallowed(clock):
+    controller = AdmissionController(InMemoryRateLimitBackend(), capacity=10, refill_per_second=1)
+    _admit(controller, 500)
+    with pytest.raises(HTTPException) as error:
+        _admit(controller, 500, cap_cost=False)
+    assert error.value.status_code == 400
+
+def test_retry_after_is_finite_when_buckets_never_refill(clock):
+    controller = AdmissionController(InMemoryRateLimitBackend(), capacity=10, refill_per_second=0)
+    _admit(controller, 10)
+    with pytest.raises(HTTPException) as error:
+        _admit(controller, 1)
+    assert error.value.headers["Retry-After"] == str(MAX_RETRY_AFTER_SECONDS)
+
+def test_disabled_controller_admits_everything():
+    controller = AdmissionController(InMemoryRateLimitBackend(), capacity=1, refill_per_second=0, enabled=False)
+    for _ in range(5):
+        _admit(controller, 100)
+
+def test_incomplete_backend_fails_at_construction():
+    class Incomplete(RateLimitBackend):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+def test_costs_grow_with_work():
+    small = inference_cost([3, 32, 32], {"layers": [{}] * 2})
+    large = inference_cost([3, 224, 224], {"layers": [{}] * 20})
+    assert 1.0 < small < large
+    assert simulation_cost({"epochs": 50}) == 2.0
+    assert simulation_cost({"epochs": "many"}) == 2.0
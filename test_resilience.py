@@ -0,0 +1,135 @@
+"""
+Unit tests for the circuit breaker and single-flight call coalescing
+Run with: python -m pytest test_resilience.py
+"""
+import asyncio
+import pytest
+from backend.core.resilience import CircuitBreaker, SingleFlight
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def _breaker(clock, threshold=3, reset_timeout=10.0):
+    return CircuitBreaker("test", failure_threshold=threshold, reset_timeout=reset_timeout, clock=clock)
+
+def test_opens_after_consecutive_failures():
+    breaker = _breaker(FakeClock())
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+def test_half_open_lets_one_probe_through():
+    clock = FakeClock()
+    breaker = _breaker(clock, threshold=1)
+    breaker.record_failure()
+    clock.now += 9.9
+    assert not breaker.allow()
+    clock.now += 0.1
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+
+def test_probe_success_closes_and_failure_reopens():
+    clock = FakeClock()
+    breaker = _breaker(clock, threshold=2)
+    breaker.record_failure()
+    breaker.record_failure()
+    clock.now += 10
+    assert breaker.allow()
+    breaker.record_failure()
+    # One failed probe is enough to open again, for a fresh timeout
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now += 10
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow() and breaker.allow()
+
+def test_released_probe_can_be_granted_again():
+    clock = FakeClock()
+    breaker = _breaker(clock, threshold=1)
+    breaker.record_failure()
+    clock.now += 10
+    assert breaker.allow()
+    breaker.release_probe()
+    assert breaker.allow()
+
+def test_single_flight_shares_one_execution():
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def main():
+        flight = SingleFlight()
+        results = await asyncio.gather(*(flight.do("k", work) for _ in range(3)))
+        assert "k" not in flight
+        return results
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True]
+    assert all(value == "result" for value, _ in results)
+
+def test_single_flight_shares_exceptions():
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream")
+
+    async def main():
+        flight = SingleFlight()
+        return await asyncio.gather(flight.do("k", fail), flight.do("k", fail), return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in asyncio.run(main()))
+
+def test_cancelled_waiter_does_not_cancel_the_shared_call():
+    finished = []
+
+    async def work():
+        await asyncio.sleep(0.05)
+        finished.append(True)
+        return "result"
+
+    async def main():
+        flight = SingleFlight()
+        first = asyncio.create_task(flight.do("k", work))
+        second = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == ("result", True)
+    assert finished == [True]
+
+def test_call_runs_to_completion_when_every_waiter_is_cancelled():
+    finished = []
+
+    async def work():
+        await asyncio.sleep(0.03)
+        finished.append(True)
+
+    async def main():
+        flight = SingleFlight()
+        waiter = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        await asyncio.sleep(0.05)
+        return "k" in flight
+
+    assert asyncio.run(main()) is False
+    assert finished == [True]
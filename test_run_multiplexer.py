@@ -0,0 +1,97 @@
+"""
+Unit tests for forwarding several runs over one connection
+Run with: python -m pytest test_run_multiplexer.py
+"""
+import asyncio
+from backend.services.run_multiplexer import RunMultiplexer
+
+async def _epochs(count, delay=0.0, tail=None):
+    for epoch in range(1, count + 1):
+        if delay:
+            await asyncio.sleep(delay)
+        yield {"epoch": epoch}
+    if tail is not None:
+        yield tail
+
+def _collect(start, send_delay=0.0, settle=0.3, **kwargs):
+    """Start runs with `start(mux)` and return every message sent until they settle"""
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+        if send_delay:
+            await asyncio.sleep(send_delay)
+
+    async def main():
+        async with RunMultiplexer(send, **kwargs) as mux:
+            start(mux)
+            await asyncio.sleep(settle)
+
+    asyncio.run(main())
+    return sent
+
+def _epochs_of(sent, run_id):
+    return [m["epoch"] for message in sent if message["type"] == "metrics" and message["id"] == run_id for m in message["data"]]
+
+def test_runs_are_forwarded_and_finish_with_done():
+    sent = _collect(lambda mux: (mux.start("a", _epochs(3, 0.01)), mux.start("b", _epochs(2, 0.01))))
+    assert _epochs_of(sent, "a") == [1, 2, 3]
+    assert _epochs_of(sent, "b") == [1, 2]
+    assert {"type": "done", "id": "a"} in sent
+    assert sent.index({"type": "done", "id": "b"}) > max(
+        i for i, m in enumerate(sent) if m["type"] == "metrics" and m["id"] == "b"
+    )
+
+def test_slow_client_gets_coalesced_and_bounded_messages():
+    sent = _collect(lambda mux: mux.start("a", _epochs(50)), send_delay=0.05, max_pending=4)
+    metrics = [message for message in sent if message["type"] == "metrics"]
+    assert all(len(message["data"]) <= 4 for message in metrics)
+    assert _epochs_of(sent, "a")[-1] == 50
+    assert len(_epochs_of(sent, "a")) + sum(m.get("skipped", 0) for m in metrics) == 50
+
+def test_terminal_event_replaces_done():
+    stopped = {"type": "stopped", "reason": "time_budget"}
+    sent = _collect(lambda mux: mux.start("a", _epochs(2, tail=stopped)))
+    assert sent[-1] == {**stopped, "id": "a"}
+    assert {"type": "done", "id": "a"} not in sent
+
+def test_failing_stream_reports_an_error():
+    async def failing():
+        yield {"epoch": 1}
+        raise RuntimeError("out of memory")
+
+    sent = _collect(lambda mux: mux.start("a", failing()))
+    assert sent[-1] == {"type": "error", "id": "a", "detail": "out of memory"}
+
+def test_cancel_posts_cancelled_and_closes_the_stream():
+    closed = []
+
+    async def endless():
+        try:
+            while True:
+                await asyncio.sleep(0.01)
+                yield {"epoch": 1}
+        finally:
+            closed.append(True)
+
+    def start(mux):
+        mux.start("a", endless())
+        asyncio.get_running_loop().call_later(0.05, mux.cancel, "a")
+
+    sent = _collect(start)
+    assert sent[-1] == {"type": "cancelled", "id": "a"}
+    assert closed == [True]
+
+def test_run_limits():
+    errors = []
+
+    def start(mux):
+        mux.start("a", _epochs(1, 0.1))
+        for run_id in ("a", "b"):
+            try:
+                mux.check_available(run_id)
+            except ValueError as e:
+                errors.append(str(e))
+
+    _collect(start, max_runs=1)
+    assert errors == ["Run 'a' is already active", "At most 1 concurrent runs per connection"]
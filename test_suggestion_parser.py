@@ -0,0 +1,53 @@
+"""
+Unit tests for the incremental suggestion stream parser
+Run with: python -m pytest test_suggestion_parser.py
+"""
+import json
+from backend.services.suggestion_parser import SuggestionStreamParser
+
+DOCUMENT = {
+    "analysis": 'Deep "plain" stack {no BN}, see [1]\nSecond line',
+    "suggestions": [
+        {"parameter": "Normalization", "reason": "Add BatchNorm } after conv", "impact": "High"},
+        {"parameter": "Learning Rate", "suggested_value": "1e-4", "nested": {"a": [1, 2]}},
+    ],
+}
+
+def _feed(parser, text, size):
+    events = []
+    for start in range(0, len(text), size):
+        events.extend(parser.feed(text[start:start + size]))
+    return events
+
+def test_events_match_the_document_for_any_chunk_size():
+    text = "```json\n" + json.dumps(DOCUMENT, indent=2) + "\n```"
+    for size in (1, 2, 7, 64, len(text)):
+        parser = SuggestionStreamParser()
+        events = _feed(parser, text, size)
+        assert events == [
+            ("analysis", DOCUMENT["analysis"]),
+            ("suggestion", DOCUMENT["suggestions"][0]),
+            ("suggestion", DOCUMENT["suggestions"][1]),
+        ]
+        assert parser.analysis == DOCUMENT["analysis"]
+        assert parser.suggestions == DOCUMENT["suggestions"]
+        assert parser.text == text
+
+def test_each_suggestion_is_emitted_as_soon_as_it_closes():
+    text = json.dumps(DOCUMENT)
+    first_end = text.index('"High"}') + len('"High"}')
+    parser = SuggestionStreamParser()
+    events = parser.feed(text[:first_end])
+    assert events[-1] == ("suggestion", DOCUMENT["suggestions"][0])
+    assert parser.feed(text[first_end:]) == [("suggestion", DOCUMENT["suggestions"][1])]
+
+def test_analysis_after_suggestions_and_other_keys():
+    document = {"suggestions": [{"parameter": "x"}], "notes": "analysis", "analysis": "last"}
+    parser = SuggestionStreamParser()
+    assert _feed(parser, json.dumps(document), 5) == [("suggestion", {"parameter": "x"}), ("analysis", "last")]
+
+def test_plain_text_yields_no_events():
+    parser = SuggestionStreamParser()
+    assert _feed(parser, "I cannot answer that in JSON.", 4) == []
+    assert parser.analysis is None
+    assert parser.suggestions == []
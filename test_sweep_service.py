@@ -0,0 +1,77 @@
+"""
+Unit tests for sweep trial expansion and median early stopping
+Run with: python -m pytest test_sweep_service.py
+"""
+import pytest
+from backend.core.config import settings
+from backend.services.sweep_service import SEARCH_RANDOM, MedianStoppingRule, expand_trials
+
+def test_grid_is_the_cartesian_product():
+    trials = expand_trials({"epochs": 5, "optimizer": "adam"}, {"learning_rate": [0.1, 0.01], "batch_size": [16, 32, 64]})
+    assert len(trials) == 6
+    assert trials[0] == {"epochs": 5, "optimizer": "adam", "learning_rate": 0.1, "batch_size": 16}
+    assert {(t["learning_rate"], t["batch_size"]) for t in trials} == {
+        (lr, bs) for lr in (0.1, 0.01) for bs in (16, 32, 64)
+    }
+
+def test_invalid_grids_are_rejected():
+    with pytest.raises(ValueError):
+        expand_trials({}, {})
+    with pytest.raises(ValueError):
+        expand_trials({}, {"learning_rate": 0.1})
+    with pytest.raises(ValueError):
+        expand_trials({}, {"learning_rate": []})
+    too_many = {"a": list(range(settings.SWEEP_MAX_TRIALS)), "b": [1, 2]}
+    with pytest.raises(ValueError):
+        expand_trials({}, too_many)
+    with pytest.raises(ValueError):
+        expand_trials({}, {"a": [1]}, search="bayesian")
+
+def test_random_search_samples_within_the_space():
+    parameters = {
+        "learning_rate": {"min": 1e-4, "max": 1e-1, "log": True},
+        "batch_size": {"min": 8, "max": 128, "type": "int"},
+        "optimizer": ["adam", "sgd"],
+    }
+    trials = expand_trials({"epochs": 3}, parameters, search=SEARCH_RANDOM, num_trials=20, seed=7)
+    assert len(trials) == 20
+    for trial in trials:
+        assert trial["epochs"] == 3
+        assert 1e-4 <= trial["learning_rate"] <= 1e-1
+        assert isinstance(trial["batch_size"], int) and 8 <= trial["batch_size"] <= 128
+        assert trial["optimizer"] in ("adam", "sgd")
+    assert trials == expand_trials({"epochs": 3}, parameters, search=SEARCH_RANDOM, num_trials=20, seed=7)
+
+def test_invalid_random_searches_are_rejected():
+    with pytest.raises(ValueError):
+        expand_trials({}, {"lr": {"min": 0.1}}, search=SEARCH_RANDOM)
+    with pytest.raises(ValueError):
+        expand_trials({}, {"lr": [0.1]}, search=SEARCH_RANDOM, num_trials=settings.SWEEP_MAX_TRIALS + 1)
+
+def _report(rule, trial, values):
+    return [rule.report(trial, {"valLoss": value}) for value in values]
+
+def test_median_rule_stops_a_trailing_trial_after_the_grace_period():
+    rule = MedianStoppingRule("valLoss", grace_epochs=2)
+    _report(rule, 0, [1.0, 0.8, 0.6])
+    _report(rule, 1, [1.1, 0.9, 0.7])
+    assert _report(rule, 2, [2.0, 1.9, 1.8]) == [False, True, True]
+
+def test_median_rule_uses_the_best_value_so_far():
+    rule = MedianStoppingRule("valLoss", grace_epochs=1)
+    _report(rule, 0, [1.0, 1.0])
+    _report(rule, 1, [1.0, 1.0])
+    # A noisy epoch does not stop a trial whose best value keeps up
+    assert _report(rule, 2, [0.9, 5.0]) == [False, False]
+
+def test_median_rule_waits_for_enough_trials():
+    rule = MedianStoppingRule("valLoss", grace_epochs=1, min_trials=3)
+    _report(rule, 0, [0.1, 0.1])
+    assert _report(rule, 1, [9.0, 9.0]) == [False, False]
+
+def test_median_rule_for_metrics_where_higher_is_better():
+    rule = MedianStoppingRule("valAcc", grace_epochs=1)
+    for trial, accuracy in enumerate([0.9, 0.8]):
+        rule.report(trial, {"valAcc": accuracy})
+    assert rule.report(2, {"valAcc": 0.5}) is True
+    assert rule.report(3, {"valAcc": 0.95}) is False
@@ -0,0 +1,87 @@
+"""
+Unit tests for synthetic image batches
+Run with: python -m pytest test_synthetic_data.py
+"""
+import threading
+import pytest
+import torch
+from backend.services.synthetic_data import SyntheticBatchGenerator, SyntheticDataset
+
+def _dataset(**kwargs):
+    return SyntheticDataset((3, 8, 8), kwargs.pop("class_weights", [1.0, 1.0]), seed=kwargs.pop("seed", 0), **kwargs)
+
+def _copies(generator):
+    return [(images.clone(), labels.clone()) for images, labels in generator]
+
+def test_batches_are_deterministic_for_a_seed():
+    def draw(seed, prefetch):
+        with SyntheticBatchGenerator(_dataset(augmentations=["Flip", "Rotation"]), 4, num_batches=3, seed=seed, prefetch=prefetch) as generator:
+            return _copies(generator)
+
+    first, second, other = draw(1, 2), draw(1, 0), draw(2, 2)
+    assert all(torch.equal(a[0], b[0]) and torch.equal(a[1], b[1]) for a, b in zip(first, second))
+    assert not torch.equal(first[0][0], other[0][0])
+
+def test_batch_shapes_and_dtypes():
+    with SyntheticBatchGenerator(_dataset(class_weights=[1, 1, 1]), 5, num_batches=2) as generator:
+        batches = _copies(generator)
+    assert len(batches) == 2
+    images, labels = batches[0]
+    assert images.shape == (5, 3, 8, 8) and images.dtype == torch.float32
+    assert labels.shape == (5,) and labels.dtype == torch.int64
+    assert int(labels.min()) >= 0 and int(labels.max()) < 3
+
+def test_labels_follow_the_class_imbalance():
+    dataset = _dataset(class_weights=[900, 100])
+    labels = torch.empty(20000, dtype=torch.int64)
+    dataset.fill(torch.empty(20000, 3, 8, 8), labels, torch.Generator().manual_seed(0))
+    counts = torch.bincount(labels, minlength=2).tolist()
+    assert counts[0] / counts[1] == pytest.approx(9.0, rel=0.1)
+
+def test_ring_buffers_are_reused():
+    with SyntheticBatchGenerator(_dataset(), 2, num_batches=6, prefetch=2) as generator:
+        pointers = [images.data_ptr() for images, _ in generator]
+    assert len(set(pointers)) == 3
+    assert pointers[:3] == pointers[3:]
+
+def test_close_stops_a_blocked_producer():
+    generator = iter(SyntheticBatchGenerator(_dataset(), 2, prefetch=1))
+    next(generator)
+    # Both buffers are taken (one held here, one ready), so the producer waits for a free slot
+    closer = threading.Thread(target=generator.close)
+    closer.start()
+    closer.join(timeout=5)
+    assert not closer.is_alive()
+    with pytest.raises(StopIteration):
+        next(generator)
+
+@pytest.mark.parametrize("prefetch", [0, 2])
+def test_exhausted_generator_keeps_raising_stop_iteration(prefetch):
+    generator = SyntheticBatchGenerator(_dataset(), 2, num_batches=2, prefetch=prefetch)
+    assert len(list(generator)) == 2
+    assert next(generator, "done") == "done"
+    assert next(generator, "done") == "done"
+    generator.close()
+
+def test_producer_error_is_raised_once_then_iteration_ends():
+    dataset = _dataset()
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("fill failed")
+
+    dataset.fill = fail
+    generator = iter(SyntheticBatchGenerator(dataset, 2, num_batches=3))
+    with pytest.raises(RuntimeError):
+        next(generator)
+    assert next(generator, "done") == "done"
+    generator.close()
+
+def test_invalid_inputs():
+    with pytest.raises(ValueError):
+        _dataset(class_weights=[0, 0])
+    with pytest.raises(ValueError):
+        _dataset(augmentations=["Blur"])
+    with pytest.raises(ValueError):
+        SyntheticDataset((3, 64, 64), [1.0] * 10, max_pattern_bytes=1024)
+    with pytest.raises(ValueError):
+        SyntheticBatchGenerator(_dataset(), 0)
@@ -0,0 +1,48 @@
+"""
+Unit tests for NDJSON bulk import line splitting and export chunking
+Run with: python -m pytest test_transfer.py
+"""
+import asyncio
+from backend.api.v1.endpoints.transfer import _chunked, _iter_lines
+
+class FakeRequest:
+    """Request whose body arrives in the given chunks"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    async def stream(self):
+        for chunk in self.chunks:
+            yield chunk
+
+def _lines(chunks, max_line_bytes=1024):
+    async def collect():
+        return [item async for item in _iter_lines(FakeRequest(chunks), max_line_bytes)]
+    return asyncio.run(collect())
+
+def test_lines_split_across_chunks():
+    assert _lines([b'{"a": 1}\n{"b"', b': 2}\n', b'{"c": 3}']) == [
+        (1, b'{"a": 1}'),
+        (2, b'{"b": 2}'),
+        (3, b'{"c": 3}'),
+    ]
+
+def test_blank_lines_are_skipped_but_counted():
+    assert _lines([b'{"a": 1}\n\n  \n{"b": 2}\n']) == [(1, b'{"a": 1}'), (4, b'{"b": 2}')]
+
+def test_oversized_line_is_reported_without_buffering_it():
+    body = [b'{"a": 1}\n', b"x" * 40, b"x" * 40, b'\n{"b": 2}\n']
+    assert _lines(body, max_line_bytes=32) == [(1, b'{"a": 1}'), (2, None), (3, b'{"b": 2}')]
+
+def test_oversized_last_line_without_newline():
+    assert _lines([b'{"a": 1}\n', b"x" * 100], max_line_bytes=32) == [(1, b'{"a": 1}'), (2, None)]
+
+def test_chunked_groups_small_lines():
+    async def lines():
+        for i in range(5):
+            yield b"%d\n" % i
+
+    async def collect():
+        return [chunk async for chunk in _chunked(lines(), 4)]
+
+    assert asyncio.run(collect()) == [b"0\n1\n", b"2\n3\n", b"4\n"]
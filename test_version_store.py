@@ -0,0 +1,74 @@
+"""
+Unit tests for delta-encoded version storage
+Run with: python -m pytest test_version_store.py
+"""
+import copy
+from backend.services.version_store import VersionStore, apply_patch, architecture_hash, make_patch
+
+def _architecture(channels=16, extra_layers=0):
+    layers = [
+        {"type": "Conv2d", "params": {"in_channels": 3, "out_channels": channels, "kernel_size": 3}},
+        {"type": "ReLU", "params": {}},
+    ]
+    layers += [{"type": "Dropout", "params": {"p": 0.1 * i}} for i in range(extra_layers)]
+    layers.append({"type": "Linear", "params": {"out_features": 10}})
+    return {"layers": layers, "meta": {"name": "net"}}
+
+def test_round_trip_parameter_change():
+    old, new = _architecture(16), _architecture(32)
+    patch = make_patch(old, new)
+    assert patch == [{"op": "replace", "path": "/layers/0/params/out_channels", "value": 32}]
+    assert apply_patch(old, patch) == new
+
+def test_round_trip_insert_and_delete_in_the_middle():
+    old = _architecture(extra_layers=3)
+    new = copy.deepcopy(old)
+    new["layers"].insert(2, {"type": "BatchNorm2d", "params": {}})
+    del new["layers"][4]
+    assert apply_patch(old, make_patch(old, new)) == new
+
+    shorter = copy.deepcopy(old)
+    del shorter["layers"][1:3]
+    assert apply_patch(old, make_patch(old, shorter)) == shorter
+
+def test_keys_with_slashes_and_tildes_are_escaped():
+    old = {"a/b": 1, "c~d": {"x": 1}}
+    new = {"a/b": 2, "c~d": {"x": 1, "y": 2}, "new": [1]}
+    assert apply_patch(old, make_patch(old, new)) == new
+
+def test_type_changes_are_not_treated_as_equal():
+    # 1 == True and 1 == 1.0 in Python, but they serialize differently
+    assert make_patch({"v": 1}, {"v": True}) == [{"op": "replace", "path": "/v", "value": True}]
+    assert make_patch({"v": 1}, {"v": 1.0}) != []
+
+def test_apply_patch_does_not_modify_its_input():
+    old, new = _architecture(16), _architecture(32)
+    original = copy.deepcopy(old)
+    apply_patch(old, make_patch(old, new))
+    assert old == original
+
+def test_encode_stores_snapshots_at_the_interval():
+    store = VersionStore(snapshot_interval=3, cache_size=4)
+    first = store.encode(_architecture(16), 1)
+    assert first["architecture_patch"] is None
+    assert first["snapshot_version_number"] == 1
+
+    second = store.encode(_architecture(32), 2, previous=(1, 1, _architecture(16)))
+    assert second["architecture"] == {}
+    assert second["snapshot_version_number"] == 1
+    assert apply_patch(_architecture(16), second["architecture_patch"]) == _architecture(32)
+    assert second["architecture_hash"] == architecture_hash(_architecture(32))
+
+    fourth = store.encode(_architecture(64), 4, previous=(3, 1, _architecture(32)))
+    assert fourth["architecture_patch"] is None
+    assert fourth["snapshot_version_number"] == 4
+
+def test_encode_falls_back_to_a_snapshot_for_large_or_non_consecutive_changes():
+    store = VersionStore(snapshot_interval=10, cache_size=4)
+    unrelated = {"layers": [{"type": "Linear", "params": {"out_features": 2}}]}
+    assert store.encode(unrelated, 2, previous=(1, 1, _architecture(16)))["architecture_patch"] is None
+    assert store.encode(_architecture(32), 5, previous=(3, 1, _architecture(16)))["architecture_patch"] is None
+
+def test_architecture_hash_ignores_key_order():
+    assert architecture_hash({"a": 1, "b": [1, 2]}) == architecture_hash({"b": [1, 2], "a": 1})
+    assert architecture_hash({"a": 1}) != architecture_hash({"a": 2})